@@ -51,7 +51,7 @@ if __name__ == "__main__":
         ],
         python_requires='>=3.6',
         setup_requires=['pytest-runner'],
-        install_requires=['numpy','sympy>=1.0'],
+        install_requires=['numpy'],
         tests_require=['pytest','coverage','pytest-cov'],
         test_suite="tests",
         py_modules = ['AD_vec', 'AD', "admath"]
@@ -1,22 +1,84 @@
-import math
 import numbers
 import numpy as np
 import warnings
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from autodiffcst.admath import chain_rule,fact_ad,choose, log, exp
+from autodiffcst.admath import chain_rule, log, exp, _coefficients, _from_taylor, _array_ufunc
+from autodiffcst import taylor
 # from admath import chain_rule,fact_ad,choose
 
+def _add_der2(der2, other_der2):
+    """
+    A helper function that adds two second order derivatives, where None stands for derivatives that are not tracked.
+
+            Parameters:
+                    der2, other_der2 (np.ndarray or None): the second order derivatives of two AD objects
+
+            Returns:
+                    Their sum, or None if any of them is not tracked (first-order mode)
+
+            Example:
+            >>> _add_der2(np.eye(2), None) is None
+            True
+    """
+    if der2 is None or other_der2 is None:
+        return None
+    return der2 + other_der2
+
+
+def _order_of(der2):
+    """
+    A helper function that gives the order of a new AD object from its second order derivative.
+
+            Parameters:
+                    der2 (np.ndarray or None): the second order derivative, None in first-order mode
+
+            Returns:
+                    1 if der2 is None, 2 otherwise
+
+            Example:
+            >>> _order_of(None)
+            1
+    """
+    return 1 if der2 is None else 2
+
+
+def _merge_tags(tag, other_tag):
+    """
+    A helper function that merges the tags of two AD objects, skipping the sort when they are the same.
+
+            Parameters:
+                    tag, other_tag (np.ndarray of int): the sorted tags of two AD objects
+
+            Returns:
+                    The sorted union of the tags
+
+            Example:
+            >>> _merge_tags(np.array([0, 2]), np.array([1]))
+            array([0, 1, 2])
+    """
+    if tag is other_tag or (len(tag) == len(other_tag) and tag.tobytes() == other_tag.tobytes()):
+        return tag
+    if len(tag) + len(other_tag) <= 32:
+        # for a few tags, a Python set is much cheaper than a numpy sort
+        return np.array(sorted(set(tag.tolist()).union(other_tag.tolist())))
+    return np.union1d(tag, other_tag)
+
+
 class AD():
 
+    # a fixed layout keeps every AD object small and its attribute lookups fast
+    __slots__ = ("val", "der", "der2", "size", "tag", "order", "higher")
+
     def __init__(self, val, order=2, size = None, tag=None, der=None, der2=None,  higher=None): 
         """
         Overwrites the __init__ dunder method to create a new AD object with initial value and derivatives.
     
                 Parameters:
                         val (int or float): the initial value of the new AD object.
-                        order (int): the highest order of derivatives the user wants to evaluate
+                        order (int): the highest order of derivatives the user wants to evaluate. 
+                                     With order 1, second order derivatives are neither stored nor propagated.
                         size (int): the size of dimension that the AD object resides
                         tag (list of int or np.ndarray of int): the tag, or direction that the AD object resides in its dimension
                         der (list of float or np.ndarray of float): first order derivative of the new AD object, 
@@ -59,7 +121,10 @@ class AD():
             self.der = np.zeros(self.size)
             self.der[tag] = 1
         
-        if isinstance(der2, np.ndarray):
+        if order == 1:
+            # first-order mode: der2 is never allocated
+            self.der2 = None
+        elif isinstance(der2, np.ndarray):
             self.der2 = der2
         else:
             self.der2 = np.zeros((self.size,self.size))
@@ -87,6 +152,36 @@ class AD():
             raise TypeError("Invalid input for order of derivative.")
 
 
+    @classmethod
+    def _new(cls, val, tag, der, der2, higher=None):
+        """
+        Private constructor used by the operators and the chain rule, whose arguments are already consistent:
+        nothing is validated, the size is the length of der and the order follows from der2 and higher.
+
+                Parameters:
+                        val (np.ndarray or int or float): the value of the new AD object
+                        tag (np.ndarray of int): the tag of the new AD object
+                        der (np.ndarray of float): first order derivative of the new AD object
+                        der2 (np.ndarray of float or None): second order derivative, None in first-order mode
+                        higher (np.ndarray of float or None): higher order derivatives, if any
+
+                Returns:
+                        A new AD object
+
+                Example:
+                >>> AD._new(np.array([2.]), np.array([0]), np.array([1.]), None)
+                AD(value: [2.], derivatives: [1.])
+        """
+        new = object.__new__(cls)
+        new.val = val if isinstance(val, np.ndarray) else np.array([val])
+        new.tag = tag
+        new.der = der
+        new.der2 = der2
+        new.size = len(der)
+        new.higher = higher
+        new.order = len(higher) if higher is not None else _order_of(der2)
+        return new
+
     def __repr__(self):
         """
         Overwrites the __repr__ dunder method to nicely print an AD object.
@@ -179,6 +274,8 @@ class AD():
                 False
         """ 
         if isinstance(other, AD):
+            if self.der2 is None or other.der2 is None:
+                return np.allclose(self.val, other.val) and np.allclose(self.der,other.der) and self.der2 is other.der2
             return np.allclose(self.val, other.val) and np.allclose(self.der,other.der) and np.allclose(self.der2, other.der2)
         else:
             raise TypeError("Invalid Comparison. AD object can only be compared with AD.")
@@ -319,27 +416,30 @@ class AD():
                 >>> x + y
                 AD(value: [4], derivatives: [1., 1.])
         """        
+        if not isinstance(other, AD) and hasattr(other, "_chain_rule"):
+            # let vectorized objects such as VAD handle the operation
+            return NotImplemented
         try:
             new_der = self.der + other.der
-            new_der2 = self.der2 + other.der2
+            new_der2 = _add_der2(self.der2, other.der2)
             new_val = self.val + other.val
 
-            new_tag = np.unique(np.concatenate((self.tag,other.tag),0))#np.nonzero(new_der)
+            new_tag = _merge_tags(self.tag, other.tag)
             if self.higher is None or other.higher is None:
-                return AD(val = new_val, tag = new_tag, der = new_der, der2 = new_der2, size = self.size)
+                return AD._new(new_val, new_tag, new_der, new_der2)
             else:
                 if len(self.higher) != len(other.higher):
                     raise Exception("The two object are not initialized with the same highest order.")
                 
-                return AD(val = new_val, tag = new_tag, der = new_der, der2 = new_der2, order=len(self.higher),size = self.size,higher=self.higher+other.higher)
+                return AD._new(new_val, new_tag, new_der, new_der2, higher=self.higher+other.higher)
         except AttributeError:
             if isinstance(other, int) or isinstance(other, float):
 
                 new_val = self.val + other
                 if self.higher is None:
-                    new_self = AD(val=new_val, tag=self.tag, der=self.der, der2=self.der2, size=self.size)
+                    new_self = AD._new(new_val, self.tag, self.der, self.der2)
                 else:
-                    new_self = AD(val = new_val, tag = self.tag, der = self.der, der2 = self.der2,order=len(self.higher),size = self.size,higher=self.higher)
+                    new_self = AD._new(new_val, self.tag, self.der, self.der2, higher=self.higher)
                 return new_self
             else:
                 raise TypeError("Invalid type.")
@@ -457,46 +557,40 @@ class AD():
                 >>> x * y
                 AD(value: [3.], derivatives: [1.，3.])
         """        
+        if not isinstance(other, AD) and hasattr(other, "_chain_rule"):
+            # let vectorized objects such as VAD handle the operation
+            return NotImplemented
         try:
             
             new_der = self.der * other.val + self.val * other.der
             
-            new_der2 = self.val * other.der2 + np.matmul(np.array([other.der]).T,np.array([self.der]))  \
-                        + np.matmul(np.array([self.der]).T,np.array([other.der]))+ other.val * self.der2
+            if self.der2 is None or other.der2 is None:
+                new_der2 = None
+            else:
+                # the two cross terms are transposes of each other: form one outer product only
+                cross = np.outer(self.der, other.der)
+                new_der2 = self.val * other.der2 + other.val * self.der2 + cross + cross.T
 
             new_val = self.val * other.val
             
-            new_tag = np.unique(np.concatenate((self.tag,other.tag),0))
+            new_tag = _merge_tags(self.tag, other.tag)
             # return AD(val = new_val, tag = new_tag, der = new_der, der2 = new_der2, size = self.size)
             higher_der = None
-            if self.higher is not None and other.higher is not None and self.tag == other.tag :
-                #print("???")
-                higher_der = np.array([0.0] * len(self.higher))
-                higher_der[0] = new_der
-                higher_der[1] = new_der2
-                for i in range(0,len(self.higher)):
-                    sumval = 0
-                    n = i + 1
-                    for k in range(n+1):
-                        if k == 0:
-                            sumval += choose(n,k) * self.val * other.higher[n-k-1]
-                        elif k == n:
-                            sumval += choose(n,k) * self.higher[k-1] * other.val
-                        else:
-                            sumval += choose(n,k) * self.higher[k-1] * other.higher[n-k-1]
-                    higher_der[i] = sumval
+            if self.higher is not None and other.higher is not None and np.array_equal(self.tag, other.tag):
+                # Leibniz rule as a convolution of Taylor coefficients
+                higher_der = taylor.derivatives(taylor.mul(_coefficients(self), _coefficients(other)))
             
-            return AD(val=new_val,tag = new_tag, der=new_der, der2=new_der2, order = self.order, size=self.size, higher=higher_der)
+            return AD._new(new_val, new_tag, new_der, new_der2, higher=higher_der)
         except AttributeError:
             if isinstance(other, int) or isinstance(other, float):
                 new_val = self.val * other
                 new_der = self.der * other 
-                new_der2 = self.der2 * other
+                new_der2 = None if self.der2 is None else self.der2 * other
                 if self.higher is None:
-                    new_self = AD(val = new_val, tag = self.tag, der = new_der, der2 = new_der2, size = self.size)
+                    new_self = AD._new(new_val, self.tag, new_der, new_der2)
                 else:
                     higher_der = other * self.higher
-                    new_self = AD(val = new_val, tag = self.tag, der = new_der, der2 = new_der2, order=len(higher_der), size = self.size, higher=higher_der)
+                    new_self = AD._new(new_val, self.tag, new_der, new_der2, higher=higher_der)
                 return new_self
                     
             else:
@@ -559,6 +653,9 @@ class AD():
                 >>> x / y
                 AD(value: [3.], derivatives: [1.，-2.])
         """
+        if isinstance(other, AD) and self.higher is not None and other.higher is not None \
+                and np.array_equal(self.tag, other.tag):
+            return _from_taylor(self, taylor.div(_coefficients(self), _coefficients(other)))
         return self * (other ** (-1.0))
 
     
@@ -579,14 +676,12 @@ class AD():
                 >>> 3/x 
                 AD(value: [1.], derivatives: [-0.33333333, -0.])
         """            
-        try:
-            return other / self
-        
-        except RecursionError:
-            if isinstance(other, int) or isinstance(other, float):
-                return other*self **(-1)            
-            else:
-                raise TypeError("Invalid division type.")
+        if isinstance(other, int) or isinstance(other, float):
+            if self.higher is not None:
+                return _from_taylor(self, other * taylor.recip(_coefficients(self)))
+            return other * self ** (-1.0)
+        else:
+            raise TypeError("Invalid division type.")
 
     
     def __itruediv__(self, other):
@@ -633,29 +728,22 @@ class AD():
                 if other.val <= 2:
                     raise ValueError("Derivative is undefined.")
                 else:
-                    return AD(0, tag = self.tag, der = np.zeros(self.size), der2 = np.zeros((self.size, self.size)))
+                    return AD(0, tag = self.tag, der = np.zeros(self.size), der2 = np.zeros((self.size, self.size)), order = _order_of(self.der2))
     
         elif isinstance(other, int) or isinstance(other, float) or isinstance(other, list) or isinstance(other, np.ndarray):
             try:
                 other = float(other)
-            except:
+            except TypeError:
                 other = np.array([float(i) for i in other])
 
             new_der = (self.val ** (other - 1.)) * other
             new_der2 = (self.val ** (other - 2.)) * other * (other-1.0)
 
             new_val = np.power(self.val, other)
-            higher_der = None
             if self.higher is not None:
-                higher_der = np.array([1.0]*len(self.higher))
-                for i in range(len(self.higher)):
-                    n = i + 1
-
-                    coef = fact_ad(other,n)
-                    mainval = math.pow(self.val[0],other-n)
-                    higher_der[i] = coef*mainval
+                return _from_taylor(self, taylor.pow(_coefficients(self), other))
             
-            return chain_rule(self, new_val, new_der, new_der2, higher_der = higher_der)
+            return chain_rule(self, new_val, new_der, new_der2)
 
         else:
             raise TypeError("Invalid power type.")
@@ -696,14 +784,32 @@ class AD():
                 >>> x
                 AD(value: [9.], derivatives: [6., 0.])
         """            
-        try:
-            return other ** self
-        
-        except RecursionError:
-            if isinstance(other, int) or isinstance(other, float):
-                return exp(log(other) * self)
-            else:
-                raise TypeError("Invalid type.") 
+        if isinstance(other, int) or isinstance(other, float):
+            return exp(log(other) * self)
+        else:
+            raise TypeError("Invalid type.") 
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """
+        Implements the NumPy ufunc protocol, so NumPy functions such as np.sin or np.exp apply the derivative
+        rules of admath to AD objects, and NumPy scalars and arrays combine with them through the AD operators.
+
+                Parameters:
+                        self (AD): an AD object among the inputs
+                        ufunc (np.ufunc): the ufunc called
+                        method (str): how the ufunc is called, only "__call__" is supported
+                        inputs: the operands of the ufunc
+                        kwargs: keyword arguments of the ufunc, none are supported
+
+                Returns:
+                        A new AD object, or NotImplemented for unsupported ufuncs
+
+                Example:
+                >>> x = AD(0, tag=0, size=1)
+                >>> np.sin(x) + np.float64(1.)
+                AD(value: [1.], derivatives: [1.])
+        """
+        return _array_ufunc(ufunc, method, *inputs, **kwargs)
     
 
     # Differentiation
@@ -731,6 +837,8 @@ class AD():
             return self.der[direction]
 
         elif order == 2 and isinstance(direction, list) and len(direction) == 2:
+            if self.der2 is None:
+                raise ValueError("Second order derivatives are not stored when the AD object is initialized with order 1.")
             return self.der2[direction[0], direction[1]]
         else:
             raise Exception("Order exceeds 2 or length of direction and order don't match.")
@@ -0,0 +1,1037 @@
+import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import autodiffcst.admath as admath
+from autodiffcst.AD_vec import _constant, _gaps
+
+
+class Tape():
+
+    def __init__(self):
+        """
+        Create an empty tape, which records the operations applied to RAD objects in the order they are executed.
+
+                Parameters:
+                        None
+
+                Returns:
+                        None, but initializes an empty Tape object when called
+
+                Example:
+                >>> tape = Tape()
+                >>> x = RAD([1, 2], tape=tape)
+                >>> len(tape)
+                1
+        """
+        self.nodes = []
+        self.adjoints = None
+        self.adjoint_dots = None
+
+    def __len__(self):
+        """
+        Overwrites the __len__ dunder method to get the number of recorded operations.
+
+                Parameters:
+                        self (Tape): the Tape object that __len__ is called upon.
+
+                Returns:
+                        An integer, the number of RAD objects recorded on the tape.
+
+                Example:
+                >>> x = RAD([1, 2])
+                >>> y = x * x
+                >>> len(x.tape)
+                2
+        """
+        return len(self.nodes)
+
+    def record(self, node):
+        """
+        Append a RAD object to the tape and give it its position on the tape.
+
+                Parameters:
+                        self (Tape): the Tape object that record is called upon.
+                        node (RAD): the newly created RAD object.
+
+                Returns:
+                        None, but node.index is set to the position of node on the tape.
+        """
+        node.index = len(self.nodes)
+        self.nodes.append(node)
+
+    def backward(self, output, seed=None):
+        """
+        Run the reverse sweep: propagate adjoints from output back to every recorded RAD object it depends on.
+        Each recorded operation is visited once, so the cost is a small multiple of evaluating the function.
+        If the inputs carry a tangent direction v (see hvp), the tangents of the adjoints are propagated
+        alongside, which gives the Hessian-vector product H·v with respect to the inputs.
+
+                Parameters:
+                        self (Tape): the Tape object that backward is called upon.
+                        output (RAD or list of RAD): the RAD object(s) to be differentiated.
+                        seed (float or np.ndarray or list): adjoint of output (one per output if output is a list),
+                                                            defaults to ones.
+
+                Returns:
+                        A list with the adjoint of every RAD object on the tape (None if it does not affect output).
+
+                Example:
+                >>> x = RAD([1., 2.])
+                >>> y = (x * x).sum()
+                >>> adjoints = x.tape.backward(y)
+                >>> adjoints[x.index]
+                array([2., 4.])
+        """
+        outputs = output if isinstance(output, list) else [output]
+        seeds = seed if isinstance(output, list) and seed is not None else [seed] * len(outputs)
+        if len(seeds) != len(outputs):
+            raise ValueError("One seed is needed for each output.")
+        adjoints = [None] * len(self.nodes)
+        # adjoints we allocated ourselves can be updated in place
+        owned = [False] * len(self.nodes)
+        for out, out_seed in zip(outputs, seeds):
+            if out.tape is not self:
+                raise Exception("The output is not recorded on this tape.")
+            if out_seed is None:
+                out_seed = np.ones(np.shape(out.val))
+            _accumulate(adjoints, owned, out, None, np.array(np.broadcast_to(out_seed, np.shape(out.val)), dtype=float))
+        tangents = any(out.dot is not None for out in outputs)
+        adjoint_dots = [None] * len(self.nodes) if tangents else None
+        owned_dots = [False] * len(self.nodes) if tangents else None
+
+        for i in range(max(out.index for out in outputs), -1, -1):
+            g = adjoints[i]
+            if g is None:
+                continue
+            node = self.nodes[i]
+            for k, parent in enumerate(node.parents):
+                partial = node.partials[k]
+                _accumulate(adjoints, owned, parent, partial, g)
+                if not tangents:
+                    continue
+                # tangent of the adjoint: d(g * partial) = g_dot * partial + g * partial_dot
+                if adjoint_dots[i] is not None:
+                    _accumulate(adjoint_dots, owned_dots, parent, partial, adjoint_dots[i])
+                if node.partial_dots is not None and node.partial_dots[k] is not None:
+                    _accumulate(adjoint_dots, owned_dots, parent, node.partial_dots[k], g)
+        self.adjoints = adjoints
+        self.adjoint_dots = adjoint_dots
+        return adjoints
+
+
+def _accumulate(buffers, owned, parent, partial, g):
+    """
+        Add the contribution of an adjoint g through a local derivative to the adjoint buffer of a parent.
+
+                Parameters:
+                        buffers (list): the adjoint of every RAD object on the tape, None if not reached yet
+                        owned (list of bool): whether each buffer was allocated by the sweep and can be updated in place
+                        parent (RAD): the parent receiving the contribution
+                        partial (None or np.ndarray or float or _Index or _Pullback): the local derivative, None for the identity
+                        g (np.ndarray): the adjoint of the child
+
+                Returns:
+                        None, but buffers and owned are updated
+    """
+    j = parent.index
+    if isinstance(partial, _Index):
+        if buffers[j] is None:
+            buffers[j] = np.zeros(np.shape(parent.val))
+        elif not owned[j]:
+            buffers[j] = np.array(buffers[j], dtype=float)
+        owned[j] = True
+        np.add.at(buffers[j], partial.pos, g)
+        return
+    if isinstance(partial, _Pullback):
+        contrib = partial.pullback(g)
+    else:
+        contrib = g if partial is None else g * partial
+    contrib = _unbroadcast(contrib, np.shape(parent.val))
+    if buffers[j] is None:
+        buffers[j] = contrib
+    elif owned[j]:
+        buffers[j] += contrib
+    else:
+        buffers[j] = buffers[j] + contrib
+        owned[j] = True
+
+
+class _Index():
+
+    def __init__(self, pos):
+        """
+        Local derivative of an indexing operation, whose adjoint is scattered back to the indexed positions.
+
+                Parameters:
+                        pos (int or slice or np.ndarray): the position(s) used to index the parent RAD object
+
+                Returns:
+                        None, but initializes an _Index object when called
+        """
+        self.pos = pos
+
+
+class _Pullback():
+
+    def __init__(self, pullback):
+        """
+        Local derivative of a matrix operation that is not elementwise, such as a decomposition,
+        given by the function mapping the adjoint of the result to the adjoint of the operand.
+
+                Parameters:
+                        pullback (function): maps the adjoint of the result to the adjoint of the operand
+
+                Returns:
+                        None, but initializes a _Pullback object when called
+        """
+        self.pullback = pullback
+
+
+def _unbroadcast(g, shape):
+    """
+        Sum an adjoint over the axes that numpy broadcasting added, so it gets the shape of the operand.
+
+                Parameters:
+                        g (np.ndarray): the adjoint of the result of an operation
+                        shape (tuple): the shape of the operand
+
+                Returns:
+                        The adjoint of the operand, of the given shape
+
+                Example:
+                >>> _unbroadcast(np.ones((2, 3)), (3,))
+                array([2., 2., 2.])
+    """
+    if np.shape(g) == shape:
+        return g
+    g = np.asarray(g)
+    if g.ndim < len(shape):
+        return g
+    while g.ndim > len(shape):
+        g = g.sum(axis=0)
+    for axis, size in enumerate(shape):
+        if size == 1 and g.shape[axis] != 1:
+            g = g.sum(axis=axis, keepdims=True)
+    return g
+
+
+class RAD():
+
+    # let numpy arrays defer to the reflected operators of RAD
+    __array_ufunc__ = None
+
+    def __init__(self, val, tape=None, parents=(), partials=(), dot=None):
+        """
+        Create a new RAD (reverse mode AD) object and record it on a tape.
+        A RAD object created by the user is an independent variable;
+        RAD objects created by operations remember their parents and the local derivatives with respect to them.
+
+                Parameters:
+                        val (int or float or list or np.ndarray): the value of the new RAD object
+                        tape (Tape): the tape to record on, a new tape is created if not specified
+                        parents (tuple of RAD): the operands of the operation that created this object
+                        partials (tuple): local derivatives of the value with respect to each parent
+                        dot (float or list or np.ndarray): tangent direction of an independent variable,
+                                                           only needed for Hessian-vector products
+
+                Returns:
+                        None, but initializes a RAD object when called
+
+                Example:
+                >>> x = RAD([1, 2, 3])
+                >>> x
+                RAD(value: [1. 2. 3.])
+        """
+        self.val = np.asarray(val, dtype=float)
+        self.tape = Tape() if tape is None else tape
+        self.parents = parents
+        self.partials = partials
+        self.partial_dots = None
+        self.dot = None if dot is None else np.array(np.broadcast_to(dot, self.val.shape), dtype=float)
+        self.higher = None
+        self.tape.record(self)
+
+    def __repr__(self):
+        """
+        Overwrites the __repr__ dunder method to nicely print a RAD object.
+
+                Parameters:
+                        self (RAD): the RAD object that __repr__ is called upon.
+
+                Returns:
+                        A string containing the current value of the RAD object.
+
+                Example:
+                >>> repr(RAD(1))
+                'RAD(value: 1.0)'
+        """
+        return "RAD(value: {0})".format(self.val)
+
+    def __str__(self):
+        """
+        Overwrites the __str__ dunder method to nicely turn a RAD object into a string.
+
+                Parameters:
+                        self (RAD): the RAD object that __str__ is called upon.
+
+                Returns:
+                        A string containing the current value of the RAD object.
+
+                Example:
+                >>> str(RAD(1))
+                'RAD(value: 1.0)'
+        """
+        return "RAD(value: {0})".format(self.val)
+
+    def __len__(self):
+        """
+        Overwrites the __len__ dunder method to get the number of values held by the RAD object.
+
+                Parameters:
+                        self (RAD): the RAD object that __len__ is called upon.
+
+                Returns:
+                        An integer, the length of the value of the RAD object.
+
+                Example:
+                >>> len(RAD([1, 2, 3]))
+                3
+        """
+        return len(self.val)
+
+    def __getitem__(self, pos):
+        """
+        Overwrites the __getitem__ dunder method to get a new RAD object holding some of the values.
+
+                Parameters:
+                        self (RAD): the RAD object that __getitem__ is called upon.
+                        pos (int or slice or np.ndarray): valid position(s) of the value
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD([1, 2, 3])
+                >>> x[1]
+                RAD(value: 2.0)
+        """
+        return self._new(self.val[pos], (self,), (_Index(pos),))
+
+    def __iter__(self):
+        """
+        Overwrites the __iter__ dunder method to iterate over the values of the RAD object.
+
+                Parameters:
+                        self (RAD): the RAD object that __iter__ is called upon.
+
+                Returns:
+                        A generator of RAD objects, one for each value
+
+                Example:
+                >>> x, y = RAD([1, 2])
+                >>> y
+                RAD(value: 2.0)
+        """
+        for i in range(len(self)):
+            yield self[i]
+
+    def __lt__(self, other):
+        """
+        Overwrites the __lt__ dunder method to compare the value of the RAD object with another object.
+
+                Parameters:
+                        self (RAD): the RAD object that __lt__ is called upon.
+                        other (RAD or int or float): the object to be compared with.
+
+                Returns:
+                        True if the value of self is less than the value of other, elementwise.
+
+                Example:
+                >>> RAD(1) < 2
+                True
+        """
+        return self.val < _value(other)
+
+    def __gt__(self, other):
+        """
+        Overwrites the __gt__ dunder method to compare the value of the RAD object with another object.
+
+                Parameters:
+                        self (RAD): the RAD object that __gt__ is called upon.
+                        other (RAD or int or float): the object to be compared with.
+
+                Returns:
+                        True if the value of self is greater than the value of other, elementwise.
+
+                Example:
+                >>> RAD(1) > 2
+                False
+        """
+        return self.val > _value(other)
+
+    def __le__(self, other):
+        """
+        Overwrites the __le__ dunder method to compare the value of the RAD object with another object.
+
+                Parameters:
+                        self (RAD): the RAD object that __le__ is called upon.
+                        other (RAD or int or float): the object to be compared with.
+
+                Returns:
+                        True if the value of self is no larger than the value of other, elementwise.
+
+                Example:
+                >>> RAD(1) <= 1
+                True
+        """
+        return self.val <= _value(other)
+
+    def __ge__(self, other):
+        """
+        Overwrites the __ge__ dunder method to compare the value of the RAD object with another object.
+
+                Parameters:
+                        self (RAD): the RAD object that __ge__ is called upon.
+                        other (RAD or int or float): the object to be compared with.
+
+                Returns:
+                        True if the value of self is no less than the value of other, elementwise.
+
+                Example:
+                >>> RAD(1) >= 2
+                False
+        """
+        return self.val >= _value(other)
+
+    ## Unary
+    def __neg__(self):
+        """
+        Overwrites the __neg__ dunder method to get the negation of the RAD object.
+
+                Parameters:
+                        self (RAD): the RAD object that __neg__ is called upon.
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> -RAD(1)
+                RAD(value: -1.0)
+        """
+        return self._new(-self.val, (self,), (-1.0,))
+
+    ## Addition
+    def __add__(self, other):
+        """
+        Overwrites the __add__ dunder method to apply addition to a RAD object.
+
+                Parameters:
+                        self (RAD): A RAD object to be applied addition to
+                        other (RAD or valid input for the numpy operation): the object to be added to self
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD([1, 2])
+                >>> x + 1
+                RAD(value: [2. 3.])
+        """
+        if isinstance(other, RAD):
+            self._check_tape(other)
+            return self._new(self.val + other.val, (self, other), (None, None))
+        return self._new(self.val + _constant(other), (self,), (None,))
+
+    def __radd__(self, other):
+        """
+        Overwrites the __radd__ dunder method to apply addition to a RAD object
+        when the RAD object is on the right side of the addition sign.
+
+                Parameters:
+                        self (RAD): A RAD object to be applied addition to
+                        other (valid input for the numpy operation): the object to be added to self
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD([1, 2])
+                >>> 1 + x
+                RAD(value: [2. 3.])
+        """
+        return self + other
+
+    def __sub__(self, other):
+        """
+        Overwrites the __sub__ dunder method to apply substraction to a RAD object.
+
+                Parameters:
+                        self (RAD): A RAD object to be applied substraction to
+                        other (RAD or valid input for the numpy operation): the object to be substracted from self
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD([1, 2])
+                >>> x - 1
+                RAD(value: [0. 1.])
+        """
+        if isinstance(other, RAD):
+            self._check_tape(other)
+            return self._new(self.val - other.val, (self, other), (None, -1.0))
+        return self._new(self.val - _constant(other), (self,), (None,))
+
+    def __rsub__(self, other):
+        """
+        Overwrites the __rsub__ dunder method to apply substraction to a RAD object
+        when the RAD object is on the right side of the substraction sign.
+
+                Parameters:
+                        self (RAD): A RAD object to be applied substraction to
+                        other (valid input for the numpy operation): the object that self is substracted from
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD([1, 2])
+                >>> 1 - x
+                RAD(value: [ 0. -1.])
+        """
+        return self._new(_constant(other) - self.val, (self,), (-1.0,))
+
+    ## Multiplication
+    def __mul__(self, other):
+        """
+        Overwrites the __mul__ dunder method to apply multiplication to a RAD object.
+
+                Parameters:
+                        self (RAD): A RAD object to be applied multiplication to
+                        other (RAD or valid input for the numpy operation): the object to be multiplied to self
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD([1, 2])
+                >>> x * x
+                RAD(value: [1. 4.])
+        """
+        if isinstance(other, RAD):
+            self._check_tape(other)
+            return self._new(self.val * other.val, (self, other), (other.val, self.val), (other.dot, self.dot))
+        const = _constant(other)
+        return self._new(self.val * const, (self,), (const,))
+
+    def __rmul__(self, other):
+        """
+        Overwrites the __rmul__ dunder method to apply multiplication to a RAD object
+        when the RAD object is on the right side of the multiplication sign.
+
+                Parameters:
+                        self (RAD): A RAD object to be applied multiplication to
+                        other (valid input for the numpy operation): the object to be multiplied to self
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD([1, 2])
+                >>> 2 * x
+                RAD(value: [2. 4.])
+        """
+        return self * other
+
+    ## Division
+    def __truediv__(self, other):
+        """
+        Overwrites the __truediv__ dunder method to apply division to a RAD object.
+
+                Parameters:
+                        self (RAD): A RAD object to be applied division to
+                        other (RAD or valid input for the numpy operation): the object that self is divided by
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD([1, 2])
+                >>> x / 2
+                RAD(value: [0.5 1. ])
+        """
+        if isinstance(other, RAD):
+            self._check_tape(other)
+            recip = 1 / other.val
+            new_val = self.val * recip
+            partial_dots = None
+            if self.dot is not None or other.dot is not None:
+                self_dot = 0. if self.dot is None else self.dot
+                other_dot = 0. if other.dot is None else other.dot
+                partial_dots = (-recip * recip * other_dot,
+                                (2 * new_val * other_dot - self_dot) * recip * recip)
+            return self._new(new_val, (self, other), (recip, -new_val * recip), partial_dots)
+        recip = 1 / _constant(other)
+        return self._new(self.val * recip, (self,), (recip,))
+
+    def __rtruediv__(self, other):
+        """
+        Overwrites the __rtruediv__ dunder method to apply division to a RAD object
+        when the RAD object is on the right side of the division sign.
+
+                Parameters:
+                        self (RAD): A RAD object to be applied division to
+                        other (valid input for the numpy operation): the object divided by self
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD([1, 2])
+                >>> 2 / x
+                RAD(value: [2. 1.])
+        """
+        recip = 1 / self.val
+        new_val = _constant(other) * recip
+        partial_dots = None if self.dot is None else (2 * new_val * recip * recip * self.dot,)
+        return self._new(new_val, (self,), (-new_val * recip,), partial_dots)
+
+    ## Power
+    def __pow__(self, other):
+        """
+        Overwrites the __pow__ dunder method to apply power function to a RAD object.
+
+                Parameters:
+                        self (RAD): A RAD object to be applied power function to
+                        other (RAD or valid input for the numpy operation): the object that self's power will be raised to
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD([1, 2])
+                >>> x ** 2
+                RAD(value: [1. 4.])
+        """
+        if isinstance(other, RAD):
+            return admath.exp(admath.log(self) * other)
+        power = _constant(other).astype(float)
+        new_val = np.power(self.val, power)
+        der = (self.val ** (power - 1.)) * power
+        der2 = (self.val ** (power - 2.)) * power * (power - 1.)
+        return self._chain_rule(new_val, der, der2)
+
+    def __rpow__(self, other):
+        """
+        Overwrites the __rpow__ dunder method to apply power function to a RAD object
+        when the RAD object is on the right side of the power sign.
+
+                Parameters:
+                        self (RAD): A RAD object to be applied power function to
+                        other (valid input for the numpy operation): the base that is raised to the power of self
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD([1, 2])
+                >>> 2 ** x
+                RAD(value: [2. 4.])
+        """
+        base = _constant(other).astype(float)
+        new_val = np.power(base, self.val)
+        der = new_val * np.log(base)
+        return self._chain_rule(new_val, der, der * np.log(base))
+
+    def sum(self):
+        """
+        Sum all the values of the RAD object.
+
+                Parameters:
+                        self (RAD): the RAD object to be summed
+
+                Returns:
+                        A new RAD object with a single value, recorded on the same tape
+
+                Example:
+                >>> RAD([1, 2]).sum()
+                RAD(value: 3.0)
+        """
+        return self._new(self.val.sum(), (self,), (np.ones(self.val.shape),))
+
+    def _eigh(self, UPLO="L"):
+        """
+        Eigendecomposition of a symmetric matrix recorded on the tape, used by AD_vec.eigh.
+        The reverse rules reuse the decomposition a = V diag(w) V^T: the adjoint of the eigenvalues
+        gives V diag(w_bar) V^T, and the adjoint of the eigenvectors V (F * (V^T V_bar)) V^T with
+        F_ij = 1 / (w_j - w_i), symmetrized since a is symmetric.
+
+                Parameters:
+                        self (RAD): the symmetric matrix
+                        UPLO (str): the triangle of the matrix that is read, as in np.linalg.eigh
+
+                Returns:
+                        A tuple of RAD objects, the eigenvalues in ascending order and the eigenvectors as columns
+
+                Raise:
+                        Exception if a tangent direction is propagated, as Hessian-vector products are not supported
+
+                Example:
+                >>> a = RAD([[2., 0.], [0., 3.]])
+                >>> w, v = a._eigh()
+                >>> w.sum().backward()
+                >>> a.grad
+                array([[1., 0.],
+                       [0., 1.]])
+        """
+        self._check_no_tangent()
+        w, v = np.linalg.eigh(self.val, UPLO)
+        gaps = _gaps(w)
+
+        def vectors_pullback(g):
+            adjoint = v @ (gaps * (v.T @ g)) @ v.T
+            return 0.5 * (adjoint + adjoint.T)
+
+        values = self._new(w, (self,), (_Pullback(lambda g: (v * g) @ v.T),))
+        vectors = self._new(v, (self,), (_Pullback(vectors_pullback),))
+        return values, vectors
+
+    def _svd(self):
+        """
+        Thin singular value decomposition recorded on the tape, used by AD_vec.svd.
+        The reverse rules reuse the decomposition a = U diag(s) V^T: with F_ij = 1 / (s_j^2 - s_i^2), the adjoints of
+        s, U and V give U diag(s_bar) V^T, U (F * (U^T U_bar - U_bar^T U)) S V^T + (I - U U^T) U_bar S^-1 V^T and
+        U S (F * (V^T V_bar - V_bar^T V)) V^T + U S^-1 V_bar^T (I - V V^T).
+
+                Parameters:
+                        self (RAD): the matrix, of shape (r, c)
+
+                Returns:
+                        A tuple of RAD objects (U, s, Vt), of shapes (r, k), (k,) and (k, c) with k = min(r, c)
+
+                Raise:
+                        Exception if a tangent direction is propagated, as Hessian-vector products are not supported
+
+                Example:
+                >>> a = RAD([[3., 0.], [0., 1.]])
+                >>> u, s, vt = a._svd()
+                >>> s[0].backward()
+                >>> a.grad
+                array([[1., 0.],
+                       [0., 0.]])
+        """
+        self._check_no_tangent()
+        u, s, vt = np.linalg.svd(self.val, full_matrices=False)
+        v = vt.T
+        gaps = _gaps(s ** 2)
+
+        def u_pullback(g):
+            proj = u.T @ g
+            return u @ ((gaps * (proj - proj.T)) * s) @ vt + ((g - u @ proj) / s) @ vt
+
+        def vt_pullback(g):
+            proj = v.T @ g.T
+            return u @ (s[:, None] * (gaps * (proj - proj.T))) @ vt + (u / s) @ (g - (g @ v) @ vt)
+
+        return (self._new(u, (self,), (_Pullback(u_pullback),)),
+                self._new(s, (self,), (_Pullback(lambda g: (u * g) @ vt),)),
+                self._new(vt, (self,), (_Pullback(vt_pullback),)))
+
+    def _check_no_tangent(self):
+        """
+        Make sure no tangent direction is propagated through a decomposition.
+
+                Raise:
+                        Exception if self carries a tangent, i.e. within hvp
+        """
+        if self.dot is not None:
+            raise Exception("Hessian-vector products through eigh and svd are not supported.")
+
+    def _chain_rule(self, new_val, der, der2, higher_der=None):
+        """
+        Applies chain rule by recording the derivative of the outer function as the local derivative.
+        Used by admath.chain_rule, so every admath function can be recorded on the tape.
+
+                Parameters:
+                        self (RAD): the inner RAD object of the composition
+                        new_val (np.array or float): value of the outer function
+                        der (np.array or float): first derivative of the outer function
+                        der2 (np.array or float): second derivative of the outer function
+                        higher_der: ignored, higher order derivatives are only carried by AD objects
+                The second derivative is only used when a tangent direction is propagated (see hvp).
+
+                Returns:
+                        A new RAD object recorded on the same tape
+
+                Example:
+                >>> x = RAD(2)
+                >>> x._chain_rule(np.exp(2), np.exp(2), np.exp(2))
+                RAD(value: 7.38905609893065)
+        """
+        partial_dots = None if self.dot is None else (der2 * self.dot,)
+        return self._new(new_val, (self,), (der,), partial_dots)
+
+    def _new(self, val, parents, partials, partial_dots=None):
+        """
+        Create the RAD object resulting from an operation and record it on the tape of self.
+
+                Parameters:
+                        self (RAD): an operand of the operation
+                        val (np.array or float): value of the result
+                        parents (tuple of RAD): the RAD operands of the operation
+                        partials (tuple): the local derivatives with respect to the parents
+                        partial_dots (tuple): the tangents of the local derivatives, None where they are zero
+
+                Returns:
+                        A new RAD object recorded on the same tape, carrying a tangent if any parent does
+        """
+        node = RAD(val, self.tape, parents, partials)
+        if any(parent.dot is not None for parent in parents):
+            node.dot = _tangent(node.val.shape, parents, partials)
+            node.partial_dots = partial_dots
+        return node
+
+    def _check_tape(self, other):
+        """
+        Make sure two RAD objects can be combined, i.e. they are recorded on the same tape.
+
+                Parameters:
+                        self (RAD): an operand
+                        other (RAD): the other operand
+
+                Returns:
+                        None
+
+                Raise:
+                        Exception if the two RAD objects are recorded on different tapes
+        """
+        if other.tape is not self.tape:
+            raise Exception("RAD objects recorded on different tapes cannot be combined.")
+
+    def backward(self, seed=None):
+        """
+        Back-propagate adjoints from the RAD object to every RAD object it depends on.
+
+                Parameters:
+                        self (RAD): the RAD object to be differentiated
+                        seed (float or np.ndarray): adjoint of self, defaults to ones
+
+                Returns:
+                        None, but the derivatives are available through the grad attribute of the inputs
+
+                Example:
+                >>> x = RAD([1., 2.])
+                >>> y = (x * x).sum()
+                >>> y.backward()
+                >>> x.grad
+                array([2., 4.])
+        """
+        self.tape.backward(self, seed)
+
+    @property
+    def grad(self):
+        """
+        The derivative of the output of the last reverse sweep with respect to the RAD object.
+
+                Parameters:
+                        self (RAD): the RAD object whose derivative is requested
+
+                Returns:
+                        An np.ndarray of the same shape as the value of self
+
+                Example:
+                >>> x = RAD(3.)
+                >>> y = x * x
+                >>> y.backward()
+                >>> x.grad
+                array(6.)
+        """
+        adjoints = self.tape.adjoints
+        if adjoints is None or self.index >= len(adjoints) or adjoints[self.index] is None:
+            return np.zeros(self.val.shape)
+        return np.array(np.broadcast_to(adjoints[self.index], self.val.shape), dtype=float)
+
+    @property
+    def grad_dot(self):
+        """
+        The tangent of grad along the direction carried by the inputs, i.e. the Hessian-vector product
+        of the output of the last reverse sweep (see hvp).
+
+                Parameters:
+                        self (RAD): the RAD object whose derivative is requested
+
+                Returns:
+                        An np.ndarray of the same shape as the value of self
+
+                Example:
+                >>> x = RAD([1., 2.], dot=[1., 0.])
+                >>> y = (x[0] * x[1]).sum()
+                >>> y.backward()
+                >>> x.grad_dot
+                array([0., 1.])
+        """
+        adjoint_dots = self.tape.adjoint_dots
+        if adjoint_dots is None or self.index >= len(adjoint_dots) or adjoint_dots[self.index] is None:
+            return np.zeros(self.val.shape)
+        return np.array(np.broadcast_to(adjoint_dots[self.index], self.val.shape), dtype=float)
+
+
+def _tangent(shape, parents, partials):
+    """
+        Propagate the tangents of the parents of an operation forward to its result.
+
+                Parameters:
+                        shape (tuple): the shape of the result
+                        parents (tuple of RAD): the operands of the operation
+                        partials (tuple): the local derivatives with respect to the parents
+
+                Returns:
+                        The tangent of the result, an np.ndarray of the given shape
+    """
+    dot = np.zeros(shape)
+    for parent, partial in zip(parents, partials):
+        if parent.dot is None:
+            continue
+        if isinstance(partial, _Index):
+            contrib = parent.dot[partial.pos]
+        else:
+            contrib = parent.dot if partial is None else partial * parent.dot
+        dot = dot + _unbroadcast(contrib, shape)
+    return dot
+
+
+def _value(obj):
+    """
+        Get the value of a RAD object, or the object itself if it is a constant.
+
+                Parameters:
+                        obj (RAD or valid input for the numpy operation): the object
+                Returns:
+                        The value of obj
+
+                Example:
+                >>> _value(RAD(2))
+                array(2.)
+    """
+    return obj.val if isinstance(obj, RAD) else obj
+
+
+def gradient(f, x):
+    """
+    Return the gradient of a scalar function with reverse mode. The function is evaluated once on a tape,
+    and a single reverse sweep gives the derivatives with respect to all inputs.
+
+            Parameters:
+                    f (function): a function of one vector, built with operators and admath functions,
+                                  returning a single value
+                    x (int or float or list or np.ndarray): the point at which the gradient is evaluated
+
+            Returns:
+                    The gradient of f at x, an np.ndarray of the same shape as x
+
+            Raise:
+                    TypeError if f has more than one output
+
+            Example:
+            >>> gradient(lambda x: x[0] * x[1] + sin(x[0]), [1., 2.])
+            array([2.54030231, 1.        ])
+    """
+    inp = RAD(x)
+    out = f(inp)
+    if not isinstance(out, RAD):
+        return np.zeros(inp.val.shape)
+    if out.val.size != 1:
+        raise TypeError("Invalid Type. gradient() needs a function with a single output, use vjp() for vector functions.")
+    out.backward()
+    return inp.grad
+
+
+def hvp(f, x, v):
+    """
+    Return the Hessian-vector product H·v of a scalar function, without forming the Hessian.
+    The function is evaluated once on a tape while the direction v is propagated forward,
+    and a single reverse sweep propagates the adjoints together with their tangents (forward-over-reverse).
+    The cost is a small multiple of one function evaluation and the memory is O(n) per recorded operation.
+
+            Parameters:
+                    f (function): a function of one vector, built with operators and admath functions,
+                                  returning a single value
+                    x (int or float or list or np.ndarray): the point at which the Hessian is evaluated
+                    v (int or float or list or np.ndarray): the direction, of the same shape as x
+
+            Returns:
+                    H·v, an np.ndarray of the same shape as x
+
+            Raise:
+                    TypeError if f has more than one output
+
+            Example:
+            >>> hvp(lambda x: x[0] ** 2 * x[1], [1., 2.], [1., 0.])
+            array([4., 2.])
+    """
+    inp = RAD(x, dot=v)
+    out = f(inp)
+    if not isinstance(out, RAD):
+        return np.zeros(inp.val.shape)
+    if out.val.size != 1:
+        raise TypeError("Invalid Type. hvp() needs a function with a single output.")
+    out.backward()
+    return inp.grad_dot
+
+
+def vjp(f, x):
+    """
+    Record a vector function once and return its value together with a function computing
+    vector-Jacobian products u^T J by reverse sweeps, without ever forming the Jacobian.
+    Each product costs a single reverse sweep over the same recording, so for least squares the gradient of
+    1/2 ||r(x)||^2 is pullback(r), obtained with one function evaluation.
+
+            Parameters:
+                    f (function): a function of one vector, built with operators and admath functions,
+                                  returning a RAD object or a list of them (one per output)
+                    x (int or float or list or np.ndarray): the point at which the Jacobian is evaluated
+
+            Returns:
+                    A tuple of the values of the outputs (an np.ndarray of length m) and the pullback function,
+                    which maps u (length m, or k x m for k products at once) to u^T J (length n, or k x n)
+
+            Raise:
+                    TypeError if f does not return RAD objects or constants
+
+            Example:
+            >>> r, pullback = vjp(lambda x: [x[0] * x[1], sin(x[0])], [1., 2.])
+            >>> pullback(r)
+            array([4.29192658, 2.        ])
+    """
+    inp = RAD(x)
+    out = f(inp)
+    funcs = out if isinstance(out, list) or isinstance(out, tuple) else [out]
+    outputs, positions, vals = [], [], []
+    start = 0
+    for func in funcs:
+        if isinstance(func, RAD):
+            if func.tape is not inp.tape:
+                raise Exception("The output is not recorded on the tape of the input.")
+            outputs.append(func)
+            positions.append(start)
+        elif not np.issubdtype(np.asarray(func).dtype, np.number):
+            raise TypeError("Invalid Type. All functions should be RAD objects or constants.")
+        vals.append(np.ravel(_value(func)).astype(float))
+        start += vals[-1].size
+    value = np.concatenate(vals)
+
+    def pullback(u):
+        u = np.asarray(u, dtype=float)
+        if u.shape[-1:] != value.shape:
+            raise ValueError("u must have one entry per output.")
+        if u.ndim > 1:
+            return np.array([pullback(row) for row in u])
+        if not outputs:
+            return np.zeros(inp.val.shape)
+        seeds = [u[pos:pos + out.val.size].reshape(out.val.shape) for out, pos in zip(outputs, positions)]
+        inp.tape.backward(outputs, seeds)
+        return inp.grad
+
+    return value, pullback
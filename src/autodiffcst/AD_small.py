@@ -0,0 +1,314 @@
+import itertools
+import operator
+import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import autodiffcst.admath as admath
+from autodiffcst.AD import AD
+
+# largest number of variables for which VAD hands out SmallAD objects instead of AD objects
+_MAX_SIZE = 4
+
+# the (i, j) position, i <= j, of each stored second derivative, row by row in the upper triangle, for each small n
+_PAIRS = {n: tuple((i, j) for i, j in itertools.product(range(n), range(n)) if i <= j) for n in range(1, _MAX_SIZE + 1)}
+
+
+class SmallAD(AD):
+
+    __slots__ = ("_v", "_d", "_h", "_t")
+
+    def __init__(self, val, tag, size, order=2):
+        """
+        Create an input variable of a function of a few variables, stored with Python floats.
+        For a few variables, the cost of an operation on AD objects is dominated by the creation of tiny numpy arrays,
+        so a SmallAD object keeps its value as a float, its first derivatives as a tuple and the upper triangle
+        of its symmetric second derivatives as a tuple, and its operators are plain Python arithmetic. It is an AD object: val, der, der2
+        and tag are formed as numpy arrays when they are read, and operations with other AD or VAD objects
+        fall back to the AD ones. VAD hands out SmallAD objects for up to 4 variables.
+
+                Parameters:
+                        val (int or float): the value of the variable
+                        tag (int): the index of the variable
+                        size (int): the number of variables, at most 4
+                        order (int): 1 to only compute first derivatives, 2 to also compute second derivatives
+
+                Returns:
+                        None, but initializes a SmallAD object when called
+
+                Raise:
+                        ValueError if size is larger than 4 or order is not 1 or 2
+
+                Example:
+                >>> x = SmallAD(2., 0, 2)
+                >>> y = SmallAD(3., 1, 2)
+                >>> x * y
+                AD(value: [6.], derivatives: [3. 2.])
+        """
+        if size > _MAX_SIZE or size < 1:
+            raise ValueError("SmallAD objects handle 1 to {0} variables.".format(_MAX_SIZE))
+        if order not in (1, 2):
+            raise ValueError("SmallAD objects handle derivatives of order 1 or 2.")
+        der = [0.] * size
+        der[tag] = 1.
+        self._set(float(val), tuple(der), None if order == 1 else (0.,) * len(_PAIRS[size]), frozenset((int(tag),)))
+
+    @classmethod
+    def _new(cls, v, d, h, t):
+        """
+        Private constructor of the operators: v is a float, d a tuple, h a tuple (the upper triangle of der2)
+        or None, and t a frozenset of tags.
+
+                Returns:
+                        A new SmallAD object
+        """
+        new = object.__new__(cls)
+        new._set(v, d, h, t)
+        return new
+
+    def _set(self, v, d, h, t):
+        """Set the float value, the tuples of derivatives and the tags, and the AD attributes that follow from them."""
+        self._v = v
+        self._d = d
+        self._h = h
+        self._t = t
+        self.size = len(d)
+        self.order = 1 if h is None else 2
+        self.higher = None
+
+    @property
+    def val(self):
+        """The value, as an np.array of length 1."""
+        return np.array([self._v])
+
+    @property
+    def der(self):
+        """The first derivatives, as an np.array of length size."""
+        return np.array(self._d)
+
+    @property
+    def der2(self):
+        """The second derivatives, as an np.array of shape (size, size), or None with order 1."""
+        if self._h is None:
+            return None
+        der2 = np.empty((self.size, self.size))
+        rows, cols = np.array(_PAIRS[self.size]).T
+        der2[rows, cols] = self._h
+        der2[cols, rows] = self._h
+        return der2
+
+    @property
+    def tag(self):
+        """The sorted indices of the variables the object depends on, as an np.array."""
+        return np.array(sorted(self._t))
+
+    def _same_kind(self, other):
+        """Whether other is a SmallAD object the fast operators can combine with self."""
+        return type(other) is SmallAD and other.size == self.size
+
+    def __neg__(self):
+        """Negation, in Python arithmetic."""
+        h = None if self._h is None else tuple(-x for x in self._h)
+        return SmallAD._new(-self._v, tuple(-x for x in self._d), h, self._t)
+
+    def __add__(self, other):
+        """
+        Addition of a SmallAD object and a SmallAD object or a number, in Python arithmetic.
+        Other operands are handled by AD.__add__.
+
+                Parameters:
+                        self (SmallAD): the left operand
+                        other (SmallAD or AD or VAD or int or float): the right operand
+
+                Returns:
+                        A new SmallAD object, or the result of AD.__add__
+
+                Example:
+                >>> SmallAD(2., 0, 2) + 1
+                AD(value: [3.], derivatives: [1. 0.])
+        """
+        if self._same_kind(other):
+            d = tuple(map(operator.add, self._d, other._d))
+            h = None if self._h is None or other._h is None else tuple(map(operator.add, self._h, other._h))
+            return SmallAD._new(self._v + other._v, d, h, self._t | other._t)
+        if _is_number(other):
+            return SmallAD._new(self._v + other, self._d, self._h, self._t)
+        return AD.__add__(self, other)
+
+    def __radd__(self, other):
+        """Addition with the SmallAD object on the right."""
+        return self + other
+
+    def __sub__(self, other):
+        """Substraction, as the addition of the negation."""
+        if self._same_kind(other) or _is_number(other):
+            return self + (-other)
+        return AD.__sub__(self, other)
+
+    def __rsub__(self, other):
+        """Substraction with the SmallAD object on the right."""
+        return (-self) + other
+
+    def __mul__(self, other):
+        """
+        Multiplication of a SmallAD object and a SmallAD object or a number, in Python arithmetic.
+        Other operands are handled by AD.__mul__.
+
+                Parameters:
+                        self (SmallAD): the left operand
+                        other (SmallAD or AD or VAD or int or float): the right operand
+
+                Returns:
+                        A new SmallAD object, or the result of AD.__mul__
+
+                Example:
+                >>> SmallAD(2., 0, 2) * SmallAD(3., 1, 2)
+                AD(value: [6.], derivatives: [3. 2.])
+        """
+        if self._same_kind(other):
+            a, b = self._v, other._v
+            da, db = self._d, other._d
+            d = tuple(x * b + a * y for x, y in zip(da, db))
+            h = None
+            if self._h is not None and other._h is not None:
+                h = tuple(x * b + a * y + da[i] * db[j] + db[i] * da[j]
+                          for x, y, (i, j) in zip(self._h, other._h, _PAIRS[self.size]))
+            return SmallAD._new(a * b, d, h, self._t | other._t)
+        if _is_number(other):
+            h = None if self._h is None else tuple(x * other for x in self._h)
+            return SmallAD._new(self._v * other, tuple(x * other for x in self._d), h, self._t)
+        return AD.__mul__(self, other)
+
+    def __rmul__(self, other):
+        """Multiplication with the SmallAD object on the right."""
+        return self * other
+
+    def __truediv__(self, other):
+        """Division, as the multiplication by the reciprocal; division by zero is left to AD.__truediv__."""
+        if self._same_kind(other) and other._v != 0:
+            return self * other._recip()
+        if _is_number(other) and other != 0:
+            return self * (1. / other)
+        return AD.__truediv__(self, other)
+
+    def __rtruediv__(self, other):
+        """Division of a number by a SmallAD object."""
+        if _is_number(other) and self._v != 0:
+            return self._recip() * other
+        if isinstance(other, AD):
+            # reached first for a plain AD numerator, since SmallAD is a subclass of AD
+            return AD.__truediv__(other, self)
+        return AD.__rtruediv__(self, other)
+
+    def __pow__(self, other):
+        """
+        Power of a SmallAD object by a number, in Python arithmetic when the power is defined in real numbers:
+        a positive base, or an integer power of at least 2. Other cases are handled by AD.__pow__.
+
+                Parameters:
+                        self (SmallAD): the base
+                        other (SmallAD or AD or int or float): the power
+
+                Returns:
+                        A new SmallAD object, or the result of AD.__pow__
+
+                Example:
+                >>> SmallAD(2., 0, 1) ** 3
+                AD(value: [8.], derivatives: [12.])
+        """
+        if _is_number(other):
+            p = float(other)
+            a = self._v
+            if a > 0 or (p.is_integer() and p >= 2):
+                return self._chain_rule(a ** p, p * a ** (p - 1.), p * (p - 1.) * a ** (p - 2.))
+        return AD.__pow__(self, other)
+
+    def _recip(self):
+        """The reciprocal of the SmallAD object, whose value is not zero."""
+        a = self._v
+        return self._chain_rule(1. / a, -1. / (a * a), 2. / (a * a * a))
+
+    def _apply_rule(self, name):
+        """
+        Apply an elementwise admath function by its name in the admath._rules table, on the float value.
+
+                Parameters:
+                        self (SmallAD): the operand
+                        name (str): the name of the function
+
+                Returns:
+                        A new SmallAD object
+        """
+        return self._chain_rule(*admath._rules[name](self._v))
+
+    def _chain_rule(self, new_val, der, der2, higher_der=None):
+        """
+        Applies chain rule in Python arithmetic. Used by admath.chain_rule, so every admath function works
+        on SmallAD objects.
+
+                Parameters:
+                        self (SmallAD): the inner SmallAD object of the composition
+                        new_val (float or np.array): value of the outer function
+                        der (float or np.array): first derivative of the outer function
+                        der2 (float or np.array): second derivative of the outer function
+                        higher_der: ignored, SmallAD objects have no higher order derivatives
+
+                Returns:
+                        A new SmallAD object
+
+                Example:
+                >>> SmallAD(0., 0, 1)._chain_rule(1., 1., 1.)
+                AD(value: [1.], derivatives: [1.])
+        """
+        g1 = _float(der)
+        d = self._d
+        h = None
+        if self._h is not None:
+            g2 = _float(der2)
+            h = tuple(g1 * x + g2 * d[i] * d[j] for x, (i, j) in zip(self._h, _PAIRS[self.size]))
+        return SmallAD._new(_float(new_val), tuple(g1 * x for x in d), h, self._t)
+
+
+def _is_number(other):
+    """
+        Whether the other operand of a SmallAD operation is a number handled in Python arithmetic.
+
+                Parameters:
+                        other: the operand
+                Returns:
+                        True for int and float values, including numpy floats
+    """
+    return type(other) is int or isinstance(other, float)
+
+
+def _float(x):
+    """
+        Turn the result of an outer function, a number or an array holding one number, into a Python float.
+
+                Parameters:
+                        x (float or np.array): the number
+                Returns:
+                        A float
+    """
+    return float(x) if isinstance(x, float) else float(np.ravel(x)[0])
+
+
+def small_variables(x, order=2):
+    """
+    Create the SmallAD objects of the variables of a function of a few variables.
+
+            Parameters:
+                    x (list or np.array): the values of the variables, at most 4
+                    order (int): 1 to only compute first derivatives, 2 to also compute second derivatives
+
+            Returns:
+                    A list of SmallAD objects, the i-th one tagged i
+
+            Example:
+            >>> x, y = small_variables([1., 2.])
+            >>> x * y
+            AD(value: [2.], derivatives: [2. 1.])
+    """
+    x = np.atleast_1d(np.array(x, dtype=float))
+    return [SmallAD(val, i, len(x), order) for i, val in enumerate(x.tolist())]
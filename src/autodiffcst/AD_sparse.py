@@ -0,0 +1,743 @@
+import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import autodiffcst.AD as ad
+import autodiffcst.admath as admath
+from autodiffcst.AD_vec import VAD, _constant
+from autodiffcst.AD_rev import hvp
+
+
+class _PatternTracer():
+
+    # let numpy arrays defer to the reflected operators of _PatternTracer
+    __array_ufunc__ = None
+
+    def __init__(self, val, rows, cols, n):
+        """
+        Stand-in for a value while the sparsity pattern of a function is detected.
+        Instead of derivatives, it carries for each of its values the set of inputs that value depends on,
+        as (row, column) pairs sorted by row, so the pattern costs O(nnz) per operation.
+
+                Parameters:
+                        val (np.array): the value, of shape () or (m,)
+                        rows (np.array of int): the position of each pair in the value
+                        cols (np.array of int): the input of each pair
+                        n (int): the number of inputs
+
+                Returns:
+                        None, but initializes a _PatternTracer object when called
+        """
+        self.val = val
+        self.rows = rows
+        self.cols = cols
+        self.n = n
+        self.higher = None
+
+    def __repr__(self):
+        """Print the value of the _PatternTracer object."""
+        return "PatternTracer(value: {0})".format(self.val)
+
+    def __len__(self):
+        """Number of values of the _PatternTracer object."""
+        return len(self.val)
+
+    def __getitem__(self, pos):
+        """Select the dependencies of the indexed values."""
+        idx = np.arange(np.size(self.val)).reshape(np.shape(self.val))[pos]
+        rows, cols = _select(self.rows, self.cols, np.ravel(idx), np.size(self.val))
+        return _PatternTracer(self.val[pos], rows, cols, self.n)
+
+    def __iter__(self):
+        """Iterate over the values."""
+        for i in range(len(self)):
+            yield self[i]
+
+    def __lt__(self, other):
+        """Compare the values."""
+        return self.val < _value(other)
+
+    def __gt__(self, other):
+        """Compare the values."""
+        return self.val > _value(other)
+
+    def __le__(self, other):
+        """Compare the values."""
+        return self.val <= _value(other)
+
+    def __ge__(self, other):
+        """Compare the values."""
+        return self.val >= _value(other)
+
+    def __neg__(self):
+        """Negation keeps the dependencies."""
+        return _PatternTracer(-self.val, self.rows, self.cols, self.n)
+
+    def __add__(self, other):
+        """The result depends on the inputs of both operands."""
+        return self._combine(other, np.add)
+
+    def __radd__(self, other):
+        """The result depends on the inputs of the traced operand."""
+        return self._combine(other, np.add)
+
+    def __sub__(self, other):
+        """The result depends on the inputs of both operands."""
+        return self._combine(other, np.subtract)
+
+    def __rsub__(self, other):
+        """The result depends on the inputs of the traced operand."""
+        return self._combine(other, lambda a, b: np.subtract(b, a))
+
+    def __mul__(self, other):
+        """The result depends on the inputs of both operands."""
+        return self._combine(other, np.multiply)
+
+    def __rmul__(self, other):
+        """The result depends on the inputs of the traced operand."""
+        return self._combine(other, np.multiply)
+
+    def __truediv__(self, other):
+        """The result depends on the inputs of both operands."""
+        return self._combine(other, np.true_divide)
+
+    def __rtruediv__(self, other):
+        """The result depends on the inputs of the traced operand."""
+        return self._combine(other, lambda a, b: np.true_divide(b, a))
+
+    def __pow__(self, other):
+        """The result depends on the inputs of both operands."""
+        return self._combine(other, lambda a, b: np.power(a.astype(float), b))
+
+    def __rpow__(self, other):
+        """The result depends on the inputs of the traced operand."""
+        return self._combine(other, lambda a, b: np.power(np.asarray(b, dtype=float), a))
+
+    def _chain_rule(self, new_val, der, der2, higher_der=None):
+        """An elementwise function keeps the dependencies, whatever its derivatives."""
+        return _PatternTracer(new_val, self.rows, self.cols, self.n)
+
+    def _combine(self, other, op):
+        """
+        Apply an elementwise binary operation: the value is computed with op and the dependencies
+        of each value are the union of those of the operands, after broadcasting.
+
+                Parameters:
+                        self (_PatternTracer): the left operand
+                        other (_PatternTracer or valid input for the numpy operation): the right operand
+                        op (function): the numpy operation on the values
+
+                Returns:
+                        A new _PatternTracer object
+        """
+        if isinstance(other, _PatternTracer):
+            new_val = op(self.val, other.val)
+            size = np.size(new_val)
+            rows = np.concatenate((_broadcast(self.rows, self.val, size), _broadcast(other.rows, other.val, size)))
+            cols = np.concatenate((_broadcast_cols(self.cols, self.val, size), _broadcast_cols(other.cols, other.val, size)))
+            rows, cols = _unique(rows, cols, self.n)
+        else:
+            new_val = op(self.val, _constant(other))
+            size = np.size(new_val)
+            rows, cols = _broadcast(self.rows, self.val, size), _broadcast_cols(self.cols, self.val, size)
+        return _PatternTracer(new_val, rows, cols, self.n)
+
+
+class _HessianTracer():
+
+    # let numpy arrays defer to the reflected operators of _HessianTracer
+    __array_ufunc__ = None
+
+    def __init__(self, val, rows, cols, pairs, n):
+        """
+        Stand-in for a value while the sparsity pattern of a Hessian is detected.
+        Besides the inputs each value depends on, it carries the nonlinear interactions of each value:
+        the pairs of inputs (i, j), i <= j, whose second derivative may be nonzero. Linear operations
+        merge the interactions of their operands, products add the pairs of one dependency set with the other,
+        and nonlinear functions add all the pairs of their dependency set.
+
+                Parameters:
+                        val (np.array): the value, of shape () or (m,)
+                        rows (np.array of int): the position of each dependency in the value, sorted
+                        cols (np.array of int): the input of each dependency
+                        pairs (tuple): the interactions as np.arrays (rows, i, j), sorted by row
+                        n (int): the number of inputs
+
+                Returns:
+                        None, but initializes a _HessianTracer object when called
+        """
+        self.val = val
+        self.rows = rows
+        self.cols = cols
+        self.pairs = pairs
+        self.n = n
+        self.higher = None
+
+    def __repr__(self):
+        """Print the value of the _HessianTracer object."""
+        return "HessianTracer(value: {0})".format(self.val)
+
+    def __len__(self):
+        """Number of values of the _HessianTracer object."""
+        return len(self.val)
+
+    def __getitem__(self, pos):
+        """Select the dependencies and interactions of the indexed values."""
+        m = np.size(self.val)
+        idx = np.ravel(np.arange(m).reshape(np.shape(self.val))[pos])
+        rows, cols = _select(self.rows, self.cols, idx, m)
+        prows, keep = _select(self.pairs[0], np.arange(len(self.pairs[0])), idx, m)
+        pairs = (prows, self.pairs[1][keep], self.pairs[2][keep])
+        return _HessianTracer(self.val[pos], rows, cols, pairs, self.n)
+
+    def __iter__(self):
+        """Iterate over the values."""
+        for i in range(len(self)):
+            yield self[i]
+
+    def __lt__(self, other):
+        """Compare the values."""
+        return self.val < _value(other)
+
+    def __gt__(self, other):
+        """Compare the values."""
+        return self.val > _value(other)
+
+    def __le__(self, other):
+        """Compare the values."""
+        return self.val <= _value(other)
+
+    def __ge__(self, other):
+        """Compare the values."""
+        return self.val >= _value(other)
+
+    def __neg__(self):
+        """Negation keeps the dependencies and the interactions."""
+        return _HessianTracer(-self.val, self.rows, self.cols, self.pairs, self.n)
+
+    def __add__(self, other):
+        """A sum merges the interactions of the operands."""
+        return self._combine(other, np.add, "linear")
+
+    def __radd__(self, other):
+        """A sum merges the interactions of the operands."""
+        return self._combine(other, np.add, "linear")
+
+    def __sub__(self, other):
+        """A difference merges the interactions of the operands."""
+        return self._combine(other, np.subtract, "linear")
+
+    def __rsub__(self, other):
+        """A difference merges the interactions of the operands."""
+        return self._combine(other, lambda a, b: np.subtract(b, a), "linear")
+
+    def __mul__(self, other):
+        """A product makes the inputs of one operand interact with those of the other."""
+        return self._combine(other, np.multiply, "product")
+
+    def __rmul__(self, other):
+        """A product with a constant is linear."""
+        return self._combine(other, np.multiply, "product")
+
+    def __truediv__(self, other):
+        """u / w makes the inputs of u interact with those of w, and those of w with each other."""
+        return self._combine(other, np.true_divide, "quotient")
+
+    def __rtruediv__(self, other):
+        """The division of a constant is a nonlinear function of the traced operand."""
+        return self._combine(other, lambda a, b: np.true_divide(b, a), "nonlinear")
+
+    def __pow__(self, other):
+        """A power is nonlinear, unless the exponent is the constant 0 or 1."""
+        kind = "nonlinear"
+        if not isinstance(other, _HessianTracer) and np.all(np.isin(_constant(other), (0, 1))):
+            kind = "linear"
+        return self._combine(other, lambda a, b: np.power(a.astype(float), b), kind)
+
+    def __rpow__(self, other):
+        """A constant raised to a traced power is a nonlinear function of the power."""
+        return self._combine(other, lambda a, b: np.power(np.asarray(b, dtype=float), a), "nonlinear")
+
+    def sum(self):
+        """A sum over the values merges all their dependencies and interactions."""
+        zeros = np.zeros(len(self.cols), dtype=int)
+        rows, cols = _unique(zeros, self.cols, self.n)
+        pairs = _unique_pairs(np.zeros(len(self.pairs[0]), dtype=int), self.pairs[1], self.pairs[2], self.n)
+        return _HessianTracer(np.sum(self.val), rows, cols, pairs, self.n)
+
+    def _apply_rule(self, name):
+        """
+        Apply an elementwise admath function by its name in the admath._rules table.
+        The absolute value has a zero second derivative almost everywhere, the others are nonlinear.
+
+                Parameters:
+                        self (_HessianTracer): the operand
+                        name (str): the name of the function
+
+                Returns:
+                        A new _HessianTracer object
+        """
+        new_val = admath._rules[name](self.val)[0]
+        return self._unary(new_val, name != "abs")
+
+    def _chain_rule(self, new_val, der, der2, higher_der=None):
+        """Any other elementwise function is taken as nonlinear, whatever its derivatives at x."""
+        return self._unary(new_val, True)
+
+    def _unary(self, new_val, nonlinear):
+        """
+        Result of an elementwise function of self: same dependencies, and all their pairs if nonlinear.
+
+                Parameters:
+                        self (_HessianTracer): the operand
+                        new_val (np.array): the value of the function
+                        nonlinear (bool): whether the function has a nonzero second derivative
+
+                Returns:
+                        A new _HessianTracer object
+        """
+        pairs = self.pairs
+        if nonlinear:
+            pairs = _unique_pairs(*_concat_pairs([pairs, _cross(self.rows, self.cols, self.rows, self.cols, np.size(self.val))]), self.n)
+        return _HessianTracer(new_val, self.rows, self.cols, pairs, self.n)
+
+    def _combine(self, other, op, kind):
+        """
+        Apply an elementwise binary operation, after broadcasting: the value is computed with op, the dependencies
+        are the union of those of the operands, and the interactions are those of the operands plus the new ones.
+
+                Parameters:
+                        self (_HessianTracer): the left operand
+                        other (_HessianTracer or valid input for the numpy operation): the right operand
+                        op (function): the numpy operation on the values
+                        kind (str): "linear", "product", "quotient" (self / other) or "nonlinear"
+
+                Returns:
+                        A new _HessianTracer object
+        """
+        traced = isinstance(other, _HessianTracer)
+        new_val = op(self.val, other.val if traced else _constant(other))
+        size = np.size(new_val)
+        a = _broadcast(self.rows, self.val, size), _broadcast_cols(self.cols, self.val, size)
+        pairs = [_broadcast_pairs(self.pairs, self.val, size)]
+        if traced:
+            b = _broadcast(other.rows, other.val, size), _broadcast_cols(other.cols, other.val, size)
+            pairs.append(_broadcast_pairs(other.pairs, other.val, size))
+            rows, cols = _unique(np.concatenate((a[0], b[0])), np.concatenate((a[1], b[1])), self.n)
+            if kind == "product" or kind == "quotient":
+                pairs.append(_cross(*a, *b, size))
+            if kind == "quotient":
+                pairs.append(_cross(*b, *b, size))
+            if kind == "nonlinear":
+                pairs.append(_cross(rows, cols, rows, cols, size))
+        else:
+            rows, cols = a
+            if kind == "nonlinear":
+                pairs.append(_cross(rows, cols, rows, cols, size))
+        return _HessianTracer(new_val, rows, cols, _unique_pairs(*_concat_pairs(pairs), self.n), self.n)
+
+
+def _value(obj):
+    """
+        Get the value of a tracer object, or the object itself if it is a constant.
+
+                Parameters:
+                        obj (_PatternTracer, _HessianTracer or valid input for the numpy operation): the object
+                Returns:
+                        The value of obj
+    """
+    return obj.val if isinstance(obj, _PatternTracer) or isinstance(obj, _HessianTracer) else obj
+
+
+def _broadcast(rows, val, size):
+    """
+        Rows of the dependencies of a single value broadcast against size values.
+
+                Parameters:
+                        rows (np.array of int): the rows of the pairs
+                        val (np.array): the value the pairs belong to
+                        size (int): the number of values after broadcasting
+                Returns:
+                        The rows of the pairs after broadcasting
+    """
+    if np.size(val) == size:
+        return rows
+    return np.repeat(np.arange(size), len(rows))
+
+
+def _broadcast_cols(cols, val, size):
+    """
+        Columns of the dependencies of a single value broadcast against size values.
+
+                Parameters:
+                        cols (np.array of int): the columns of the pairs
+                        val (np.array): the value the pairs belong to
+                        size (int): the number of values after broadcasting
+                Returns:
+                        The columns of the pairs after broadcasting
+    """
+    if np.size(val) == size:
+        return cols
+    return np.tile(cols, size)
+
+
+def _unique(rows, cols, n):
+    """
+        Remove duplicated (row, column) pairs and sort them by row, then column.
+
+                Parameters:
+                        rows (np.array of int): the rows of the pairs
+                        cols (np.array of int): the columns of the pairs
+                        n (int): the number of columns
+                Returns:
+                        A tuple (rows, cols) of np.arrays
+
+                Example:
+                >>> _unique(np.array([1, 0, 1]), np.array([2, 1, 2]), 3)
+                (array([0, 1]), array([1, 2]))
+    """
+    keys = np.unique(rows.astype(np.int64) * n + cols)
+    return keys // n, keys % n
+
+
+def _select(rows, cols, idx, m):
+    """
+        Dependencies of the values at positions idx, given the (row, column) pairs sorted by row.
+
+                Parameters:
+                        rows (np.array of int): the rows of the pairs, sorted
+                        cols (np.array of int): the columns of the pairs
+                        idx (np.array of int): the selected rows, in the order of the new value
+                        m (int): the number of rows
+                Returns:
+                        A tuple (rows, cols) of np.arrays, the rows being positions in idx
+    """
+    indptr = np.searchsorted(rows, np.arange(m + 1))
+    counts = indptr[idx + 1] - indptr[idx]
+    new_rows = np.repeat(np.arange(len(idx)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return new_rows, cols[np.repeat(indptr[idx], counts) + offsets]
+
+
+def _broadcast_pairs(pairs, val, size):
+    """
+        Interactions of a single value broadcast against size values.
+
+                Parameters:
+                        pairs (tuple): the interactions (rows, i, j) of the value
+                        val (np.array): the value the interactions belong to
+                        size (int): the number of values after broadcasting
+                Returns:
+                        The interactions after broadcasting
+    """
+    rows, i, j = pairs
+    if np.size(val) == size:
+        return pairs
+    return np.repeat(np.arange(size), len(rows)), np.tile(i, size), np.tile(j, size)
+
+
+def _cross(rows_a, cols_a, rows_b, cols_b, m):
+    """
+        Interactions between the dependencies of two operands: every input of a value of the first operand
+        paired with every input of the same value of the second operand.
+
+                Parameters:
+                        rows_a, cols_a (np.array of int): the dependencies of the first operand, sorted by row
+                        rows_b, cols_b (np.array of int): the dependencies of the second operand, sorted by row
+                        m (int): the number of values
+                Returns:
+                        The interactions as a tuple (rows, i, j) of np.arrays
+    """
+    pos, j = _select(rows_b, cols_b, rows_a, m)
+    return rows_a[pos], cols_a[pos], j
+
+
+def _concat_pairs(pairs):
+    """
+        Concatenate a list of interactions.
+
+                Parameters:
+                        pairs (list): interactions (rows, i, j)
+                Returns:
+                        A tuple (rows, i, j) of np.arrays
+    """
+    return tuple(np.concatenate([p[k] for p in pairs]) for k in range(3))
+
+
+def _unique_pairs(rows, i, j, n):
+    """
+        Order each pair of inputs as i <= j, remove duplicated interactions and sort them by row.
+
+                Parameters:
+                        rows (np.array of int): the values the interactions belong to
+                        i, j (np.array of int): the pairs of inputs
+                        n (int): the number of inputs
+                Returns:
+                        A tuple (rows, i, j) of np.arrays
+
+                Example:
+                >>> _unique_pairs(np.array([0, 0]), np.array([2, 1]), np.array([1, 2]), 3)
+                (array([0]), array([1]), array([2]))
+    """
+    low, high = np.minimum(i, j).astype(np.int64), np.maximum(i, j).astype(np.int64)
+    keys = np.unique((rows.astype(np.int64) * n + low) * n + high)
+    return keys // (n * n), keys // n % n, keys % n
+
+
+def _outputs(out):
+    """
+        Split the result of a function into a list of outputs.
+
+                Parameters:
+                        out: a single output or a list or tuple of outputs
+                Returns:
+                        A list of outputs
+    """
+    return list(out) if isinstance(out, list) or isinstance(out, tuple) else [out]
+
+
+def jacobian_sparsity(f, x):
+    """
+    Detect the sparsity pattern of the Jacobian of a function, by propagating for every intermediate value
+    the set of inputs it depends on. The pattern is structural: an entry that is zero only at x is kept.
+
+            Parameters:
+                    f (function): a function of one vector, built with operators and admath functions,
+                                  returning a VAD-like vector, a single value or a list of them
+                    x (list or np.array): a point at which f can be evaluated
+
+            Returns:
+                    A tuple (rows, cols, shape): the positions of the nonzeros sorted by row, and the shape (m, n)
+                    of the Jacobian
+
+            Example:
+            >>> jacobian_sparsity(lambda x: x[1:] * x[:-1], [1., 2., 3.])
+            (array([0, 0, 1, 1]), array([0, 1, 1, 2]), (2, 3))
+    """
+    x = np.atleast_1d(np.array(x, dtype=float))
+    n = len(x)
+    out = f(_PatternTracer(x, np.arange(n), np.arange(n), n))
+    all_rows, all_cols = [], []
+    m = 0
+    for func in _outputs(out):
+        if isinstance(func, _PatternTracer):
+            all_rows.append(func.rows + m)
+            all_cols.append(func.cols)
+        m += np.size(_value(func))
+    if not all_rows:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), (m, n)
+    return np.concatenate(all_rows), np.concatenate(all_cols), (m, n)
+
+
+def color_columns(rows, cols, shape):
+    """
+    Greedy Curtis-Powell-Reid coloring of the columns of a sparse matrix: columns that share no row
+    get the same color, so one compressed direction per color recovers all of them.
+
+            Parameters:
+                    rows (np.array of int): the rows of the nonzeros, sorted
+                    cols (np.array of int): the columns of the nonzeros
+                    shape (tuple): the shape (m, n) of the matrix
+
+            Returns:
+                    An np.array of length n with the color of each column, colors being 0, 1, 2, ...
+
+            Example:
+            >>> color_columns(np.array([0, 0, 1, 1]), np.array([0, 1, 1, 2]), (2, 3))
+            array([0, 1, 0])
+    """
+    m, n = shape
+    row_cols = np.split(cols, np.searchsorted(rows, np.arange(1, m))) if m > 0 else []
+    order = np.argsort(cols, kind="stable")
+    col_rows = np.split(rows[order], np.searchsorted(cols[order], np.arange(1, n)))
+    row_cols = [r.tolist() for r in row_cols]
+    colors = [-1] * n
+    for j in range(n):
+        forbidden = set()
+        for i in col_rows[j].tolist():
+            forbidden.update(colors[k] for k in row_cols[i])
+        color = 0
+        while color in forbidden:
+            color += 1
+        colors[j] = color
+    return np.array(colors, dtype=int)
+
+
+def sparse_jacobian(f, x, pattern=None, colors=None):
+    """
+    Return the nonzero entries of a sparse Jacobian, computed from one compressed forward pass:
+    the inputs are seeded with one direction per color instead of the identity, so every operation
+    carries as many derivatives as there are colors (about the number of nonzeros per row) instead of n.
+    The pattern and the coloring only depend on the structure of f, so they can be computed once and reused.
+
+            Parameters:
+                    f (function): a function of one vector, built with operators and admath functions,
+                                  returning a VAD object, an AD object or a list of them
+                    x (list or np.array): the point at which the Jacobian is evaluated
+                    pattern (tuple): the result of jacobian_sparsity(f, x), detected if not specified
+                    colors (np.array): the result of color_columns(*pattern), computed if not specified
+
+            Returns:
+                    A tuple (data, rows, cols) of np.arrays, the nonzero entries of the Jacobian in coordinate format
+
+            Example:
+            >>> sparse_jacobian(lambda x: x[1:] * x[:-1], [1., 2., 3.])
+            (array([2., 1., 3., 2.]), array([0, 0, 1, 1]), array([0, 1, 1, 2]))
+    """
+    x = np.atleast_1d(np.array(x, dtype=float))
+    if pattern is None:
+        pattern = jacobian_sparsity(f, x)
+    rows, cols, shape = pattern
+    if colors is None:
+        colors = color_columns(rows, cols, shape)
+    n_colors = colors.max() + 1 if len(colors) else 0
+    seed = np.zeros((len(x), n_colors))
+    seed[np.arange(len(x)), colors] = 1.
+    compressed = _compressed(f(VAD(x, seed, order=1)), n_colors)
+    return compressed[rows, colors[cols]], rows, cols
+
+
+def _compressed(out, p):
+    """
+        Stack the derivatives of the outputs of a function evaluated on seeded VAD objects.
+
+                Parameters:
+                        out: the outputs, a VAD or AD object or a list of them (constants are allowed)
+                        p (int): the number of seed directions
+                Returns:
+                        An np.array of shape (m, p), one row per output value
+    """
+    ders = []
+    for func in _outputs(out):
+        if isinstance(func, VAD) or isinstance(func, ad.AD):
+            ders.append(np.reshape(func.der, (-1, p)))
+        else:
+            ders.append(np.zeros((np.size(func), p)))
+    return np.concatenate(ders)
+
+
+def hessian_sparsity(f, x):
+    """
+    Detect the sparsity pattern of the Hessian of a scalar function, by propagating for every intermediate value
+    the inputs it depends on and the pairs of inputs that interact nonlinearly in it.
+    The pattern is structural: an entry that is zero only at x is kept.
+
+            Parameters:
+                    f (function): a function of one vector, built with operators and admath functions,
+                                  returning a single value
+                    x (list or np.array): a point at which f can be evaluated
+
+            Returns:
+                    A tuple (rows, cols, shape): the positions of the nonzeros, symmetric and sorted by row,
+                    and the shape (n, n) of the Hessian
+
+            Raise:
+                    TypeError if f has more than one output
+
+            Example:
+            >>> hessian_sparsity(lambda x: x[0] * x[1] + x[2] ** 2, [1., 2., 3.])
+            (array([0, 1, 2]), array([1, 0, 2]), (3, 3))
+    """
+    x = np.atleast_1d(np.array(x, dtype=float))
+    n = len(x)
+    empty = np.zeros(0, dtype=int)
+    out = f(_HessianTracer(x, np.arange(n), np.arange(n), (empty, empty, empty), n))
+    if np.size(_value(out)) != 1:
+        raise TypeError("Invalid Type. hessian_sparsity() needs a function with a single output.")
+    if not isinstance(out, _HessianTracer):
+        return empty, empty, (n, n)
+    i, j = out.pairs[1], out.pairs[2]
+    off = i != j
+    rows, cols = _unique(np.concatenate((i, j[off])), np.concatenate((j, i[off])), n)
+    return rows, cols, (n, n)
+
+
+def color_star(rows, cols, shape):
+    """
+    Greedy star coloring of a symmetric sparsity pattern: adjacent columns get different colors and
+    every path on four columns uses at least three colors. Then each nonzero H[i, j] is the only one
+    of its color in row i or in row j, so the Hessian is recovered directly from one Hessian-vector
+    product per color, with fewer colors than a coloring that ignores the symmetry.
+
+            Parameters:
+                    rows (np.array of int): the rows of the nonzeros, sorted
+                    cols (np.array of int): the columns of the nonzeros
+                    shape (tuple): the shape (n, n) of the matrix
+
+            Returns:
+                    An np.array of length n with the color of each column, colors being 0, 1, 2, ...
+
+            Example:
+            >>> color_star(np.array([0, 1, 1, 2, 2, 3]), np.array([1, 0, 2, 1, 3, 2]), (4, 4))
+            array([0, 1, 0, 2])
+    """
+    n = shape[0]
+    off = rows != cols
+    adjacent = [r.tolist() for r in np.split(cols[off], np.searchsorted(rows[off], np.arange(1, n)))]
+    colors = [-1] * n
+    for v in range(n):
+        forbidden = set()
+        for w in adjacent[v]:
+            if colors[w] != -1:
+                forbidden.add(colors[w])
+            for x in adjacent[w]:
+                if x == v or colors[x] == -1:
+                    continue
+                if colors[w] == -1:
+                    # v and x would be joined through w: they must differ
+                    forbidden.add(colors[x])
+                elif any(colors[y] == colors[w] for y in adjacent[x] if y != w):
+                    # the path v - w - x - y would be two-colored
+                    forbidden.add(colors[x])
+        color = 0
+        while color in forbidden:
+            color += 1
+        colors[v] = color
+    return np.array(colors, dtype=int)
+
+
+def sparse_hessian(f, x, pattern=None, colors=None):
+    """
+    Return the nonzero entries of a sparse Hessian, computed from one Hessian-vector product per color:
+    the products with the sum of the unit vectors of each color form a compressed n x p matrix, from which
+    every nonzero is read directly thanks to the star coloring. No n x n array is ever formed.
+    The pattern and the coloring only depend on the structure of f, so they can be computed once and reused.
+
+            Parameters:
+                    f (function): a function of one vector, built with operators and admath functions,
+                                  returning a single value
+                    x (list or np.array): the point at which the Hessian is evaluated
+                    pattern (tuple): the result of hessian_sparsity(f, x), detected if not specified
+                    colors (np.array): the result of color_star(*pattern), computed if not specified
+
+            Returns:
+                    A tuple (data, rows, cols) of np.arrays, the nonzero entries of the Hessian in coordinate format
+
+            Raise:
+                    ValueError if the coloring cannot recover the pattern
+
+            Example:
+            >>> sparse_hessian(lambda x: x[0] * x[1] + x[2] ** 2, [1., 2., 3.])
+            (array([1., 1., 2.]), array([0, 1, 2]), array([1, 0, 2]))
+    """
+    x = np.atleast_1d(np.array(x, dtype=float))
+    n = len(x)
+    if pattern is None:
+        pattern = hessian_sparsity(f, x)
+    rows, cols, shape = pattern
+    if colors is None:
+        colors = color_star(rows, cols, shape)
+    n_colors = colors.max() + 1 if len(colors) else 0
+    compressed = np.zeros((n, n_colors))
+    for c in range(n_colors):
+        compressed[:, c] = np.ravel(hvp(f, x, (colors == c).astype(float)))
+
+    # H[i, j] is compressed[i, colors[j]] if j is the only nonzero of its color in row i, else use the symmetry
+    counts = np.zeros((n, n_colors), dtype=int)
+    np.add.at(counts, (rows, colors[cols]), 1)
+    direct = counts[rows, colors[cols]] == 1
+    if not np.all(direct | (counts[cols, colors[rows]] == 1)):
+        raise ValueError("The coloring cannot recover the Hessian.")
+    data = np.where(direct, compressed[rows, colors[cols]], compressed[cols, colors[rows]])
+    return data, rows, cols
@@ -0,0 +1,397 @@
+import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import autodiffcst.AD as ad
+import autodiffcst.admath as admath
+from autodiffcst.AD_vec import _constant
+
+
+class SAD():
+
+    # let numpy arrays defer to the reflected operators of SAD
+    __array_ufunc__ = None
+
+    def __init__(self, val, tag, size, der=None, der2=None, order=2):
+        """
+        Create a scalar AD object whose derivatives are stored only for its tags, the sorted inputs it depends on.
+        der[k] is the derivative with respect to input tag[k] and der2[k, l] the one with respect to tag[k] and tag[l],
+        so an intermediate depending on a handful of the n inputs costs a handful of numbers instead of n and n^2.
+
+                Parameters:
+                        val (int or float): the value of the new SAD object
+                        tag (int or list of int or np.ndarray of int): the inputs the object depends on, sorted
+                        size (int): the number of inputs n
+                        der (list of float or np.ndarray of float): the first derivatives for the tags,
+                                                                    the new object is input tag if not specified
+                        der2 (list of float or np.ndarray of float): the second derivatives for the tags,
+                                                                     zero if not specified
+                        order (int): 1 to store first derivatives only, 2 to also store second derivatives
+
+                Returns:
+                        None, but initializes a SAD object when called
+
+                Raise:
+                        ValueError if order is not 1 or 2
+
+                Example:
+                >>> SAD(2., 3, 100000)
+                SAD(value: [2.], tags: [3], derivatives: [1.])
+        """
+        if order not in (1, 2):
+            raise ValueError("Order of derivative must be 1 or 2.")
+        self.val = np.atleast_1d(np.array(val, dtype=float))
+        self.tag = np.atleast_1d(np.array(tag, dtype=np.int64))
+        self.size = size
+        self.der = np.ones(len(self.tag)) if der is None else np.asarray(der, dtype=float)
+        if order == 1:
+            # first-order mode: der2 is never allocated
+            self.der2 = None
+        else:
+            self.der2 = np.zeros((len(self.tag), len(self.tag))) if der2 is None else np.asarray(der2, dtype=float)
+        self.higher = None
+
+    def __repr__(self):
+        """
+        Overwrites the __repr__ dunder method to nicely print a SAD object.
+
+                Parameters:
+                        self (SAD): the SAD object that __repr__ is called upon.
+
+                Returns:
+                        A string containing the value, the tags and the first derivatives of the SAD object.
+
+                Example:
+                >>> SAD(2., [0, 5], 10, der=[1., 3.])
+                SAD(value: [2.], tags: [0 5], derivatives: [1. 3.])
+        """
+        return "SAD(value: {0}, tags: {1}, derivatives: {2})".format(self.val, self.tag, self.der)
+
+    def __str__(self):
+        """Print the value, the tags and the first derivatives of the SAD object."""
+        return self.__repr__()
+
+    def __lt__(self, other):
+        """Compare the values."""
+        return self.val < _value(other)
+
+    def __gt__(self, other):
+        """Compare the values."""
+        return self.val > _value(other)
+
+    def __le__(self, other):
+        """Compare the values."""
+        return self.val <= _value(other)
+
+    def __ge__(self, other):
+        """Compare the values."""
+        return self.val >= _value(other)
+
+    def __neg__(self):
+        """
+        Overwrites the __neg__ dunder method to negate a SAD object.
+
+                Parameters:
+                        self (SAD): the SAD object to be negated
+
+                Returns:
+                        A new SAD object with the same tags
+
+                Example:
+                >>> -SAD(2., 3, 10)
+                SAD(value: [-2.], tags: [3], derivatives: [-1.])
+        """
+        return SAD(-self.val, self.tag, self.size, -self.der, None if self.der2 is None else -self.der2, self._order())
+
+    def __add__(self, other):
+        """
+        Overwrites the __add__ dunder method to add a SAD object and a SAD object or a number.
+        The tags of the result are the sorted union of the tags of the operands, and the derivatives of each
+        operand are scattered into it; operands with the same tags are added directly.
+
+                Parameters:
+                        self (SAD): the left operand
+                        other (SAD or int or float): the right operand
+
+                Returns:
+                        A new SAD object
+
+                Raise:
+                        TypeError if other is neither a SAD object nor a number
+
+                Example:
+                >>> SAD(2., 3, 10) + SAD(1., 5, 10)
+                SAD(value: [3.], tags: [3 5], derivatives: [1. 1.])
+        """
+        if isinstance(other, SAD):
+            tag, (da, da2), (db, db2) = _merge(self, other)
+            der2 = None if da2 is None or db2 is None else da2 + db2
+            return SAD(self.val + other.val, tag, self.size, da + db, der2, _order_of(der2))
+        return SAD(self.val + _number(other), self.tag, self.size, self.der, self.der2, self._order())
+
+    def __radd__(self, other):
+        """Add a SAD object to a number."""
+        return self + other
+
+    def __sub__(self, other):
+        """
+        Overwrites the __sub__ dunder method to substract a SAD object or a number from a SAD object.
+
+                Parameters:
+                        self (SAD): the left operand
+                        other (SAD or int or float): the right operand
+
+                Returns:
+                        A new SAD object
+
+                Example:
+                >>> SAD(2., 3, 10) - SAD(1., 3, 10)
+                SAD(value: [1.], tags: [3], derivatives: [0.])
+        """
+        if isinstance(other, SAD):
+            return self + (-other)
+        return self + (-_number(other))
+
+    def __rsub__(self, other):
+        """Substract a SAD object from a number."""
+        return (-self) + other
+
+    def __mul__(self, other):
+        """
+        Overwrites the __mul__ dunder method to multiply a SAD object by a SAD object or a number.
+
+                Parameters:
+                        self (SAD): the left operand
+                        other (SAD or int or float): the right operand
+
+                Returns:
+                        A new SAD object
+
+                Example:
+                >>> SAD(2., 3, 10) * SAD(5., 1, 10)
+                SAD(value: [10.], tags: [1 3], derivatives: [2. 5.])
+        """
+        if isinstance(other, SAD):
+            tag, (da, da2), (db, db2) = _merge(self, other)
+            a, b = self.val[0], other.val[0]
+            der = da * b + a * db
+            der2 = None
+            if da2 is not None and db2 is not None:
+                cross = np.outer(da, db)
+                der2 = da2 * b + a * db2 + cross + cross.T
+            return SAD(self.val * other.val, tag, self.size, der, der2, _order_of(der2))
+        c = _number(other)
+        return SAD(self.val * c, self.tag, self.size, self.der * c, None if self.der2 is None else self.der2 * c, self._order())
+
+    def __rmul__(self, other):
+        """Multiply a number by a SAD object."""
+        return self * other
+
+    def __truediv__(self, other):
+        """
+        Overwrites the __truediv__ dunder method to divide a SAD object by a SAD object or a number.
+
+                Parameters:
+                        self (SAD): the numerator
+                        other (SAD or int or float): the denominator
+
+                Returns:
+                        A new SAD object
+
+                Example:
+                >>> SAD(2., 3, 10) / 4
+                SAD(value: [0.5], tags: [3], derivatives: [0.25])
+        """
+        if isinstance(other, SAD):
+            return self * other ** (-1.0)
+        return self * (1. / _number(other))
+
+    def __rtruediv__(self, other):
+        """Divide a number by a SAD object."""
+        return self ** (-1.0) * _number(other)
+
+    def __pow__(self, other):
+        """
+        Overwrites the __pow__ dunder method to raise a SAD object to a SAD object or a number.
+
+                Parameters:
+                        self (SAD): the base
+                        other (SAD or int or float): the power
+
+                Returns:
+                        A new SAD object
+
+                Example:
+                >>> SAD(2., 3, 10) ** 3
+                SAD(value: [8.], tags: [3], derivatives: [12.])
+        """
+        if isinstance(other, SAD):
+            return admath.exp(admath.log(self) * other)
+        p = float(_number(other))
+        a = self.val
+        return self._chain_rule(a ** p, p * a ** (p - 1.), p * (p - 1.) * a ** (p - 2.))
+
+    def __rpow__(self, other):
+        """Raise a positive number to a SAD object."""
+        base = float(_number(other))
+        new_val = base ** self.val
+        der = new_val * np.log(base)
+        return self._chain_rule(new_val, der, der * np.log(base))
+
+    def _chain_rule(self, new_val, der, der2, higher_der=None):
+        """
+        Applies chain rule on the tags of the SAD object only. Used by admath.chain_rule,
+        so every admath function works on SAD objects.
+
+                Parameters:
+                        self (SAD): the inner SAD object of the composition
+                        new_val (np.array): value of the new SAD object
+                        der (np.array or float): first derivative of the outer function
+                        der2 (np.array or float): second derivative of the outer function
+                        higher_der: ignored, higher order derivatives are only carried by AD objects
+
+                Returns:
+                        A new SAD object with the same tags
+
+                Example:
+                >>> SAD(0., 3, 10)._chain_rule(np.exp(0.), 1., 1.)
+                SAD(value: [1.], tags: [3], derivatives: [1.])
+        """
+        d = np.ravel(der)[0]
+        if self.der2 is None:
+            return SAD(new_val, self.tag, self.size, d * self.der, order=1)
+        new_der2 = d * self.der2 + np.ravel(der2)[0] * np.outer(self.der, self.der)
+        return SAD(new_val, self.tag, self.size, d * self.der, new_der2)
+
+    def _order(self):
+        """The order of the derivatives stored by the SAD object."""
+        return _order_of(self.der2)
+
+    def todense(self):
+        """
+        Convert the SAD object into an AD object with dense derivatives of length size.
+
+                Parameters:
+                        self (SAD): the SAD object to be converted
+
+                Returns:
+                        An AD object with the same value and derivatives
+
+                Example:
+                >>> SAD(2., 1, 3).todense()
+                AD(value: [2.], derivatives: [0. 1. 0.])
+        """
+        der = np.zeros(self.size)
+        der[self.tag] = self.der
+        if self.der2 is None:
+            return ad.AD(self.val, tag=self.tag, der=der, order=1)
+        der2 = np.zeros((self.size, self.size))
+        der2[np.ix_(self.tag, self.tag)] = self.der2
+        return ad.AD(self.val, tag=self.tag, der=der, der2=der2)
+
+
+def _order_of(der2):
+    """
+        The order of a new SAD object from its second derivatives.
+
+                Parameters:
+                        der2 (np.ndarray or None): the second derivatives, None in first-order mode
+                Returns:
+                        1 if der2 is None, 2 otherwise
+    """
+    return 1 if der2 is None else 2
+
+
+def _value(obj):
+    """
+        Get the value of a SAD object, or the object itself if it is a constant.
+
+                Parameters:
+                        obj (SAD or int or float): the object
+                Returns:
+                        The value of obj
+    """
+    return obj.val if isinstance(obj, SAD) else obj
+
+
+def _number(other):
+    """
+        Check that the other operand of a SAD operation is a number.
+
+                Parameters:
+                        other: the operand
+                Returns:
+                        The operand
+
+                Raise:
+                        TypeError if the operand is not a single number
+    """
+    if np.size(_constant(other)) != 1:
+        raise TypeError("Invalid type.")
+    return other
+
+
+def _merge(a, b):
+    """
+        Sorted merge of the tags of two SAD objects, with the derivatives of each one scattered on the merged tags.
+        When the tags are the same, the derivatives are returned unchanged.
+
+                Parameters:
+                        a, b (SAD): the operands, depending on the same number of inputs
+                Returns:
+                        A tuple (tag, (der, der2), (der, der2)): the merged tags and the derivatives of a and b on them
+
+                Raise:
+                        Exception if a and b do not have the same number of inputs
+
+                Example:
+                >>> _merge(SAD(1., [0, 4], 9), SAD(1., 2, 9))[0]
+                array([0, 2, 4])
+    """
+    if a.size != b.size:
+        raise Exception("The two objects do not have the same number of inputs.")
+    if len(a.tag) == len(b.tag) and np.array_equal(a.tag, b.tag):
+        return a.tag, (a.der, a.der2), (b.der, b.der2)
+    tag = np.union1d(a.tag, b.tag)
+    return tag, _scatter(a, np.searchsorted(tag, a.tag), len(tag)), _scatter(b, np.searchsorted(tag, b.tag), len(tag))
+
+
+def _scatter(obj, pos, k):
+    """
+        Derivatives of a SAD object on merged tags.
+
+                Parameters:
+                        obj (SAD): the object
+                        pos (np.ndarray of int): the position of each tag of obj in the merged tags
+                        k (int): the number of merged tags
+                Returns:
+                        A tuple (der, der2) of np.arrays of length k and shape (k, k), der2 being None in first-order mode
+    """
+    der = np.zeros(k)
+    der[pos] = obj.der
+    if obj.der2 is None:
+        return der, None
+    der2 = np.zeros((k, k))
+    der2[np.ix_(pos, pos)] = obj.der2
+    return der, der2
+
+
+def sparse_variables(x, order=2):
+    """
+    Create one SAD object for each input value, the i-th one tagged i.
+
+            Parameters:
+                    x (list or np.array): the values of the n inputs
+                    order (int): 1 to store first derivatives only, 2 to also store second derivatives
+
+            Returns:
+                    A list of n SAD objects
+
+            Example:
+            >>> a, b = sparse_variables([1., 2.])
+            >>> a * b
+            SAD(value: [2.], tags: [0 1], derivatives: [2. 1.])
+    """
+    x = np.atleast_1d(np.array(x, dtype=float))
+    return [SAD(val, i, len(x), order=order) for i, val in enumerate(x)]
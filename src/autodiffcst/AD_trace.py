@@ -0,0 +1,441 @@
+import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import autodiffcst.admath as admath
+from autodiffcst.AD_vec import VAD, _ZERO, _constant, _outer
+
+
+class Trace():
+
+    def __init__(self, n, order=2):
+        """
+        Create an empty trace, the compiled form of a function of n variables.
+        A trace is a list of instructions, each one an array kernel with the slots of its operands,
+        and is built by trace() rather than directly.
+
+                Parameters:
+                        n (int): the number of input variables
+                        order (int): 1 to replay first derivatives only, 2 to also replay second derivatives
+
+                Returns:
+                        None, but initializes an empty Trace object when called
+        """
+        self.n = n
+        self.order = order
+        self.program = []
+        # the slots read for the last time by each instruction, released once it has run
+        self.dead = []
+        self.outputs = []
+        self.n_slots = 1
+        self._values = None
+
+    def __len__(self):
+        """
+        Overwrites the __len__ dunder method to get the number of recorded instructions.
+
+                Parameters:
+                        self (Trace): the Trace object that __len__ is called upon.
+
+                Returns:
+                        An integer, the number of instructions replayed on each call.
+
+                Example:
+                >>> len(trace(lambda x: x[0] * x[1], [1., 2.]))
+                3
+        """
+        return len(self.program)
+
+    def __call__(self, x):
+        """
+        Replay the trace on new input values, with array arithmetic only.
+
+                Parameters:
+                        self (Trace): the Trace object that is replayed.
+                        x (list or np.array): the new values of the n input variables
+
+                Returns:
+                        A VAD object holding the values and derivatives of all the outputs
+
+                Raise:
+                        ValueError if x does not have n values
+
+                Example:
+                >>> f = trace(lambda x: x[0] * x[1], [1., 2.])
+                >>> jacobian(f([3., 4.]))
+                array([[4., 3.]])
+        """
+        x = np.atleast_1d(np.array(x, dtype=float))
+        if x.shape != (self.n,):
+            raise ValueError("The trace was recorded for {0} input values.".format(self.n))
+        slots = [None] * self.n_slots
+        slots[0] = self._seed(x)
+        for (kernel, out, ins, const), dead in zip(self.program, self.dead):
+            slots[out] = kernel([slots[i] for i in ins], const)
+            for i in dead:
+                slots[i] = None
+
+        outputs = [slots[output] if isinstance(output, int) else (output, None, _ZERO) for output in self.outputs]
+        sizes = [np.size(val) for val, der, der2 in outputs]
+        m = sum(sizes)
+        # the outputs are written into the arrays of the VAD object, zero where their derivatives are
+        new_val, new_der = np.empty(m), np.empty((m, self.n))
+        new_der2 = np.empty((m, self.n, self.n)) if self.order == 2 else None
+        start = 0
+        for (val, der, der2), size in zip(outputs, sizes):
+            rows = slice(start, start + size)
+            new_val[rows] = np.ravel(val)
+            new_der[rows] = 0. if der is None else np.reshape(der, (-1, self.n))
+            if self.order == 2:
+                new_der2[rows] = 0. if der2 is _ZERO else np.reshape(der2, (-1, self.n, self.n))
+            start += size
+        return VAD(new_val, new_der, new_der2, order=self.order)
+
+    def _seed(self, x):
+        """
+        The value and derivatives of the input variables.
+
+                Parameters:
+                        self (Trace): the Trace object
+                        x (np.array): the values of the input variables
+
+                Returns:
+                        A tuple (val, der, der2) for the input slot; der2 is _ZERO, since the second derivatives
+                        of the variables are zero, and the kernels only form them when a nonlinear operation does
+        """
+        return x, np.eye(self.n), _ZERO if self.order == 2 else None
+
+    def _emit(self, kernel, ins, const=None):
+        """
+        Record an instruction during tracing, and evaluate it on the example values.
+
+                Parameters:
+                        self (Trace): the Trace object being recorded
+                        kernel (function): the array kernel of the operation
+                        ins (tuple of int): the slots of the operands
+                        const: the constant operand of the operation, if any
+
+                Returns:
+                        A _Tracer object standing for the result
+        """
+        slot = self.n_slots
+        self.n_slots += 1
+        result = kernel([self._values[i] for i in ins], const)
+        self._values.append(result)
+        self.program.append((kernel, slot, ins, const))
+        return _Tracer(result[0], slot, self)
+
+
+class _Tracer():
+
+    def __init__(self, val, slot, recording):
+        """
+        Stand-in for a value while a function is traced: every operation applied to it is recorded.
+        Its value is the example value, so the function can still branch on it, but the branch taken
+        while tracing is the one replayed.
+
+                Parameters:
+                        val (np.array): the example value
+                        slot (int): the slot holding the value when the trace is replayed
+                        recording (Trace): the trace being recorded
+
+                Returns:
+                        None, but initializes a _Tracer object when called
+        """
+        self.val = val
+        self.slot = slot
+        self.recording = recording
+        self.higher = None
+
+    def __repr__(self):
+        """Print the example value of the _Tracer object."""
+        return "Tracer(value: {0})".format(self.val)
+
+    def __len__(self):
+        """Number of values of the _Tracer object."""
+        return len(self.val)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """
+        Record a NumPy ufunc, such as np.sin(x) or np.square(x), as the admath function or operator applying it,
+        through admath._array_ufunc like for AD and VAD objects. A NumPy array operand defers to the reflected operators.
+        Other ufuncs and keyword arguments raise a TypeError.
+        """
+        return admath._array_ufunc(ufunc, method, *inputs, **kwargs)
+
+    def __getitem__(self, pos):
+        """Record indexing."""
+        return self.recording._emit(_index, (self.slot,), pos)
+
+    def __iter__(self):
+        """Iterate over the values, recording one indexing each."""
+        for i in range(len(self)):
+            yield self[i]
+
+    def __lt__(self, other):
+        """Compare the example values; the result is frozen into the trace."""
+        return self.val < _value(other)
+
+    def __gt__(self, other):
+        """Compare the example values; the result is frozen into the trace."""
+        return self.val > _value(other)
+
+    def __le__(self, other):
+        """Compare the example values; the result is frozen into the trace."""
+        return self.val <= _value(other)
+
+    def __ge__(self, other):
+        """Compare the example values; the result is frozen into the trace."""
+        return self.val >= _value(other)
+
+    def __neg__(self):
+        """Record a negation."""
+        return self.recording._emit(_mul_const, (self.slot,), _constant(-1.))
+
+    def __add__(self, other):
+        """Record an addition."""
+        if isinstance(other, _Tracer):
+            return self.recording._emit(_add, (self.slot, self._check(other).slot))
+        return self.recording._emit(_add_const, (self.slot,), _constant(other))
+
+    def __radd__(self, other):
+        """Record an addition with a constant on the left."""
+        return self + other
+
+    def __sub__(self, other):
+        """Record a substraction."""
+        if isinstance(other, _Tracer):
+            return self.recording._emit(_sub, (self.slot, self._check(other).slot))
+        return self.recording._emit(_add_const, (self.slot,), -_constant(other))
+
+    def __rsub__(self, other):
+        """Record a substraction from a constant."""
+        return self.recording._emit(_rsub_const, (self.slot,), _constant(other))
+
+    def __mul__(self, other):
+        """Record a multiplication."""
+        if isinstance(other, _Tracer):
+            return self.recording._emit(_mul, (self.slot, self._check(other).slot))
+        return self.recording._emit(_mul_const, (self.slot,), _constant(other))
+
+    def __rmul__(self, other):
+        """Record a multiplication with a constant on the left."""
+        return self * other
+
+    def __truediv__(self, other):
+        """Record a division, as a multiplication by the reciprocal."""
+        if isinstance(other, _Tracer):
+            return self * other ** (-1.0)
+        return self * (1 / _constant(other).astype(float))
+
+    def __rtruediv__(self, other):
+        """Record the division of a constant."""
+        return self ** (-1.0) * other
+
+    def __pow__(self, other):
+        """Record a power, through exp and log if the exponent is traced as well."""
+        if isinstance(other, _Tracer):
+            return admath.exp(admath.log(self) * other)
+        return self.recording._emit(_pow_const, (self.slot,), _constant(other).astype(float))
+
+    def __rpow__(self, other):
+        """Record a constant raised to a traced power."""
+        return self.recording._emit(_rpow_const, (self.slot,), _constant(other).astype(float))
+
+    def _apply_rule(self, name):
+        """
+        Record an elementwise admath function by its name in the admath._rules table.
+
+                Parameters:
+                        self (_Tracer): the operand
+                        name (str): the name of the function
+
+                Returns:
+                        A _Tracer object standing for the result
+        """
+        return self.recording._emit(_rule, (self.slot,), name)
+
+    def _chain_rule(self, new_val, der, der2, higher_der=None):
+        """
+        Only the functions of the admath._rules table can be replayed, since a traced function must not
+        depend on derivative values computed from the example.
+
+                Raise:
+                        TypeError always
+        """
+        raise TypeError("This function cannot be traced, only operators and admath functions can.")
+
+    def _check(self, other):
+        """
+        Make sure two _Tracer objects belong to the same trace.
+
+                Raise:
+                        Exception if they do not
+        """
+        if other.recording is not self.recording:
+            raise Exception("Values from different traces cannot be combined.")
+        return other
+
+
+def _value(obj):
+    """
+        Get the value of a _Tracer object, or the object itself if it is a constant.
+
+                Parameters:
+                        obj (_Tracer or valid input for the numpy operation): the object
+                Returns:
+                        The value of obj
+    """
+    return obj.val if isinstance(obj, _Tracer) else obj
+
+
+# Array kernels. Each one takes the (val, der, der2) tuples of its operands and a constant,
+# and returns the (val, der, der2) tuple of the result; der2 is None when only first derivatives are replayed,
+# and _ZERO while it is known to be zero, so linear operations of the variables never form it.
+
+def _add(args, const):
+    (a, da, da2), (b, db, db2) = args
+    val = a + b
+    if da2 is None or db2 is _ZERO:
+        return val, da + db, _broadcast(da2, val)
+    return val, da + db, _broadcast(db2, val) if da2 is _ZERO else da2 + db2
+
+
+def _sub(args, const):
+    (a, da, da2), (b, db, db2) = args
+    val = a - b
+    if da2 is None or db2 is _ZERO:
+        return val, da - db, _broadcast(da2, val)
+    return val, da - db, _broadcast(-db2, val) if da2 is _ZERO else da2 - db2
+
+
+def _broadcast(der2, val):
+    # the second derivatives of one operand, as those of the result of an elementwise operation
+    if der2 is None or der2 is _ZERO or np.shape(der2)[:-2] == np.shape(val):
+        return der2
+    return np.broadcast_to(der2, np.shape(val) + np.shape(der2)[-2:])
+
+
+def _mul(args, const):
+    (a, da, da2), (b, db, db2) = args
+    der = da * b[..., None] + a[..., None] * db
+    if da2 is None:
+        return a * b, der, None
+    # der2 is a new array, updated in place
+    der2 = _outer(da, db)
+    if da is db:
+        der2 *= 2.
+    else:
+        der2 += _outer(db, da)
+    if da2 is not _ZERO:
+        der2 += da2 * b[..., None, None]
+    if db2 is not _ZERO:
+        der2 += a[..., None, None] * db2
+    return a * b, der, der2
+
+
+def _add_const(args, const):
+    a, da, da2 = args[0]
+    return a + const, da, da2
+
+
+def _rsub_const(args, const):
+    a, da, da2 = args[0]
+    return const - a, -da, da2 if da2 is None or da2 is _ZERO else -da2
+
+
+def _mul_const(args, const):
+    a, da, da2 = args[0]
+    return a * const, da * const[..., None], da2 if da2 is None or da2 is _ZERO else da2 * const[..., None, None]
+
+
+def _index(args, pos):
+    a, da, da2 = args[0]
+    return a[pos], da[pos], da2 if da2 is None or da2 is _ZERO else da2[pos]
+
+
+def _chain(arg, new_val, der, der2):
+    a, da, da2 = arg
+    new_der = der[..., None] * da
+    if da2 is None:
+        return new_val, new_der, None
+    new_der2 = der2[..., None, None] * _outer(da, da)
+    if da2 is not _ZERO:
+        new_der2 += der[..., None, None] * da2
+    return new_val, new_der, new_der2
+
+
+def _rule(args, name):
+    arg = args[0]
+    return _chain(arg, *admath._rules[name](arg[0]))
+
+
+def _pow_const(args, power):
+    arg = args[0]
+    a = arg[0]
+    return _chain(arg, np.power(a, power), power * a ** (power - 1.), power * (power - 1.) * a ** (power - 2.))
+
+
+def _rpow_const(args, base):
+    arg = args[0]
+    new_val = np.power(base, arg[0])
+    der = new_val * np.log(base)
+    return _chain(arg, new_val, der, der * np.log(base))
+
+
+def trace(f, x, order=2):
+    """
+    Record a function once and compile it into a Trace, which replays the recorded operations on new input values
+    with array arithmetic only: no AD/VAD objects are created and no type dispatch happens on replay.
+    Branches taken on the values of the example are frozen into the trace.
+
+            Parameters:
+                    f (function): a function of one vector, built with operators, admath functions and the NumPy
+                                  ufuncs they implement (np.sin, np.exp, np.square, ...), returning one value,
+                                  a vector or a list of them
+                    x (list or np.array): example values of the input variables
+                    order (int): 1 to replay first derivatives only, 2 to also replay second derivatives
+
+            Returns:
+                    A Trace object; calling it on new values returns a VAD object with the values and
+                    derivatives of the outputs
+
+            Raise:
+                    ValueError if order is not 1 or 2
+                    TypeError if f uses operations that cannot be traced
+
+            Example:
+            >>> residual = trace(lambda x: [x[0] ** 2 - x[1], sin(x[1])], [1., 2.])
+            >>> jacobian(residual([3., 0.]))
+            array([[ 6., -1.],
+                   [ 0.,  1.]])
+    """
+    if order not in (1, 2):
+        raise ValueError("Traces replay derivatives of order 1 or 2.")
+    x = np.atleast_1d(np.array(x, dtype=float))
+    recording = Trace(len(x), order)
+    recording._values = [recording._seed(x)]
+    out = f(_Tracer(x, 0, recording))
+
+    funcs = out if isinstance(out, list) or isinstance(out, tuple) else [out]
+    for func in funcs:
+        if isinstance(func, _Tracer):
+            if func.recording is not recording:
+                raise Exception("The output is not recorded on this trace.")
+            recording.outputs.append(func.slot)
+        else:
+            recording.outputs.append(_constant(func).astype(float))
+    recording._values = None
+
+    # release every intermediate result after its last use, so a replay only holds the live derivatives
+    last = {}
+    for step, (kernel, out, ins, const) in enumerate(recording.program):
+        for i in ins:
+            last[i] = step
+    kept = set(output for output in recording.outputs if isinstance(output, int))
+    recording.dead = [[] for _ in recording.program]
+    for slot, step in last.items():
+        if slot not in kept:
+            recording.dead[step].append(slot)
+    return recording
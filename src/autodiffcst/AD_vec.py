@@ -1,3 +1,4 @@
+import functools
 import numpy as np
 import numbers
 import os
@@ -6,18 +7,28 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 import autodiffcst.AD as ad
 import autodiffcst.admath as admath
+from autodiffcst.AD import _order_of
+from autodiffcst.AD_small import SmallAD, _MAX_SIZE
+
+# marks second derivatives known to be zero, such as those of the seeds: the array is only formed when read
+_ZERO = object()
 
 
 class VAD():
 
-    def __init__(self, val, der=None, der2=None, order=2, higher=None):
+    def __init__(self, val, der=None, der2=None, order=2, higher=None, packed=False):
         """
         Overwrites the __init__ dunder method to create a new VAD object with initial value and derivatives.
     
                 Parameters:
-                        val (int or float or list or np.array): the initial value of the new VAD object.
+                        val (int or float or list or np.array): the initial value of the new VAD object. Without der,
+                                       each value is a variable: a matrix or an N-dimensional array of values
+                                       gives one variable per entry, numbered in C order.
                         der (int or float or list or np.array): first-order derivatives of the new AD object. 
                         der2 (int or float or list or np.array): second-order derivatives of the new AD object. 
+                        order (int): the highest order of derivatives. With order 1, der2 is never allocated or propagated.
+                        packed (bool): store der2 as the packed upper triangles of the symmetric second derivatives,
+                                       of shape (m, n(n+1)/2) instead of (m, n, n); see pack() for the layout
 
                 Returns:
                         None, but initializes AD object(s) when called
@@ -31,15 +42,32 @@ class VAD():
                 >>> fs
                 VAD(value: [1 2], derivatives: [[1. 0.]
                                                 [0. 1.]])
+
+                >>> X = VAD(np.ones((2, 3)))
+                >>> X.der.shape
+                (2, 3, 6)
         """
         self.val = np.array(val)
+        # the shape of the variables, for the Jacobians of jacobian(f, wrt=...); None for computed VAD objects
+        self._input = None
         if der is None:
-            self.der = np.eye(len(self))
-            self.der2 = np.zeros((len(self),len(self),len(self)))
+            # the variables are seeded with unit vectors and zero curvature, kept as a diagonal Jacobian
+            # that is only formed when an operation reads it: see _diagonal()
+            if self.val.ndim > 1:
+                self._unit = np.arange(self.val.size).reshape(self.val.shape)
+            else:
+                self._unit = np.arange(len(self))
+            self._n = self._unit.size
+            self._diag = np.ones(self._unit.shape)
+            self._input = (0, self.val.shape)
+            self._diag2 = None if order == 1 else _ZERO
+            self._der = None
+            self._der2 = None if order == 1 else _ZERO
         else:
-            self.der = der
-            self.der2 = der2
-        self.tag = np.array([i for i in range(len(self))])
+            self._unit = None
+            self._der = der
+            self._der2 = None if order == 1 else der2
+        self.tag = np.arange(len(self))
         self.size = len(self)
 
         if not isinstance(order, numbers.Integral):
@@ -51,19 +79,113 @@ class VAD():
 
         self.order = order
         self.higher = higher
+        self.packed = packed and self._der2 is not None
 
-        if self.size > 1:
-            arr_ad = np.array([None]*len(self))
-            for i in range(len(self)):
-                arr_ad[i] = ad.AD(val=self.val[i], tag=self.tag[i], size = self.size,
-                                der=self.der[i], der2=self.der2[i])
-            self.variables = arr_ad
-        else:
-            arr_ad = np.array([None]*len(self))
-            arr_ad[0] = ad.AD(val=self.val[0], tag=self.tag[0], size = 1,
-                                der=self.der[0], der2=self.der2[0], 
-                                order=self.order, higher = self.higher)
-            self.variables = arr_ad
+    @property
+    def der(self):
+        """
+        First derivatives of the VAD object, of shape (m, n), or shape + (n,) for an array of values.
+        Diagonal derivatives are formed on first access.
+
+                Parameters:
+                        self (VAD): the VAD object
+
+                Returns:
+                        An np.array of first derivatives
+
+                Example:
+                >>> VAD([1,2]).der
+                array([[1., 0.],
+                       [0., 1.]])
+        """
+        if self._unit is not None:
+            self._densify()
+        return self._der
+
+    @der.setter
+    def der(self, der):
+        if self._unit is not None:
+            self._densify()
+        self._der = der
+
+    @property
+    def der2(self):
+        """
+        Second derivatives of the VAD object, of shape (m, n, n), or (m, n(n+1)/2) if packed, and None with order 1.
+        Diagonal second derivatives, and those known to be zero, are formed on first access.
+
+                Parameters:
+                        self (VAD): the VAD object
+
+                Returns:
+                        An np.array of second derivatives, or None
+
+                Example:
+                >>> VAD([1,2]).der2.shape
+                (2, 2, 2)
+        """
+        if self._unit is not None:
+            self._densify()
+        if self._der2 is _ZERO:
+            m, n = self.der.shape[:-1], self.der.shape[-1]
+            self._der2 = np.zeros(m + ((n * (n + 1) // 2,) if self.packed else (n, n)))
+        return self._der2
+
+    @der2.setter
+    def der2(self, der2):
+        if self._unit is not None:
+            self._densify()
+        self._der2 = der2
+
+    def _densify(self):
+        """
+        Form the dense derivatives of a diagonal VAD object, when an operation mixes its variables.
+        Second derivatives known to be zero stay unformed.
+
+                Parameters:
+                        self (VAD): a diagonal VAD object
+
+                Returns:
+                        None, but der and der2 are stored densely and the VAD object is no longer diagonal
+        """
+        shape = self._unit.shape
+        unit = self._unit.ravel()
+        rows = np.arange(len(unit))
+        n = self._n
+        self._der = np.zeros(shape + (n,))
+        self._der.reshape(len(rows), n)[rows, unit] = self._diag.ravel()
+        self._der2 = self._diag2
+        if self._diag2 is not None and self._diag2 is not _ZERO:
+            if self.packed:
+                self._der2 = np.zeros(shape + (n * (n + 1) // 2,))
+                # the entry (u, u) starts row u of the packed upper triangle
+                self._der2.reshape(len(rows), -1)[rows, np.array(_packed_rows(n))[unit]] = np.ravel(self._diag2)
+            else:
+                self._der2 = np.zeros(shape + (n, n))
+                self._der2.reshape(len(rows), n, n)[rows, unit, unit] = np.ravel(self._diag2)
+        self._unit = None
+
+    @property
+    def variables(self):
+        """
+        Build the AD objects of all the variables of the VAD object.
+        The VAD object itself only stores contiguous arrays, so the AD objects are created on demand.
+    
+                Parameters:
+                        self (VAD): the VAD object whose variables are requested.
+    
+                Returns:
+                        An np.array of AD objects, one for each variable
+                
+                Example:
+                >>> VAD([1,2]).variables
+                array([AD(value: [1], derivatives: [1. 0.]),
+                       AD(value: [2], derivatives: [0. 1.])], dtype=object)
+        """
+        arr_ad = np.array([None]*len(self))
+        for i in range(len(self)):
+            arr_ad[i] = self[i]
+        return arr_ad
 
     def __str__(self):
         """
@@ -128,36 +250,202 @@ class VAD():
     
                 Parameters:
                         self (VAD): the VAD object that __getitem__ is called upon.
-                        pos (int): a valid position of a variable.
+                        pos (int or slice): a valid position of a variable, or a slice of positions.
     
                 Returns:
-                        AD object at the position
+                        AD object at the position, or a VAD object holding the sliced variables
 
                 Example:
                 >>> VAD([1,2])[0]
                 AD(value: [1], derivatives: [1. 0.])
+
+                >>> X = VAD(np.ones((2, 3)))
+                >>> X[1].der.shape
+                (3, 6)
         """  
-        return self.variables[pos]
+        if np.ndim(self.val) > 1:
+            return self._subarray(pos)
+        if self._unit is not None and self.order <= 2:
+            # diagonal derivatives are selected without forming them
+            if not isinstance(pos, numbers.Integral):
+                diag2 = self._diag2 if self._diag2 is None or self._diag2 is _ZERO else self._diag2[pos]
+                return _diagonal(self.val[pos], self._unit[pos], self._n, self._diag[pos], diag2, self.packed)
+            unit = self._unit[pos]
+            if self._diag[pos] == 1 and (self._diag2 is None or self._diag2 is _ZERO):
+                if self._n <= _MAX_SIZE:
+                    return SmallAD(self.val[pos], unit, self._n, self.order)
+                return ad.AD(val=self.val[pos], tag=unit, size=self._n, order=self.order)
+            if self.size > 1:
+                diag2 = self._diag2 if self._diag2 is None or self._diag2 is _ZERO else self._diag2[pos]
+                return _single(self.val[pos], unit, self._n, self._diag[pos], diag2)
+        der2 = None if self.der2 is None else self.der2[pos]
+        if not isinstance(pos, numbers.Integral):
+            return VAD(self.val[pos], self.der[pos], der2, order=_order_of(der2), packed=self.packed)
+        if self.packed:
+            # AD objects hold full second derivatives
+            der2 = unpack(der2, self.der.shape[-1])
+        if self.size > 1:
+            return ad.AD._new(np.array([self.val[pos]]), np.array([self.tag[pos]]), self.der[pos], der2)
+        return ad.AD(val=self.val[pos], tag=self.tag[pos], size=1,
+                     der=self.der[pos], der2=der2,
+                     order=self.order, higher=self.higher)
+
+    def _subarray(self, pos):
+        """
+        Index a VAD object holding an array of values, such as a matrix. The values and derivatives of the result
+        are NumPy views of those of self whenever NumPy indexing gives a view, as for integers and slices.
+
+                Parameters:
+                        self (VAD): a VAD object of at least two dimensions
+                        pos (int or slice or tuple): a NumPy index of the values
+
+                Returns:
+                        An AD object for a single value, a VAD object otherwise
+        """
+        val = self.val[pos]
+        if self._unit is not None:
+            diag2 = self._diag2 if self._diag2 is None or self._diag2 is _ZERO else self._diag2[pos]
+            if np.ndim(val) > 0:
+                return _diagonal(val, self._unit[pos], self._n, self._diag[pos], diag2, self.packed)
+            return _single(val, self._unit[pos], self._n, self._diag[pos], diag2)
+        der2 = self._der2
+        if der2 is not None and der2 is not _ZERO:
+            der2 = der2[_index(pos, 1 if self.packed else 2)]
+        der = self._der[_index(pos, 1)]
+        if np.ndim(val) > 0:
+            return _view(val, der, der2, self.order, self.packed)
+        der2 = self.der2
+        der2 = None if der2 is None else der2[_index(pos, 1 if self.packed else 2)]
+        if self.packed:
+            der2 = unpack(der2, len(der))
+        return ad.AD._new(np.array([val]), np.arange(len(der)), der, der2)
+
+    @property
+    def shape(self):
+        """
+        The shape of the values of the VAD object; its first derivatives have the shape shape + (n,).
+
+                Example:
+                >>> VAD(np.ones((2, 3))).shape
+                (2, 3)
+        """
+        return np.shape(self.val)
+
+    @property
+    def ndim(self):
+        """The number of dimensions of the values of the VAD object."""
+        return np.ndim(self.val)
+
+    def reshape(self, *shape):
+        """
+        Give the values of a VAD object a new shape, as np.reshape. The values and derivatives of the result are
+        views of those of self, so no derivative is copied when they are contiguous.
 
+                Parameters:
+                        self (VAD): the VAD object
+                        shape (int or tuple of int): the new shape, which may contain one -1
+
+                Returns:
+                        A VAD object
+
+                Example:
+                >>> X = VAD(np.arange(6.).reshape(2, 3))
+                >>> X.reshape(-1).der.shape
+                (6, 6)
+        """
+        if len(shape) == 1 and not isinstance(shape[0], numbers.Integral):
+            shape = tuple(shape[0])
+        val = np.reshape(self.val, shape)
+        shape = val.shape
+        if self._unit is not None:
+            diag2 = self._diag2 if self._diag2 is None or self._diag2 is _ZERO else np.reshape(self._diag2, shape)
+            return _diagonal(val, self._unit.reshape(shape), self._n, self._diag.reshape(shape), diag2, self.packed)
+        der2 = self._der2
+        if der2 is not None and der2 is not _ZERO:
+            der2 = der2.reshape(shape + der2.shape[self.ndim:])
+        return _view(val, self.der.reshape(shape + self.der.shape[-1:]), der2, self.order, self.packed)
+
+    def transpose(self, *axes):
+        """
+        Permute the axes of the values of a VAD object, as np.transpose; the axes of the derivatives stay last.
+        The values and derivatives of the result are views of those of self.
+
+                Parameters:
+                        self (VAD): the VAD object
+                        axes (int or tuple of int): the permutation of the axes, reversed by default
+
+                Returns:
+                        A VAD object
+
+                Example:
+                >>> X = VAD(np.ones((2, 3)))
+                >>> X.transpose().der.shape
+                (3, 2, 6)
+        """
+        if len(axes) == 1 and (axes[0] is None or not isinstance(axes[0], numbers.Integral)):
+            axes = axes[0]
+        if axes is None or len(axes) == 0:
+            axes = tuple(range(self.ndim))[::-1]
+        val = np.transpose(self.val, axes)
+        axes = tuple(int(k) % self.ndim for k in axes)
+        if self._unit is not None:
+            diag2 = self._diag2 if self._diag2 is None or self._diag2 is _ZERO else np.transpose(self._diag2, axes)
+            return _diagonal(val, np.transpose(self._unit, axes), self._n, np.transpose(self._diag, axes), diag2,
+                             self.packed)
+        der2 = self._der2
+        if der2 is not None and der2 is not _ZERO:
+            der2 = np.transpose(der2, axes + tuple(range(self.ndim, der2.ndim)))
+        der = np.transpose(self.der, axes + (self.ndim,))
+        return _view(val, der, der2, self.order, self.packed)
+
+    @property
+    def T(self):
+        """The VAD object with the axes of its values reversed, as ndarray.T."""
+        return self.transpose()
+
+    def __iter__(self):
+        """
+        Overwrites the __iter__ dunder method to iterate over the variables of the VAD object.
+    
+                Parameters:
+                        self (VAD): the VAD object that __iter__ is called upon.
+    
+                Returns:
+                        A generator of the AD objects of the VAD object
+
+                Example:
+                >>> x, y = VAD([1,2])
+                >>> y
+                AD(value: [2], derivatives: [0. 1.])
+        """
+        for i in range(len(self)):
+            yield self[i]
 
     ## setter, Do we want this?
     def __setitem__(self, pos, newAD):
         """
-        Overwrites the __eq__ dunder method to check if two VAD objects are equal in value.
+        Overwrites the __setitem__ dunder method to replace the variable at certain position of the VAD object.
     
                 Parameters:
-                        self (VAD): the VAD object that __eq__ is called upon.
-                        other (VAD): the VAD object to be compared with.
+                        self (VAD): the VAD object that __setitem__ is called upon.
+                        pos (int): a valid position of a variable.
+                        newAD (AD): the AD object to be stored at the position.
     
                 Returns:
-                        True if all the values of two VAD objects are equal.
-                        False if otherwise.
+                        None, but the value and derivatives at the position are overwritten.
 
                 Example:
-                >>> VAD([1,2]) == VAD([1,3])
-                False
+                >>> x = VAD([1,2])
+                >>> x[0] = x[0] * 3
+                >>> x
+                VAD(value: [3 2], derivatives: [[3. 0.]
+                                                [0. 1.]])
         """
-        self.variables[pos] = newAD
+        self.val = self.val.astype(np.result_type(self.val, newAD.val))
+        self.val[pos] = newAD.val[0]
+        self.der[pos] = newAD.der
+        if self.der2 is not None:
+            self.der2[pos] = pack(newAD.der2) if self.packed else newAD.der2
         
     # Comparison Equal
     def __eq__(self, other):
@@ -244,6 +532,8 @@ class VAD():
                 True
         """
         if isinstance(other, VAD):
+            if self.der2 is None or other.der2 is None:
+                return np.allclose(self.val, other.val) and np.allclose(self.der,other.der) and self.der2 is other.der2
             return np.allclose(self.val, other.val) and np.allclose(self.der,other.der) and np.allclose(self.der2, other.der2)
         else:
             raise TypeError("Invalid Comparison. VAD object can only be compared with VAD.")
@@ -407,8 +697,7 @@ class VAD():
                 VAD(value: [-1,-2], derivatives: [[-1. -0.]
                                                   [-0. -1.]])
         """
-        AD_result = self.variables * -1
-        return set_VAD(AD_result) 
+        return self * (-1)
 
     ## Addition
     def __add__(self, other):
@@ -428,8 +717,26 @@ class VAD():
                 VAD(value: [4., 5.], derivatives: [[1., 0.],
                                                    [0., 1.]])
         """
-        AD_result = self.variables + other
-        return set_VAD(AD_result)  
+        if _same_diagonal(self, other):
+            return self._with_diagonal(self.val + other.val, self._diag + other._diag,
+                                       _add_der2(self._diag2, other._diag2), self.packed or other.packed)
+        if isinstance(other, VAD) or isinstance(other, ad.AD):
+            packed = _is_packed(self) or _is_packed(other)
+            new_val = self.val + other.val
+            new_der = self.der + other.der
+            new_der2 = _add_der2(_der2_as(self, packed), _der2_as(other, packed))
+            if new_der2 is not None and new_der2 is not _ZERO and np.ndim(new_der2) < np.ndim(new_der) + (0 if packed else 1):
+                # the second derivatives of an AD operand, added to zero second derivatives of all the values
+                new_der2 = np.broadcast_to(new_der2, np.shape(new_der)[:-1] + np.shape(new_der2)).copy()
+        else:
+            packed = self.packed
+            const = _constant(other)
+            if _keeps_diagonal(self, const):
+                return self._with_diagonal(self.val + const, self._diag, self._diag2, packed)
+            new_val = self.val + const
+            new_der = self.der
+            new_der2 = self._der2
+        return VAD(new_val, new_der, new_der2, order=_order_of(new_der2), packed=packed)
         
     def __radd__(self, other):
         """
@@ -594,8 +901,34 @@ class VAD():
                 VAD(value: [2., 4.], derivatives: [[2., 0.],
                                                    [0., 2.]])
         """     
-        AD_result = self.variables * other
-        return set_VAD(AD_result)    
+        if _same_diagonal(self, other):
+            return self._with_diagonal(self.val * other.val, *_diag_product(self, other), self.packed or other.packed)
+        if isinstance(other, VAD) or isinstance(other, ad.AD):
+            packed = _is_packed(self) or _is_packed(other)
+            new_val = self.val * other.val
+            new_der = self.der * other.val[..., None] + self.val[..., None] * other.der
+            if _der2_of(self) is None or _der2_of(other) is None:
+                new_der2 = None
+            else:
+                new_der2 = _sym_outer(self.der, other.der, packed)
+                if _der2_of(self) is not _ZERO:
+                    new_der2 += _der2_as(self, packed) * _scalar(other.val, packed)
+                if _der2_of(other) is not _ZERO:
+                    new_der2 += _scalar(self.val, packed) * _der2_as(other, packed)
+        else:
+            packed = self.packed
+            const = _constant(other)
+            if _keeps_diagonal(self, const):
+                diag2 = self._diag2
+                if diag2 is not None and diag2 is not _ZERO:
+                    diag2 = diag2 * const
+                return self._with_diagonal(self.val * const, self._diag * const, diag2, packed)
+            new_val = self.val * const
+            new_der = self.der * const[..., None]
+            new_der2 = self._der2
+            if new_der2 is not None and new_der2 is not _ZERO:
+                new_der2 = new_der2 * _scalar(const, packed)
+        return VAD(new_val, new_der, new_der2, order=_order_of(new_der2), packed=packed)
 
     def __rmul__(self, other):
         """
@@ -655,8 +988,9 @@ class VAD():
                 VAD(value: [1., 2.], derivatives: [[0.5, 0.],
                                                    [0., 0.5]])
         """
-        AD_result = self.variables / other
-        return set_VAD(AD_result)   
+        if isinstance(other, VAD) or isinstance(other, ad.AD):
+            return self * other ** (-1.0)
+        return self * (1 / _constant(other))
         
     
     def __rtruediv__(self, other):
@@ -677,8 +1011,7 @@ class VAD():
                 VAD(value: [1., 0.5], derivatives: [[-0.5, 0.],
                                                    [0., -0.125]])
         """
-        AD_result = other/self.variables
-        return set_VAD(AD_result)
+        return self ** (-1.0) * other
         
     
     def __itruediv__(self, other):
@@ -722,8 +1055,13 @@ class VAD():
                 VAD(value: [1., 4.], derivatives: [[2., 0.],
                                                    [0., 4.]])
         """           
-        AD_result = self.variables ** other
-        return set_VAD(AD_result)  
+        if isinstance(other, VAD) or isinstance(other, ad.AD):
+            return admath.exp(admath.log(self) * other)
+        power = _constant(other).astype(float)
+        new_val = np.power(self.val, power)
+        der = (self.val ** (power - 1.)) * power
+        der2 = (self.val ** (power - 2.)) * power * (power - 1.)
+        return self._chain_rule(new_val, der, der2)
 
     
     def __ipow__(self, other):
@@ -765,10 +1103,157 @@ class VAD():
                 VAD(value: [2., 8.], derivatives: [[2.*np.log(2.), 0.],
                                                    [0., 8.*np.log(2.)]])
         """
-        AD_result = other ** self.variables
-        return set_VAD(AD_result)
+        base = _constant(other)
+        new_val = np.power(base.astype(float), self.val)
+        der = new_val * np.log(base)
+        der2 = der * np.log(base)
+        return self._chain_rule(new_val, der, der2)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """
+        Implements the NumPy ufunc protocol, so NumPy functions such as np.sin or np.exp apply the vectorized
+        derivative rules of admath to VAD objects, and NumPy arrays combine with them through the VAD operators
+        instead of being turned into object arrays of AD objects.
+
+                Parameters:
+                        self (VAD): a VAD object among the inputs
+                        ufunc (np.ufunc): the ufunc called
+                        method (str): how the ufunc is called, only "__call__" is supported
+                        inputs: the operands of the ufunc
+                        kwargs: keyword arguments of the ufunc, none are supported
+
+                Returns:
+                        A new VAD object, or NotImplemented for unsupported ufuncs
+
+                Example:
+                >>> x = VAD([0., 1.])
+                >>> np.array([1., 2.]) * np.exp(x)
+                VAD(value: [1.         5.43656366], derivatives: [[1.         0.        ]
+                                                                 [0.         5.43656366]])
+        """
+        return admath._array_ufunc(ufunc, method, *inputs, **kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        """
+        Implements the NumPy function protocol for reductions and linear algebra on VAD objects:
+        np.sum, np.mean, np.prod, np.dot, np.einsum and np.linalg.norm apply their derivative rules to the
+        whole arrays of derivatives, with one NumPy call each, instead of chaining AD operations,
+        and np.reshape and np.transpose return views, as VAD.reshape() and VAD.transpose().
+        Other NumPy functions are not supported and raise a TypeError, rather than falling back to arrays of AD objects.
+
+                Parameters:
+                        self (VAD): a VAD object among the arguments
+                        func: the NumPy function called
+                        types: the types of the arguments implementing the protocol
+                        args, kwargs: the arguments of the call
+
+                Returns:
+                        An AD object for scalar results, a VAD object for vector results,
+                        or NotImplemented for other functions, for which NumPy raises a TypeError
+
+                Example:
+                >>> x = VAD([1., 2., 3.])
+                >>> np.sum(x * x)
+                AD(value: [14.], derivatives: [2. 4. 6.])
+        """
+        if func in _array_functions:
+            return _array_functions[func](*args, **kwargs)
+        return NotImplemented
+
+    def __matmul__(self, other):
+        """
+        Overwrites the __matmul__ dunder method to apply matrix multiplication to a VAD object, as np.dot.
+
+                Parameters:
+                        self (VAD): the VAD object, a vector
+                        other (VAD or np.array): a vector, or a matrix with as many rows as self has values
+
+                Returns:
+                        An AD object for the product of two vectors, a VAD object for a vector times a matrix
+
+                Example:
+                >>> x = VAD([1., 2.])
+                >>> x @ np.array([[1., 2.], [3., 4.]])
+                VAD(value: [ 7. 10.], derivatives: [[1. 3.]
+                                                    [2. 4.]])
+        """
+        return _dot(self, other)
+
+    def __rmatmul__(self, other):
+        """
+        Overwrites the __rmatmul__ dunder method to apply matrix multiplication to a VAD object on the right, as np.dot.
+
+                Parameters:
+                        self (VAD): the VAD object, a vector
+                        other (np.array): a vector, or a matrix with as many columns as self has values
+
+                Returns:
+                        An AD object for the product of two vectors, a VAD object for a matrix times a vector
+
+                Example:
+                >>> x = VAD([1., 2.])
+                >>> np.array([[1., 2.], [3., 4.]]) @ x
+                VAD(value: [ 5. 11.], derivatives: [[1. 2.]
+                                                    [3. 4.]])
+        """
+        return _dot(other, self)
 
 
+    def _chain_rule(self, new_val, der, der2, higher_der=None):
+        """
+        Applies chain rule to all the variables of the VAD object at once. 
+        Used by admath.chain_rule, so every admath function is a single vectorized operation on a VAD object.
+    
+                Parameters:
+                        self (VAD): the inner VAD object of the composition
+                        new_val (np.array): values of the new VAD object
+                        der (np.array or float): first derivatives of the outer function, one for each variable
+                        der2 (np.array or float): second derivatives of the outer function, one for each variable
+                        higher_der: ignored, higher order derivatives are only carried by AD objects
+
+                Returns:
+                        new_vad (VAD): a new VAD object with correct value and derivatives
+
+                Example:
+                >>> a = VAD([1,2])
+                >>> a._chain_rule(np.exp(a.val), np.exp(a.val), np.exp(a.val))
+                VAD(value: [2.71828183 7.3890561 ], derivatives: [[2.71828183 0.        ]
+                                                                 [0.         7.3890561 ]])
+        """
+        der = np.asarray(der)
+        if self._unit is not None and np.shape(der) == np.shape(self.val):
+            # an elementwise function keeps the Jacobian diagonal
+            if self._diag2 is None:
+                return self._with_diagonal(new_val, der * self._diag, None, self.packed)
+            new_diag2 = np.asarray(der2) * self._diag ** 2
+            if self._diag2 is not _ZERO:
+                new_diag2 = new_diag2 + der * self._diag2
+            return self._with_diagonal(new_val, der * self._diag, new_diag2, self.packed)
+        new_der = der[..., None] * self.der
+        if self._der2 is None:
+            return VAD(new_val, new_der, order=1)
+        der2 = np.asarray(der2)
+        new_der2 = _scalar(der2, self.packed) * _square(self.der, self.packed)
+        if self._der2 is not _ZERO:
+            new_der2 = new_der2 + _scalar(der, self.packed) * self._der2
+        return VAD(new_val, new_der, new_der2, packed=self.packed)
+
+    def _with_diagonal(self, new_val, diag, diag2, packed):
+        """
+        A new diagonal VAD object depending on the same variables as self, row by row.
+
+                Parameters:
+                        self (VAD): a diagonal VAD object
+                        new_val (np.array): the new values
+                        diag (np.array): the first derivative of each value with respect to its variable
+                        diag2 (np.array or None or _ZERO): the second derivative of each value with respect to its variable
+                        packed (bool): whether second derivatives are packed once they are formed
+
+                Returns:
+                        A new diagonal VAD object
+        """
+        return _diagonal(new_val, self._unit, self._n, diag, diag2, packed)
+
     def diff(self, direction, order = 1):
         """
         Calculate and return the derivatives of the function represented by an VAD object.
@@ -788,14 +1273,350 @@ class VAD():
                 np.array([0.,2.])             
         """    
         if order == 1 and isinstance(direction,int):
+            if self._unit is not None:
+                return np.where(self._unit == direction, self._diag, 0.)
             return self.der[:,direction]
                 
         elif order == 2 and isinstance(direction, list) and len(direction) ==2:
+            der2 = self._diag2 if self._unit is not None else self.der2
+            if der2 is None:
+                raise ValueError("Second order derivatives are not stored when the VAD object is initialized with order 1.")
+            if self._unit is not None:
+                if direction[0] != direction[1] or self._diag2 is _ZERO:
+                    return np.zeros(len(self._unit))
+                return np.where(self._unit == direction[0], self._diag2, 0.)
+            if self.packed:
+                i, j = min(direction), max(direction)
+                n = self.der.shape[-1]
+                return self.der2[:, i * (2 * n - i + 1) // 2 + j - i]
             return self.der2[:,direction[0],direction[1]]
         else:
             raise Exception("Order exceeds 2 or length of direction and order don't match.")
 
 # helper function
+def _outer(a, b):
+    """
+        Outer products of the last axes of two arrays of first derivatives, taken row by row.
+    
+                Parameters:
+                        a, b (np.array): first derivatives of shape (n,) or (m, n)
+                Returns:
+                        An np.array of shape (n, n) or (m, n, n) with entries a[..., i] * b[..., j]
+                
+                Example:
+                >>> _outer(np.array([[1., 2.]]), np.array([[3., 4.]]))
+                array([[[3., 4.],
+                        [6., 8.]]])
+    """
+    return a[..., :, None] * b[..., None, :]
+
+def _is_packed(obj):
+    """
+        Whether an object carrying derivatives stores packed second derivatives; AD objects never do.
+
+                Parameters:
+                        obj (VAD or AD): the object
+                Returns:
+                        True if obj is a VAD object with packed second derivatives
+    """
+    return isinstance(obj, VAD) and obj.packed
+
+def _der2_as(obj, packed):
+    """
+        The second derivatives of an operand, packed if the result of the operation is packed.
+
+                Parameters:
+                        obj (VAD or AD): the operand
+                        packed (bool): whether the result is packed
+                Returns:
+                        The second derivatives of obj in the layout of the result, None in first-order mode
+    """
+    der2 = _der2_of(obj)
+    if der2 is None or der2 is _ZERO or _is_packed(obj) or not packed:
+        return der2
+    return pack(der2)
+
+def _der2_of(obj):
+    """
+        The second derivatives of an operand without forming them: _ZERO if they are known to be zero.
+
+                Parameters:
+                        obj (VAD or AD): the operand
+                Returns:
+                        The second derivatives of obj, None in first-order mode
+    """
+    if not isinstance(obj, VAD):
+        return obj.der2
+    if obj._unit is not None:
+        obj._densify()
+    return obj._der2
+
+def _add_der2(der2, other_der2):
+    """
+        Add two second derivatives, where None stands for derivatives that are not tracked and _ZERO for zeros.
+
+                Parameters:
+                        der2, other_der2 (np.array or None or _ZERO): the second derivatives of the operands
+                Returns:
+                        Their sum, None if any of them is not tracked
+    """
+    if der2 is _ZERO:
+        return other_der2
+    if other_der2 is _ZERO:
+        return der2
+    return ad._add_der2(der2, other_der2)
+
+def _single(val, unit, n, diag, diag2):
+    """
+        The AD object of one value of a diagonal VAD object.
+
+                Parameters:
+                        val (float): the value
+                        unit (int): the variable it depends on
+                        n (int): the number of variables
+                        diag (float): its first derivative with respect to its variable
+                        diag2 (float or None or _ZERO): its second derivative with respect to its variable
+                Returns:
+                        An AD object
+    """
+    der = np.zeros(n)
+    der[unit] = diag
+    der2 = None
+    if diag2 is not None:
+        der2 = np.zeros((n, n))
+        if diag2 is not _ZERO:
+            der2[unit, unit] = diag2
+    return ad.AD._new(np.array([val]), np.array([unit]), der, der2)
+
+def _index(pos, k):
+    """
+        The index of the derivatives of a VAD object for the index pos of its values:
+        an ellipsis in pos must not reach the k trailing axes of the derivatives.
+
+                Parameters:
+                        pos: a NumPy index of the values
+                        k (int): the number of axes of derivatives
+                Returns:
+                        A NumPy index of the derivatives
+    """
+    if isinstance(pos, tuple) and any(p is Ellipsis for p in pos):
+        return pos + (slice(None),) * k
+    return pos
+
+def _diagonal(val, unit, n, diag, diag2, packed):
+    """
+        A VAD object whose values each depend on a single variable, such as the seeds and elementwise functions of them.
+        Its Jacobian has one nonzero per row, diag[i] in column unit[i], and its second derivatives one nonzero per value,
+        diag2[i] at (unit[i], unit[i]), so they are stored in O(m) and only formed when an operation mixes the variables.
+
+                Parameters:
+                        val (np.array): the values
+                        unit (np.array of int): the variable each value depends on
+                        n (int): the number of variables
+                        diag (np.array): the first derivative of each value with respect to its variable
+                        diag2 (np.array or None or _ZERO): the second derivative of each value with respect to its variable,
+                                                           None in first-order mode and _ZERO if known to be zero
+                        packed (bool): whether second derivatives are packed once they are formed
+                Returns:
+                        A diagonal VAD object
+    """
+    vad = VAD(val, order=_order_of(diag2), packed=packed)
+    vad._unit, vad._n, vad._diag, vad._diag2 = np.atleast_1d(unit), n, np.atleast_1d(diag), diag2
+    vad.val, vad._input = np.asarray(val), None
+    return vad
+
+def _view(val, der, der2, order, packed):
+    """
+        A VAD object of the given arrays, without copying the values, for the views of VAD.reshape(),
+        VAD.transpose() and indexing.
+
+                Parameters:
+                        val, der, der2 (np.array): the values and derivatives, der2 None in first-order mode
+                        order (int): the highest order of derivatives
+                        packed (bool): whether der2 is packed
+                Returns:
+                        A VAD object
+    """
+    vad = VAD(val, der, der2, order=order, packed=packed)
+    vad.val = val
+    return vad
+
+def _same_diagonal(obj, other):
+    """
+        Whether two operands are diagonal VAD objects whose values depend on the same variables, row by row,
+        so that their elementwise combinations are diagonal too.
+
+                Parameters:
+                        obj, other: the operands
+                Returns:
+                        True if both are diagonal VAD objects with the same variables
+    """
+    return (isinstance(other, VAD) and obj._unit is not None and other._unit is not None and obj._n == other._n
+            and np.shape(obj.val) == np.shape(other.val) and np.array_equal(obj._unit, other._unit))
+
+def _keeps_diagonal(obj, const):
+    """
+        Whether combining a VAD object elementwise with a constant keeps it diagonal: the constant must not add rows.
+
+                Parameters:
+                        obj (VAD): the VAD object
+                        const (np.array): the constant operand
+                Returns:
+                        True if obj is diagonal and const broadcasts to its values
+    """
+    return obj._unit is not None and np.broadcast(obj.val, const).shape == np.shape(obj.val)
+
+def _diag_product(obj, other):
+    """
+        Diagonal derivatives of the product of two diagonal VAD objects with the same variables.
+
+                Parameters:
+                        obj, other (VAD): the diagonal operands
+                Returns:
+                        A tuple (first derivatives, second derivatives), the latter None in first-order mode
+    """
+    diag = obj._diag * other.val + obj.val * other._diag
+    if obj._diag2 is None or other._diag2 is None:
+        return diag, None
+    diag2 = 2 * obj._diag * other._diag
+    if obj._diag2 is not _ZERO:
+        diag2 = diag2 + obj._diag2 * other.val
+    if other._diag2 is not _ZERO:
+        diag2 = diag2 + obj.val * other._diag2
+    return diag, diag2
+
+def _scalar(coef, packed):
+    """
+        Broadcast one coefficient per value against second derivatives.
+
+                Parameters:
+                        coef (np.array): the coefficients, of the shape of the values
+                        packed (bool): whether the second derivatives are packed
+                Returns:
+                        coef with one trailing axis if packed, two otherwise
+    """
+    coef = np.asarray(coef)
+    return coef[..., None] if packed else coef[..., None, None]
+
+@functools.lru_cache(maxsize=None)
+def _packed_rows(n):
+    """
+        Start of each row of the packed upper triangle of an n x n matrix, computed once for each n.
+
+                Parameters:
+                        n (int): the number of variables
+                Returns:
+                        A tuple of n + 1 offsets; row i holds the entries (i, i), ..., (i, n - 1)
+    """
+    return tuple(int(k) for k in np.concatenate(([0], np.cumsum(np.arange(n, 0, -1)))))
+
+def pack(der2):
+    """
+    Pack symmetric second derivatives into their upper triangles, row by row:
+    the entry (i, j) with i <= j is stored at position i * (2n - i + 1) / 2 + j - i.
+
+            Parameters:
+                    der2 (np.array): symmetric second derivatives of shape (..., n, n)
+
+            Returns:
+                    An np.array of shape (..., n(n+1)/2)
+
+            Example:
+            >>> pack(np.array([[1., 2.], [2., 3.]]))
+            array([1., 2., 3.])
+    """
+    n = der2.shape[-1]
+    rows, cols = np.triu_indices(n)
+    return der2[..., rows, cols]
+
+def unpack(der2, n):
+    """
+    Unpack second derivatives stored by pack() into full symmetric matrices.
+
+            Parameters:
+                    der2 (np.array): packed second derivatives of shape (..., n(n+1)/2)
+                    n (int): the number of variables
+
+            Returns:
+                    An np.array of shape (..., n, n)
+
+            Example:
+            >>> unpack(np.array([1., 2., 3.]), 2)
+            array([[1., 2.],
+                   [2., 3.]])
+    """
+    rows, cols = np.triu_indices(n)
+    full = np.zeros(der2.shape[:-1] + (n, n))
+    full[..., rows, cols] = der2
+    full[..., cols, rows] = der2
+    return full
+
+def _sym_outer(a, b, packed):
+    """
+        Symmetric rank-2 update a b^T + b a^T of the second derivatives of a product, row by row.
+        In packed form, only the upper triangle is computed, one row of it at a time.
+
+                Parameters:
+                        a, b (np.array): first derivatives of shape (n,) or (m, n)
+                        packed (bool): whether the second derivatives are packed
+                Returns:
+                        An np.array of shape (..., n, n), or (..., n(n+1)/2) if packed
+
+                Example:
+                >>> _sym_outer(np.array([1., 2.]), np.array([3., 4.]), True)
+                array([ 6., 10., 16.])
+    """
+    a, b = np.broadcast_arrays(a, b)
+    if not packed:
+        update = _outer(a, b)
+        return update + np.swapaxes(update, -1, -2)
+    starts = _packed_rows(a.shape[-1])
+    update = np.empty(a.shape[:-1] + (starts[-1],))
+    for i in range(a.shape[-1]):
+        row = update[..., starts[i]:starts[i + 1]]
+        np.multiply(a[..., i, None], b[..., i:], out=row)
+        row += b[..., i, None] * a[..., i:]
+    return update
+
+def _square(a, packed):
+    """
+        Rank-1 update a a^T of the second derivatives of an elementwise function.
+
+                Parameters:
+                        a (np.array): first derivatives of shape (n,) or (m, n)
+                        packed (bool): whether the second derivatives are packed
+                Returns:
+                        An np.array of shape (..., n, n), or (..., n(n+1)/2) if packed
+    """
+    if not packed:
+        return _outer(a, a)
+    starts = _packed_rows(a.shape[-1])
+    update = np.empty(a.shape[:-1] + (starts[-1],))
+    for i in range(a.shape[-1]):
+        np.multiply(a[..., i, None], a[..., i:], out=update[..., starts[i]:starts[i + 1]])
+    return update
+
+def _constant(other):
+    """
+        Turn the non-differentiable operand of a VAD operation into a numeric np.array.
+    
+                Parameters:
+                        other (int or float or list or np.array): the constant operand
+                Returns:
+                        The operand as an np.array, broadcastable against the values of a VAD object
+
+                Raise:
+                        TypeError if the operand is not numeric
+                
+                Example:
+                >>> _constant(2)
+                array(2)
+    """
+    const = np.asarray(other)
+    if not np.issubdtype(const.dtype, np.number):
+        raise TypeError("Invalid type.")
+    return const
+
 def set_VAD(ADs):
     """
         Create a VAD object with a list of AD objects.
@@ -814,12 +1635,16 @@ def set_VAD(ADs):
     """ 
     new_val = np.concatenate([ADs[i].val for i in range(len(ADs))])
     new_der = np.array([ADs[i].der for i in range(len(ADs))])
+    if any(ADs[i].der2 is None for i in range(len(ADs))):
+        return VAD(new_val, new_der, order=1)
     new_der2 = np.array([ADs[i].der2 for i in range(len(ADs))])
     return VAD(new_val, new_der, new_der2)
 
 def my_decorator(func):
     """
         Helper function that enables directly using functions from admath.
+        The admath functions apply the chain rule to a whole VAD object at once, 
+        so no AD object is created for the variables.
     
                 Parameters:
                         func: the function to be applied
@@ -833,11 +1658,7 @@ def my_decorator(func):
                 exp(y)
     """ 
     def wrapper(vad):
-        try:
-            AD_result = np.array([func(ad) for ad in vad.variables])
-            return set_VAD(AD_result)
-        except:
-            return func(vad)
+        return func(vad)
     return wrapper
 
 
@@ -869,11 +1690,9 @@ def pow(vad,y):
                 VAD(value: [1., 4.], derivatives: [[2., 0.],
                                                    [0., 4.]])
     """ 
-    try:
-        AD_result = np.array([ad**y for ad in vad.variables])
-        return set_VAD(AD_result)
-    except:
-        return np.power(vad,y)
+    if admath._is_ad(vad):
+        return vad ** y
+    return np.power(vad,y)
 
 
 def log(vad, base=np.e):
@@ -892,30 +1711,153 @@ def log(vad, base=np.e):
                 >>> log(x)
                 AD(value: [0.69314718], derivatives: [0.5])
     """
-    try:
-        AD_result = np.array([admath.log(ad)/admath.log(base) for ad in vad.variables])
-        return set_VAD(AD_result)
-    except:
-        return admath.log(vad)/admath.log(base)
+    if isinstance(base, float) and base == np.e:
+        return admath.log(vad)
+    return admath.log(vad)/admath.log(base)
+
 
 
 
+# batched evaluation
+def batch(points, order=2):
+    """
+    Create one VAD object per input variable, holding that variable at many points at once.
+    The leading axis of every VAD object is then the batch axis: values have shape (B,), first derivatives (B, n)
+    and second derivatives (B, n, n), so every operation and admath function evaluates the function and its
+    derivatives at all B points in a single vectorized pass. The variables are diagonal VAD objects (see _diagonal()),
+    so elementwise functions of one variable cost O(B), and the dense derivatives are only formed by operations
+    mixing variables.
+
+            Parameters:
+                    points (list or np.array): the points, of shape (B, n), or (B,) for a single variable
+                    order (int): 1 to only compute first derivatives, 2 to also compute second derivatives
+
+            Returns:
+                    A list of n VAD objects, one for each input variable
+
+            Raise:
+                    ValueError if points is not of shape (B, n) or order is not 1 or 2
+
+            Example:
+            >>> x, y = batch([[1., 2.], [3., 4.], [5., 6.]])
+            >>> f = x * y
+            >>> jacobian(f)
+            array([[2., 1.],
+                   [4., 3.],
+                   [6., 5.]])
+    """
+    if order not in (1, 2):
+        raise ValueError("Batched evaluation supports derivatives of order 1 or 2.")
+    points = np.asarray(points, dtype=float)
+    if points.ndim == 1:
+        points = points[:, None]
+    if points.ndim != 2:
+        raise ValueError("Points must be given as an array of shape (B, n).")
+    B, n = points.shape
+    # each value depends on one variable only: the derivatives stay diagonal, in O(B), until the variables mix;
+    # the variable and the unit derivative of every point are read-only broadcast views
+    ones = np.broadcast_to(1., (B,))
+    columns = np.ascontiguousarray(points.T)
+    return [_diagonal(columns[i], np.broadcast_to(i, (B,)), n, ones, None if order == 1 else _ZERO, False)
+            for i in range(n)]
+
 # jacobian
-def jacobian(funcs):
+def inputs(groups, wrt=None, order=2, packed=False):
+    """
+        Create the variables of a function of several inputs, such as a state and parameters.
+        Each group of the inputs differentiated with respect to takes its own range of the variables, after those of
+        the previous groups, so its VAD object and those of the other groups can be combined in one function.
+        The other groups are returned as constant arrays and carry no derivatives: the derivatives of the function
+        only span the requested groups, and jacobian(f, wrt=...) splits them into named blocks.
+
+                Parameters:
+                        groups (dict): the values of each input, by name; a value may be a number, a vector or an array
+                        wrt (str or list of str): the names of the inputs to differentiate with respect to, all by default
+                        order (int): the highest order of derivatives, 1 or 2
+                        packed (bool): store the second derivatives packed; see pack()
+
+                Returns:
+                        A dict of the inputs by name: a VAD object for each input in wrt, an np.array for the others
+
+                Raise:
+                        ValueError if wrt names an input that is not in groups
+
+                Example:
+                >>> v = inputs({"x": [1., 2.], "p": [3.]}, wrt="p")
+                >>> f = v["x"] * v["p"]
+                >>> jacobian(f, wrt=v)["p"]
+                array([[1.],
+                       [2.]])
+    """
+    names = list(groups) if wrt is None else [wrt] if isinstance(wrt, str) else list(wrt)
+    if any(name not in groups for name in names):
+        raise ValueError("Inputs to differentiate with respect to should be names of the groups.")
+    values = {name: np.asarray(val, dtype=float) for name, val in groups.items()}
+    n = sum(values[name].size for name in names)
+    result, start = {}, 0
+    for name, val in values.items():
+        if name not in names:
+            result[name] = val
+            continue
+        unit = start + np.arange(val.size).reshape(val.shape)
+        vad = _diagonal(val, unit, n, np.ones(val.shape), None if order == 1 else _ZERO, packed and order > 1)
+        vad._input = (start, val.shape)
+        result[name] = vad
+        start += val.size
+    return result
+
+def jacobian(funcs, structured=False, wrt=None):
     """
         Return the Jacobian matrix of the input function(s).
+        With structured=True, it is returned as its nonzero entries and their positions, like sparse_hessian().
+        The Jacobian of elementwise functions of the variables is diagonal and then given in O(n), without forming it.
+        With wrt, the input VAD object of the variables, the derivatives of a VAD object are laid out as an array of
+        shape funcs.shape + wrt.shape, a view of funcs.der. With a dict of inputs created by inputs(), the Jacobian is
+        returned as a dict of these blocks, one for each input that carries derivatives.
     
                 Parameters:
                         funcs (VAD or list of VAD): the VAD object(s) for which we want to calculate the Jacobian of
+                        structured (bool): return the tuple (data, rows, cols) of the nonzero entries instead of the matrix
+                        wrt (VAD or dict): the VAD object created from the values of the variables, such as a matrix,
+                                           or the dict of inputs created by inputs()
     
                 Returns:
-                        The Jacobian matrix of the input function(s)
+                        The Jacobian matrix of the input function(s), or the tuple (data, rows, cols), or a dict of blocks
+
+                Raise:
+                        TypeError if wrt is not a VAD object created from values, or funcs is not a VAD object
 
                 Example:
                 >>> x = VAD([3, 1])
                 >>> f = 2 * x
                 >>> jacobian(f),np.array([[2., 0.],[0.,2.]]))
+                >>> jacobian(sin(x), structured=True)
+                (array([-0.9899925 ,  0.54030231]), array([0, 1]), array([0, 1]))
+
+                >>> W = VAD(np.ones((2, 3)))
+                >>> jacobian(W.T @ W, wrt=W).shape
+                (3, 3, 2, 3)
     """
+    if isinstance(wrt, dict):
+        return {name: jacobian(funcs, wrt=x) for name, x in wrt.items() if isinstance(x, VAD)}
+    if wrt is not None:
+        if not isinstance(wrt, VAD) or wrt._input is None:
+            raise TypeError("Invalid type. wrt should be the VAD object created from the values of the variables.")
+        if not isinstance(funcs, (VAD, ad.AD)):
+            raise TypeError("Invalid type. funcs should be an AD or VAD object.")
+        start, shape = wrt._input
+        der = funcs.der
+        size = int(np.prod(shape))
+        return der[..., start:start + size].reshape(np.shape(funcs.val) + shape)
+    if structured:
+        if isinstance(funcs, VAD) and funcs._unit is not None:
+            # one row per value, in C order for arrays of values
+            return funcs._diag.ravel().copy(), np.arange(funcs._unit.size), funcs._unit.ravel().copy()
+        jac = jacobian(funcs)
+        # the Jacobian matrix, one row per value, also for arrays of values
+        jac = np.reshape(jac, (-1, np.shape(jac)[-1]))
+        rows, cols = np.nonzero(jac)
+        return jac[rows, cols], rows, cols
     diffs = []
     if isinstance(funcs,VAD) or isinstance(funcs,ad.AD):
         return funcs.der
@@ -949,10 +1891,822 @@ def hessian(func):
     if isinstance(func, VAD):
         raise TypeError("Invalid Type. Sorry, we cannot handle multiple functions for Hessian.")
     elif isinstance(func, ad.AD):
+        if func.der2 is None:
+            raise ValueError("Second order derivatives are not stored when the function is built with order 1.")
         hessian = func.der2
         return hessian
     else:
         raise TypeError("Invalid Type. Function should be an AD object.")
 
 
+# jacobian-vector product
+def jvp(f, x, v, order=1):
+    """
+    Return the directional derivative J·v of a function, seeding every input with a single tangent
+    instead of the identity. Every operation then carries one tangent per variable rather than n of them.
+    With order 2, the second-order directional derivative v^T H v of every output is returned as well.
+
+            Parameters:
+                    f (function): a function of one VAD object, returning a VAD object, an AD object or a list of them
+                    x (int or float or list or np.array): the point at which the derivatives are evaluated
+                    v (int or float or list or np.array): the tangent direction, of the same length as x
+                    order (int): 1 for J·v only, 2 to also get v^T H v
+
+            Returns:
+                    A tuple of np.arrays with one entry per output: the values, J·v and, with order 2, v^T H v
+
+            Raise:
+                    TypeError if f does not return AD or VAD objects
+                    ValueError if order is not 1 or 2
+
+            Example:
+            >>> jvp(lambda x: x * x[0], [1., 2.], [1., 0.])
+            (array([1., 2.]), array([2., 2.]))
+    """
+    if order not in (1, 2):
+        raise ValueError("Order of the directional derivative must be 1 or 2.")
+    val = np.atleast_1d(np.array(x, dtype=float))
+    tangent = np.array(v, dtype=float).reshape(len(val), 1)
+    der2 = np.zeros((len(val), 1, 1)) if order == 2 else None
+    out = f(VAD(val, tangent, der2, order=order))
+
+    funcs = [out] if isinstance(out, VAD) or isinstance(out, ad.AD) else out
+    vals, ders, ders2 = [], [], []
+    for func in funcs:
+        if not isinstance(func, VAD) and not isinstance(func, ad.AD):
+            raise TypeError("Invalid Type. All functions should be AD object.")
+        vals.append(np.ravel(func.val))
+        ders.append(np.ravel(func.der))
+        if order == 2:
+            ders2.append(np.ravel(func.der2))
+    if order == 2:
+        return np.concatenate(vals), np.concatenate(ders), np.concatenate(ders2)
+    return np.concatenate(vals), np.concatenate(ders)
+
+
+# reductions and linear algebra
+def _reduced(val, der, der2):
+    """
+        The AD object of a scalar result of a VAD object, such as a sum, which depends on all the variables.
+
+                Parameters:
+                        val (float): the value
+                        der (np.array): the first derivatives, of shape (n,)
+                        der2 (np.array or None): the second derivatives, of shape (n, n), None in first-order mode
+                Returns:
+                        An AD object
+    """
+    return ad.AD._new(np.array([val], dtype=float), np.arange(len(der)), der, der2)
+
+def _contract(vad, weights):
+    """
+        Weighted sum of the derivatives of the values of a VAD object, in one reduction over the derivative arrays.
+        Diagonal derivatives are summed without forming them.
+
+                Parameters:
+                        vad (VAD): the VAD object
+                        weights (np.array): one weight per value, broadcast to the shape of the values
+                Returns:
+                        A tuple of the first derivatives, of shape (n,), and the full second derivatives,
+                        of shape (n, n), or None in first-order mode
+    """
+    weights = np.broadcast_to(weights, np.shape(vad.val) or (1,)).astype(float).ravel()
+    if vad._unit is not None:
+        n = vad._n
+        unit = vad._unit.ravel()
+        der = np.bincount(unit, weights * vad._diag.ravel(), minlength=n)
+        if vad._diag2 is None:
+            return der, None
+        der2 = np.zeros((n, n))
+        if vad._diag2 is not _ZERO:
+            der2[np.diag_indices(n)] = np.bincount(unit, weights * np.ravel(vad._diag2), minlength=n)
+        return der, der2
+    der = weights @ np.reshape(vad.der, (len(weights), -1))
+    n = len(der)
+    der2 = _der2_of(vad)
+    if der2 is None:
+        return der, None
+    if der2 is _ZERO:
+        return der, np.zeros((n, n))
+    der2 = np.tensordot(weights, np.reshape(der2, (len(weights),) + der2.shape[-(1 if vad.packed else 2):]), axes=1)
+    return der, unpack(der2, n) if vad.packed else der2
+
+def _check_reduction(a, axis, kwargs):
+    """
+        Check the arguments of a reduction of a VAD object, and turn its axes into axes of the values.
+
+                Parameters:
+                        a (VAD): the VAD object
+                        axis: the axis argument of the reduction, None or an int or a tuple of int
+                        kwargs (dict): the other arguments of the reduction
+                Returns:
+                        The tuple of the reduced axes of the values, all of them for axis=None
+                Raise:
+                        TypeError if the reduction has other arguments, such as out
+    """
+    if any(v is not None and v is not False for v in kwargs.values()):
+        raise TypeError("Only the axis and keepdims arguments of reductions of VAD objects are supported.")
+    ndim = max(a.ndim, 1)
+    if axis is None:
+        return tuple(range(ndim))
+    axes = axis if isinstance(axis, tuple) else (axis,)
+    if any(not -ndim <= k < ndim for k in axes):
+        raise TypeError("Invalid axis.")
+    # negative axes count from the last axis of the values, not of the derivatives
+    return tuple(sorted(k % ndim for k in axes))
+
+def _partial_sum(a, axes, keepdims):
+    """
+        Sum of the values of a VAD object along some of their axes, one sum on each array of derivatives.
+
+                Parameters:
+                        a (VAD): the VAD object
+                        axes (tuple of int): the reduced axes of the values
+                        keepdims (bool): keep the reduced axes with length one
+                Returns:
+                        A VAD object
+    """
+    der2 = _der2_of(a)
+    if der2 is not None and der2 is not _ZERO:
+        der2 = np.sum(der2, axis=axes, keepdims=keepdims)
+    return VAD(np.sum(a.val, axis=axes, keepdims=keepdims), np.sum(a.der, axis=axes, keepdims=keepdims), der2,
+               order=a.order, packed=a.packed)
+
+def _sum(a, axis=None, keepdims=False, **kwargs):
+    """
+        np.sum of a VAD object: one reduction over its derivatives.
+
+                Parameters:
+                        a (VAD): the VAD object
+                        axis: None, or the axes of the values to sum along
+                        keepdims (bool): keep the reduced axes with length one
+                Returns:
+                        An AD object for the sum of all the values, a VAD object otherwise
+    """
+    axes = _check_reduction(a, axis, kwargs)
+    if keepdims or len(axes) < max(a.ndim, 1):
+        return _partial_sum(a, axes, keepdims)
+    der, der2 = _contract(a, 1.)
+    return _reduced(np.sum(a.val), der, der2)
+
+def _mean(a, axis=None, keepdims=False, **kwargs):
+    """
+        np.mean of a VAD object: the sum divided by the number of values.
+
+                Parameters:
+                        a (VAD): the VAD object
+                        axis: None, or the axes of the values to average along
+                        keepdims (bool): keep the reduced axes with length one
+                Returns:
+                        An AD object for the mean of all the values, a VAD object otherwise
+    """
+    axes = _check_reduction(a, axis, kwargs)
+    count = np.prod([np.shape(a.val)[k] for k in axes]) if a.ndim else 1
+    return _sum(a, axes, keepdims) * (1. / count)
+
+def _prod(a, axis=None, **kwargs):
+    """
+        np.prod of a VAD object. The derivative of the product with respect to each value is the product of the
+        other values, formed with prefix and suffix products rather than divisions, so zeros are handled.
+
+                Parameters:
+                        a (VAD): the VAD object
+                        axis: None, or all the axes of the VAD object
+                Returns:
+                        An AD object
+
+                Raise:
+                        TypeError for products along some of the axes only
+    """
+    if len(_check_reduction(a, axis, kwargs)) < max(a.ndim, 1):
+        raise TypeError("Only products of all the values of a VAD object are supported.")
+    val = np.ravel(a.val).astype(float)
+    m = len(val)
+    der, der2 = _contract(a, _others(val[None, :])[0].reshape(np.shape(a.val)))
+    if der2 is not None:
+        # second derivatives of the product with respect to the values: products of all the values but two
+        rest = np.tile(val, (m, 1))
+        np.fill_diagonal(rest, 1.)
+        cross = _others(rest)
+        np.fill_diagonal(cross, 0.)
+        jac = np.reshape(a.der, (m, -1))
+        der2 = der2 + jac.T @ cross @ jac
+    return _reduced(np.prod(val), der, der2)
+
+def _others(rows):
+    """
+        Products of all the entries of each row but one, without division.
+
+                Parameters:
+                        rows (np.array): an array of shape (k, m)
+                Returns:
+                        An np.array of shape (k, m) whose entry (r, i) is the product of the entries of row r except i
+    """
+    ones = np.ones((len(rows), 1))
+    before = np.cumprod(np.hstack((ones, rows[:, :-1])), axis=1)
+    after = np.cumprod(np.hstack((ones, rows[:, :0:-1])), axis=1)[:, ::-1]
+    return before * after
+
+def _linear(vad, matrix):
+    """
+        The VAD object of matrix @ vad, one matrix product on each array of derivatives.
+
+                Parameters:
+                        vad (VAD): the VAD object, of m values
+                        matrix (np.array): a matrix of shape (k, m)
+                Returns:
+                        A VAD object of k values
+    """
+    der = matrix @ vad.der
+    der2 = _der2_of(vad)
+    if der2 is not None and der2 is not _ZERO:
+        der2 = np.tensordot(matrix, der2, axes=1)
+    return VAD(matrix @ vad.val, der, der2, order=_order_of(der2), packed=vad.packed)
+
+def _dot(a, b):
+    """
+        np.dot of VAD objects and arrays, for vectors and matrices: the product of two vectors is an AD object,
+        the product of a vector and a matrix a VAD object. Products with VAD objects holding matrices use _einsum().
+
+                Parameters:
+                        a, b (VAD or np.array or AD or number): the operands, at least one of them a VAD object
+                Returns:
+                        An AD or VAD object
+
+                Raise:
+                        TypeError if an operand has more than two dimensions
+    """
+    if np.ndim(a) == 0 or np.ndim(b) == 0 or isinstance(a, ad.AD) or isinstance(b, ad.AD):
+        return a * b
+    if np.ndim(a) > 2 or np.ndim(b) > 2:
+        raise TypeError("Only products of vectors and matrices are supported for VAD objects.")
+    if np.ndim(a) == 2 and isinstance(a, VAD) or np.ndim(b) == 2 and isinstance(b, VAD):
+        # a matrix of values that depend on the variables: the product rule of einsum
+        return _einsum(("ij" if np.ndim(a) == 2 else "j") + "," + ("jk" if np.ndim(b) == 2 else "j"), a, b)
+    if isinstance(a, VAD) and isinstance(b, VAD):
+        der, der2 = _contract(a, b.val)
+        other_der, other_der2 = _contract(b, a.val)
+        der = der + other_der
+        if der2 is not None and other_der2 is not None:
+            cross = a.der.T @ b.der
+            der2 = der2 + other_der2 + cross + cross.T
+        else:
+            der2 = None
+        return _reduced(a.val @ b.val, der, der2)
+    if isinstance(a, VAD):
+        matrix = np.asarray(b)
+        if matrix.ndim == 1:
+            return _reduced(a.val @ matrix, *_contract(a, matrix))
+        return _linear(a, matrix.T)
+    matrix = np.asarray(a)
+    if matrix.ndim == 1:
+        return _reduced(matrix @ b.val, *_contract(b, matrix))
+    return _linear(b, matrix)
+
+def _norm(x, ord=None, axis=None, keepdims=False):
+    """
+        np.linalg.norm of a VAD object, the 2-norm sqrt(x . x) or the 1-norm sum(|x|),
+        and the Frobenius norm of a VAD object holding a matrix or an array.
+
+                Parameters:
+                        x (VAD): the VAD object
+                        ord (None or 1 or 2): the norm, None for arrays of values
+                Returns:
+                        An AD object
+
+                Raise:
+                        TypeError for other norms, or an axis or keepdims argument
+    """
+    if axis is not None or keepdims:
+        raise TypeError("Only norms over all the values of a VAD object are supported.")
+    if x.ndim > 1:
+        if ord is not None and ord != "fro":
+            raise TypeError("Only the Frobenius norm of a VAD object holding a matrix is supported.")
+        return admath.sqrt(_sum(x * x))
+    if ord is None or ord == 2:
+        return admath.sqrt(_dot(x, x))
+    if ord == 1:
+        return _sum(admath.abs(x))
+    raise TypeError("Only the 1-norm and the 2-norm of a VAD object are supported.")
+
+def _einsum(subscripts, *operands, **kwargs):
+    """
+        np.einsum of VAD objects and arrays. The derivatives follow the product rule:
+        each VAD operand in turn is replaced by its derivatives, which carry one more index (two for second derivatives),
+        and the cross terms of two VAD operands are einsum products of their first derivatives.
+
+                Parameters:
+                        subscripts (str): the subscripts
+                        operands: the VAD objects and arrays
+                Returns:
+                        An AD object for a scalar result, a VAD object otherwise, such as a matrix for "i,iab->ab"
 
+                Raise:
+                        TypeError for ellipses, keyword arguments or AD operands
+    """
+    subscripts = subscripts.replace(" ", "")
+    inputs, arrow, output = subscripts.partition("->")
+    inputs = inputs.split(",")
+    if not arrow:
+        # implicit output: the indices appearing once, in alphabetical order
+        output = "".join(sorted(c for c in set("".join(inputs)) if "".join(inputs).count(c) == 1))
+    vads = [k for k, op in enumerate(operands) if isinstance(op, VAD)]
+    if "." in subscripts or kwargs or any(isinstance(op, ad.AD) for op in operands):
+        raise TypeError("Only einsum of VAD objects and arrays with explicit indices is supported.")
+    # two indices unused by the subscripts, for the derivatives
+    d, e = [c for c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ" if c not in subscripts][:2]
+    vals = [op.val if isinstance(op, VAD) else np.asarray(op) for op in operands]
+
+    def term(replaced, extra):
+        # einsum with the operands of replaced swapped for arrays carrying the extra indices
+        spec = ",".join(inputs[k] + replaced.get(k, ("", None))[0] for k in range(len(operands)))
+        arrays = [replaced[k][1] if k in replaced else vals[k] for k in range(len(operands))]
+        return np.einsum(spec + "->" + output + extra, *arrays)
+
+    new_val = np.einsum(",".join(inputs) + "->" + output, *vals)
+    der = sum(term({k: (d, operands[k].der)}, d) for k in vads)
+    der2 = None
+    if all(_der2_of(operands[k]) is not None for k in vads):
+        packed = any(operands[k].packed for k in vads)
+        n = der.shape[-1]
+        der2 = np.zeros(np.shape(new_val) + ((n * (n + 1) // 2,) if packed else (n, n)))
+        for k in vads:
+            if _der2_of(operands[k]) is not _ZERO:
+                der2 = der2 + (term({k: (d, _der2_as(operands[k], packed))}, d) if packed
+                               else term({k: (d + e, operands[k].der2)}, d + e))
+        for k in vads:
+            for l in vads:
+                if k != l:
+                    cross = term({k: (d, operands[k].der), l: (e, operands[l].der)}, d + e)
+                    der2 = der2 + (pack(cross) if packed else cross)
+        if not output:
+            return _reduced(new_val, der, unpack(der2, n) if packed else der2)
+        return VAD(new_val, der, der2, packed=packed)
+    if not output:
+        return _reduced(new_val, der, None)
+    return VAD(new_val, der, order=1)
+
+
+# dense linear algebra
+def _tangents(obj):
+    """
+        First derivatives of an operand of a linear algebra function, the direction first: shape (n,) + value shape.
+
+                Parameters:
+                        obj (VAD or np.array): the operand
+                Returns:
+                        An np.array, or None for a constant operand
+    """
+    return np.moveaxis(obj.der, -1, 0) if isinstance(obj, VAD) else None
+
+def _curvatures(obj):
+    """
+        Full second derivatives of an operand of a linear algebra function, the directions first: shape (n, n) + value shape.
+
+                Parameters:
+                        obj (VAD or np.array): the operand
+                Returns:
+                        An np.array, None for a constant operand or in first-order mode, and _ZERO if known to be zero
+    """
+    if not isinstance(obj, VAD):
+        return None
+    der2 = _der2_of(obj)
+    if der2 is None or der2 is _ZERO:
+        return der2
+    if obj.packed:
+        der2 = unpack(der2, obj.der.shape[-1])
+    return np.moveaxis(der2, (-2, -1), (0, 1))
+
+def _matrix_result(val, tangents, curvatures, operands):
+    """
+        The VAD object of the result of a linear algebra function, from its derivatives with the directions first.
+
+                Parameters:
+                        val (np.array): the value of the result
+                        tangents (np.array): the first derivatives, of shape (n,) + value shape
+                        curvatures (np.array or None): the second derivatives, of shape (n, n) + value shape
+                        operands (list): the operands of the function; the result is packed if one of them is
+                Returns:
+                        A VAD object
+    """
+    packed = any(_is_packed(obj) for obj in operands)
+    der = np.moveaxis(tangents, 0, -1)
+    if curvatures is None:
+        return VAD(val, der, order=1)
+    der2 = np.moveaxis(curvatures, (0, 1), (-2, -1))
+    return VAD(val, der, pack(der2) if packed else der2, packed=packed)
+
+def _second_order(*operands):
+    """
+        Whether second derivatives are propagated through a linear algebra function: all the VAD operands track them.
+
+                Parameters:
+                        operands: the operands, VAD objects or constant arrays
+                Returns:
+                        True if no VAD operand is in first-order mode
+    """
+    return all(_der2_of(obj) is not None for obj in operands if isinstance(obj, VAD))
+
+def _check_matrix(a):
+    """
+        Check that the matrix of a linear algebra function is a VAD object.
+
+                Parameters:
+                        a: the matrix
+                Raise:
+                        TypeError if a is not a VAD object
+    """
+    if not isinstance(a, VAD):
+        raise TypeError("Invalid Type. The matrix should be a VAD object.")
+
+def _value(obj):
+    """The value of an operand of a linear algebra function, as an np.array of floats."""
+    return np.asarray(obj.val if isinstance(obj, VAD) else obj, dtype=float)
+
+def solve(a, b):
+    """
+    Solve the linear system a y = b, where the matrix a and the right-hand side b may depend on the variables.
+    The derivatives solve systems with the same matrix: a dy = db - da y for the first derivatives,
+    and a d2y = d2b - d2a y - da_i dy_j - da_j dy_i for the second derivatives, with all the directions
+    as right-hand sides of one call, so the cost is a few factorizations of a rather than one per variable.
+
+            Parameters:
+                    a (VAD or np.array): the matrix, a VAD object with values of shape (k, k) or an array
+                    b (VAD or np.array): the right-hand side, of shape (k,) or (k, r)
+
+            Returns:
+                    A VAD object with the solution y
+
+            Raise:
+                    TypeError if neither a nor b is a VAD object
+                    np.linalg.LinAlgError if a is singular
+
+            Example:
+            >>> p = VAD([2., 3.])
+            >>> a = np.einsum("i,iab->ab", p, np.array([np.eye(2), [[0., 1.], [0., 0.]]]))
+            >>> solve(a, np.array([1., 1.])).der
+            array([[ 0.5 , -0.25],
+                   [-0.25,  0.  ]])
+    """
+    if not isinstance(a, VAD) and not isinstance(b, VAD):
+        raise TypeError("Invalid Type. The matrix or the right-hand side should be a VAD object.")
+    a_val, b_val = _value(a), _value(b)
+    k = len(a_val)
+    y = np.linalg.solve(a_val, b_val)
+    da, db = _tangents(a), _tangents(b)
+    rhs = 0.
+    if db is not None:
+        rhs = rhs + db
+    if da is not None:
+        rhs = rhs - np.einsum("iab,b...->ia...", da, y)
+    n = rhs.shape[0]
+    # the directions are the columns of one right-hand side
+    dy = np.linalg.solve(a_val, np.moveaxis(rhs, 0, -1).reshape(k, -1)).reshape(y.shape + (n,))
+    if not _second_order(a, b):
+        return _matrix_result(y, np.moveaxis(dy, -1, 0), None, [a, b])
+    dy_t = np.moveaxis(dy, -1, 0)
+    rhs2 = np.zeros((n, n) + y.shape)
+    d2a, d2b = _curvatures(a), _curvatures(b)
+    if d2b is not None and d2b is not _ZERO:
+        rhs2 += d2b
+    if da is not None:
+        cross = np.einsum("iab,jb...->ija...", da, dy_t)
+        rhs2 -= cross + np.swapaxes(cross, 0, 1)
+        if d2a is not _ZERO:
+            rhs2 -= np.einsum("ijab,b...->ija...", d2a, y)
+    d2y = np.linalg.solve(a_val, np.moveaxis(rhs2, (0, 1), (-2, -1)).reshape(k, -1)).reshape(y.shape + (n, n))
+    return _matrix_result(y, dy_t, np.moveaxis(d2y, (-2, -1), (0, 1)), [a, b])
+
+def inv(a):
+    """
+    Inverse of a matrix depending on the variables, with dX = -X da X and
+    d2X = -X d2a X + X da_i X da_j X + X da_j X da_i X for X the inverse of a, from one inversion.
+
+            Parameters:
+                    a (VAD): the matrix, a VAD object with values of shape (k, k)
+
+            Returns:
+                    A VAD object with the inverse
+
+            Raise:
+                    TypeError if a is not a VAD object
+                    np.linalg.LinAlgError if a is singular
+
+            Example:
+            >>> p = VAD([2.])
+            >>> inv(np.einsum("i,ab->ab", p, np.eye(2))).der[0, 0]
+            array([-0.25])
+    """
+    _check_matrix(a)
+    x = np.linalg.inv(_value(a))
+    prod = x @ _tangents(a)
+    if not _second_order(a):
+        return _matrix_result(x, -prod @ x, None, [a])
+    pairs = np.einsum("iab,jbc->ijac", prod, prod)
+    curvatures = (pairs + np.swapaxes(pairs, 0, 1)) @ x
+    d2a = _curvatures(a)
+    if d2a is not _ZERO:
+        curvatures -= x @ d2a @ x
+    return _matrix_result(x, -prod @ x, curvatures, [a])
+
+def _log_det_derivatives(a, x):
+    """
+        Derivatives of log|det a|: tr(X da_i), and tr(X d2a_ij) - tr(X da_i X da_j), for X the inverse of a.
+
+                Parameters:
+                        a (VAD): the matrix
+                        x (np.array): the inverse of its value
+                Returns:
+                        A tuple of the first derivatives, of shape (n,), and the second derivatives, of shape (n, n),
+                        or None in first-order mode
+    """
+    prod = x @ _tangents(a)
+    der = np.einsum("iaa->i", prod)
+    if not _second_order(a):
+        return der, None
+    der2 = -np.einsum("iab,jba->ij", prod, prod)
+    d2a = _curvatures(a)
+    if d2a is not _ZERO:
+        der2 += np.einsum("ab,ijba->ij", x, d2a)
+    return der, der2
+
+def slogdet(a):
+    """
+    Sign and logarithm of the absolute value of the determinant of a matrix depending on the variables,
+    with d log|det a| = tr(a^-1 da).
+
+            Parameters:
+                    a (VAD): the matrix, a VAD object with values of shape (k, k)
+
+            Returns:
+                    A tuple of the sign, a float, and an AD object with the logarithm of the absolute value of the determinant
+
+            Raise:
+                    TypeError if a is not a VAD object
+                    np.linalg.LinAlgError if a is singular
+
+            Example:
+            >>> p = VAD([2.])
+            >>> slogdet(np.einsum("i,ab->ab", p, np.eye(2)))[1].der
+            array([1.])
+    """
+    _check_matrix(a)
+    a_val = _value(a)
+    sign, log_det = np.linalg.slogdet(a_val)
+    return sign, _reduced(log_det, *_log_det_derivatives(a, np.linalg.inv(a_val)))
+
+def det(a):
+    """
+    Determinant of a matrix depending on the variables, with d det a = det a tr(a^-1 da).
+
+            Parameters:
+                    a (VAD): the matrix, a VAD object with values of shape (k, k)
+
+            Returns:
+                    An AD object with the determinant
+
+            Raise:
+                    TypeError if a is not a VAD object
+                    np.linalg.LinAlgError if a is singular
+
+            Example:
+            >>> p = VAD([2.])
+            >>> det(np.einsum("i,ab->ab", p, np.eye(2))).der
+            array([4.])
+    """
+    _check_matrix(a)
+    a_val = _value(a)
+    value = np.linalg.det(a_val)
+    der, der2 = _log_det_derivatives(a, np.linalg.inv(a_val))
+    if der2 is not None:
+        der2 = value * (der2 + np.outer(der, der))
+    return _reduced(value, value * der, der2)
+
+def cholesky(a):
+    """
+    Cholesky factor L of a symmetric positive definite matrix depending on the variables, a = L L^T.
+    With Phi the lower triangle with half the diagonal, dL = L Phi(L^-1 da L^-T), and
+    d2L = L Phi(L^-1 (d2a - dL_i dL_j^T - dL_j dL_i^T) L^-T), from one factorization.
+
+            Parameters:
+                    a (VAD): the matrix, a VAD object with values of shape (k, k)
+
+            Returns:
+                    A VAD object with the lower triangular factor
+
+            Raise:
+                    TypeError if a is not a VAD object
+                    np.linalg.LinAlgError if a is not positive definite
+
+            Example:
+            >>> p = VAD([4.])
+            >>> cholesky(np.einsum("i,ab->ab", p, np.eye(2))).der[0, 0]
+            array([0.25])
+    """
+    _check_matrix(a)
+    factor = np.linalg.cholesky(_value(a))
+    k = len(factor)
+    factor_inv = np.linalg.inv(factor)
+    phi = np.tril(np.ones((k, k))) - 0.5 * np.eye(k)
+    tangents = factor @ ((factor_inv @ _tangents(a) @ factor_inv.T) * phi)
+    if not _second_order(a):
+        return _matrix_result(factor, tangents, None, [a])
+    cross = np.einsum("iab,jcb->ijac", tangents, tangents)
+    rhs = -(cross + np.swapaxes(cross, 0, 1))
+    d2a = _curvatures(a)
+    if d2a is not _ZERO:
+        rhs += d2a
+    curvatures = factor @ ((factor_inv @ rhs @ factor_inv.T) * phi)
+    return _matrix_result(factor, tangents, curvatures, [a])
+
+
+# eigenvalues and singular values
+def _gaps(values):
+    """
+        Inverse gaps 1 / (values[j] - values[i]) between distinct entries, with zeros on the diagonal.
+
+                Parameters:
+                        values (np.array): the eigenvalues, or the squared singular values
+                Returns:
+                        An np.array of shape (k, k); equal values give infinite entries
+    """
+    gaps = values[None, :] - values[:, None]
+    np.fill_diagonal(gaps, 1.)
+    with np.errstate(divide="ignore"):
+        inverse = 1. / gaps
+    np.fill_diagonal(inverse, 0.)
+    return inverse
+
+def eigh(a, UPLO="L"):
+    """
+    Eigenvalues and eigenvectors of a symmetric matrix depending on the variables, from one decomposition
+    a = V diag(w) V^T. The derivatives reuse the eigenvectors: dw_k = v_k^T da v_k, dV = V (F * (V^T da V))
+    with F_ij = 1 / (w_j - w_i), and the second derivatives of the eigenvalues are
+    v_k^T d2a_ij v_k + 2 dv_k,j^T da_i v_k. The eigenvectors carry first derivatives only.
+    A RAD object is differentiated in reverse mode instead, with the adjoint V diag(w_bar) V^T of the eigenvalues.
+
+            Parameters:
+                    a (VAD or RAD): the symmetric matrix, of shape (k, k)
+                    UPLO (str): the triangle of a that is read, as in np.linalg.eigh
+
+            Returns:
+                    A tuple of the eigenvalues in ascending order, a VAD (or RAD) object of shape (k,),
+                    and the eigenvectors, a VAD (or RAD) object of shape (k, k) whose columns are the eigenvectors
+
+            Raise:
+                    TypeError if a is not a VAD or RAD object
+
+            Example:
+            >>> p = VAD([1., 2.])
+            >>> w, v = eigh(np.einsum("i,iab->ab", p, np.array([np.eye(2), [[0., 1.], [1., 0.]]])))
+            >>> w.der
+            array([[ 1., -1.],
+                   [ 1.,  1.]])
+    """
+    if hasattr(a, "_eigh"):
+        # objects recording the operations, such as RAD objects, apply the reverse rules
+        return a._eigh(UPLO)
+    _check_matrix(a)
+    w, v = np.linalg.eigh(_value(a), UPLO)
+    proj = v.T @ _tangents(a) @ v
+    gaps = _gaps(w)
+    v_tangents = v @ (gaps * proj)
+    vectors = _matrix_result(v, v_tangents, None, [a])
+    w_tangents = np.einsum("ikk->ik", proj)
+    if not _second_order(a):
+        return _matrix_result(w, w_tangents, None, [a]), vectors
+    # dv_k,j^T da_i v_k = sum_l F_lk P_j[l, k] P_i[l, k]
+    curvatures = 2 * np.einsum("lk,jlk,ilk->ijk", gaps, proj, proj)
+    d2a = _curvatures(a)
+    if d2a is not _ZERO:
+        curvatures += np.einsum("ak,ijab,bk->ijk", v, d2a, v)
+    return _matrix_result(w, w_tangents, curvatures, [a]), vectors
+
+def eigvalsh(a, UPLO="L"):
+    """
+    Eigenvalues of a symmetric matrix depending on the variables, with their first and second derivatives (see eigh).
+
+            Parameters:
+                    a (VAD or RAD): the symmetric matrix, of shape (k, k)
+                    UPLO (str): the triangle of a that is read, as in np.linalg.eigvalsh
+
+            Returns:
+                    A VAD (or RAD) object with the eigenvalues in ascending order
+
+            Example:
+            >>> p = VAD([2.])
+            >>> eigvalsh(np.einsum("i,ab->ab", p, np.diag([1., 3.]))).der
+            array([[1.],
+                   [3.]])
+    """
+    return eigh(a, UPLO)[0]
+
+def svd(a, full_matrices=False, compute_uv=True, hermitian=False):
+    """
+    Thin singular value decomposition a = U diag(s) V^T of a matrix depending on the variables, from one decomposition.
+    With P = U^T da V and F_ij = 1 / (s_j^2 - s_i^2), the derivatives are ds = diag(P),
+    dU = U (F * (P S + S P^T)) + (I - U U^T) da V S^-1 and dV = V (F * (S P + P^T S)) + (I - V V^T) da^T U S^-1,
+    and the second derivatives of the singular values are u_k^T d2a_ij v_k + du_k,j^T da_i v_k + u_k^T da_i dv_k,j.
+    The singular vectors carry first derivatives only. A RAD object is differentiated in reverse mode instead.
+
+            Parameters:
+                    a (VAD or RAD): the matrix, of shape (r, c)
+                    full_matrices (bool): only the thin decomposition is supported for matrices that are not square
+                    compute_uv (bool): also return the singular vectors
+                    hermitian (bool): ignored, as for real matrices the decomposition is the same
+
+            Returns:
+                    A tuple (U, s, Vt) of VAD (or RAD) objects of shapes (r, k), (k,) and (k, c) with k = min(r, c),
+                    the singular values in descending order; only s if compute_uv is False
+
+            Raise:
+                    TypeError if a is not a VAD or RAD object, or if full matrices are requested for a matrix that is not square
+
+            Example:
+            >>> p = VAD([3., 1.])
+            >>> u, s, vt = svd(np.einsum("i,iab->ab", p, np.array([[[1., 0.], [0., 0.]], [[0., 0.], [0., 1.]]])))
+            >>> s.der
+            array([[1., 0.],
+                   [0., 1.]])
+    """
+    if not hasattr(a, "_svd"):
+        _check_matrix(a)
+    if full_matrices and np.shape(a.val)[0] != np.shape(a.val)[1]:
+        raise TypeError("Only the thin singular value decomposition (full_matrices=False) is supported.")
+    if hasattr(a, "_svd"):
+        # objects recording the operations, such as RAD objects, apply the reverse rules
+        u, s, vt = a._svd()
+        return (u, s, vt) if compute_uv else s
+    u, s, vt = np.linalg.svd(_value(a), full_matrices=False)
+    v = vt.T
+    da = _tangents(a)
+    proj = u.T @ da @ v
+    gaps = _gaps(s ** 2)
+    inv_s = 1. / s
+    u_tangents = u @ (gaps * (proj * s + s[:, None] * np.swapaxes(proj, 1, 2)))
+    u_tangents += (da @ v - u @ proj) * inv_s
+    v_tangents = v @ (gaps * (s[:, None] * proj + np.swapaxes(proj, 1, 2) * s))
+    v_tangents += (np.swapaxes(da, 1, 2) @ u - v @ np.swapaxes(proj, 1, 2)) * inv_s
+    s_tangents = np.einsum("ikk->ik", proj)
+    if not _second_order(a):
+        values = _matrix_result(s, s_tangents, None, [a])
+    else:
+        curvatures = np.einsum("jak,iab,bk->ijk", u_tangents, da, v) + np.einsum("ak,iab,jbk->ijk", u, da, v_tangents)
+        d2a = _curvatures(a)
+        if d2a is not _ZERO:
+            curvatures += np.einsum("ak,ijab,bk->ijk", u, d2a, v)
+        values = _matrix_result(s, s_tangents, curvatures, [a])
+    if not compute_uv:
+        return values
+    return (_matrix_result(u, u_tangents, None, [a]), values,
+            _matrix_result(vt, np.swapaxes(v_tangents, 1, 2), None, [a]))
+
+def _shape(a):
+    """np.shape of a VAD object: the shape of its values."""
+    return a.shape
+
+def _ndim(a):
+    """np.ndim of a VAD object: the number of dimensions of its values."""
+    return a.ndim
+
+def _size(a, axis=None):
+    """np.size of a VAD object: the number of its values, or their length along an axis."""
+    return np.size(a.val, axis)
+
+def _reshape(a, newshape, order="C"):
+    """np.reshape of a VAD object, in C order only, as VAD.reshape()."""
+    if order != "C":
+        raise TypeError("Only C order reshapes of VAD objects are supported.")
+    return a.reshape(newshape)
+
+def _transpose(a, axes=None):
+    """np.transpose of a VAD object, as VAD.transpose()."""
+    return a.transpose(axes)
+
+def _np_svd(a, full_matrices=True, compute_uv=True, hermitian=False):
+    """np.linalg.svd of a VAD object, with the defaults of NumPy: full matrices must be declined for matrices that are not square."""
+    return svd(a, full_matrices, compute_uv, hermitian)
+
+
+# NumPy functions with derivative rules for VAD objects (see VAD.__array_function__)
+_array_functions = {
+    np.shape: _shape,
+    np.ndim: _ndim,
+    np.size: _size,
+    np.reshape: _reshape,
+    np.transpose: _transpose,
+    np.sum: _sum,
+    np.mean: _mean,
+    np.prod: _prod,
+    np.dot: _dot,
+    np.einsum: _einsum,
+    np.linalg.norm: _norm,
+    np.linalg.solve: solve,
+    np.linalg.inv: inv,
+    np.linalg.det: det,
+    np.linalg.slogdet: slogdet,
+    np.linalg.cholesky: cholesky,
+    np.linalg.eigh: eigh,
+    np.linalg.eigvalsh: eigvalsh,
+    np.linalg.svd: _np_svd,
+}
@@ -4,6 +4,10 @@ import os
 from pkg_resources import get_distribution, DistributionNotFound
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from autodiffcst.AD_vec import *
+from autodiffcst.AD_rev import *
+from autodiffcst.AD_trace import *
+from autodiffcst.AD_sparse import *
+from autodiffcst.AD_tag import *
 
 
 try:
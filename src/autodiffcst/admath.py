@@ -1,467 +1,853 @@
-import math
-import numbers
-import os
-import sys
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-import numpy as np
-import sympy as sp
-from autodiffcst import AD
-# import autodiffcst.AD as AD
-
-
-def choose(n, k):
-    """
-    A helper function that gives the value of n choose k, according to math definition
-
-            Parameters:
-                    n, k: both natural numbers, invalid input cases handled by numpy
-            
-            Returns:
-                    the arithmetic value of n choose k, a scalar
-            
-            Example:
-            >>> choose(5,4)
-            5.0 
-    """
-    return np.math.factorial(n) / (np.math.factorial(k) * np.math.factorial(n - k))
-
-
-def chain_rule(ad, new_val, der, der2, higher_der=None):
-    """
-    Applies chain rule to returns a new AD object with correct value and derivatives.
-
-            Parameters:
-                    ad (AD): An AD object
-                    new_val (float): Value of the new AD object
-                    der (float): Derivative of the outer function in chain rule
-
-            Returns:
-                    new_ad (AD): a new AD object with correct value and derivatives
-
-            Example:
-            >>> import AD as AD
-            >>> x = AD.AD(2,order=5)
-            >>> newad = 5*x**3+2
-            >>> higherde = np.array([60,60,30,0,0])
-            >>> chain_rule(x, 42, 60, 60, higher_der=higherde)
-            AD(value: [42], derivatives: [60.])
-    """
-    new_der = der * ad.der
-    new_der2 = der * ad.der2 + der2 * np.matmul(np.array([ad.der]).T, np.array([ad.der]))
-    if ad.higher is None:
-        new_ad = AD.AD(new_val, tag=ad.tag, der=new_der, der2=new_der2)
-    else:
-        new_higher_der = np.array([0.0] * len(ad.higher))
-        new_higher_der[0] = new_der
-        new_higher_der[1] = new_der2
-        for i in range(2, len(ad.higher)):
-            n = i + 1
-            sum = 0
-            for k in range(1, n + 1):
-                sum += higher_der[k - 1] * sp.bell(n, k, ad.higher[0:n - k + 1])
-            new_higher_der[i] = sum
-        new_ad = AD.AD(new_val, tag=ad.tag, der=new_der, der2=new_der2, order=len(ad.higher))
-        new_ad.higher = new_higher_der
-
-    return new_ad
-
-
-def abs(ad):
-    """
-    Returns the new AD object after applying absolute value function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied absolute value function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying absolute value function
-
-            Example:
-            >>> x = AD.AD(-2,order=5) 
-            >>> abs(x)
-            AD(value: [2], derivatives: [-1.])
-    """
-    if isinstance(ad, AD.AD):
-        new_val = np.abs((ad.val))
-        der = np.array([0] * len(ad))
-        der2 = np.array([0] * len(ad))
-
-        def get_der(v):
-            if v > 0:
-                return 1
-            elif v < 0:
-                return -1
-            else:
-                raise Exception("Derivative undefined")
-
-        for i in range(0, len(ad.val)):
-            if isinstance(ad.val[i], numbers.Integral):
-                der[i] = get_der(ad.val[i])
-            else:
-                #print(type(ad.val[i]))
-                sub_der = np.array([get_der(v) for v in ad.val[i]])
-                der[i] = sub_der
-                der2[i] = np.array([0] * len(ad.val[i]))
-
-        if ad.higher is None:
-            return chain_rule(ad, new_val, der, der2)
-        else:
-            higher_der = np.array([0.0] * len(ad.higher))
-            higher_der[0] = der
-            return chain_rule(ad, new_val, der, der2, higher_der)
-    else:
-        try:
-            return np.abs(ad)
-        except:
-            raise TypeError("Your input is not valid.")
-
-
-def exp(ad):
-    """
-    Returns the new AD object after applying exponential function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied exponential function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying exponential function
-
-            Example:
-            >>> x = AD.AD(2,order=5)
-            >>> exp(x)
-            AD(value: [7.3890561], derivatives: [7.3890561])
-    """
-    if isinstance(ad, AD.AD):
-        new_val = np.exp(ad.val)
-        der = new_val
-        der2 = new_val
-        if ad.higher is None:
-            return chain_rule(ad, new_val, der, der2)
-        else:
-            higher_der = np.array([new_val] * len(ad.higher))
-            return chain_rule(ad, new_val, der, der2, higher_der)
-    else:
-        try:
-            return np.exp(ad)
-        except:
-            raise TypeError("Your input is not valid.")
-
-
-def fact_ad(x, n):
-    """
-    Returns x(x-1)(x-2)...(x-n+1), the product of n terms, factorial-like operation
-
-            Parameters:
-                    x, n: two scalars
-
-            Returns:
-                    x(x-1)(x-2)...(x-n+1): scalar
-
-            Example:
-            >>> fact_ad(5,4)
-            120
-    """
-    prod = 1
-    for i in range(n):
-        prod = prod * (x - i)
-    return prod
-
-
-def log(ad):  # consider different base?
-    """
-    Returns the new AD object after applying log(base e) function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied log(base e) function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying log(base e) function
-
-            Example:
-            >>> x = AD.AD(2,order=5)
-            >>> log(x)
-            AD(value: [0.69314718], derivatives: [0.5])
-    """
-    if isinstance(ad, AD.AD):
-        new_val = np.log(ad.val)
-        der = 1 / ad.val
-        der2 = -1 / ad.val ** 2
-        if ad.higher is None:
-            return chain_rule(ad, new_val, der, der2)
-        else:
-            # starting from the first derivative: x**-1
-            higher_der = np.array([0.0] * len(ad.higher))
-            higher_der[0] = der
-            higher_der[1] = der2
-            for i in range(2, len(ad.higher)):
-                n = i + 1
-                coef = fact_ad(-1, n - 1)
-                mainval = np.power(ad.val[0], float(-n))
-                # mainval = math.pow(ad.val[0], -n)
-                higher_der[i] = coef * mainval
-            return chain_rule(ad, new_val, der, der2, higher_der)
-    else:
-        try:
-            return np.log(ad)
-        except:
-            raise TypeError("Your input is not valid.")
-
-
-
-
-
-def sqrt(ad):
-    """
-    Returns the new AD object after applying square root function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied square root function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying square root function
-
-            Example:
-            >>> x = AD.AD(2,order=5)
-            >>> sqrt(x)
-            AD(value: [1.41421356], derivatives: [0.35355339])
-    """
-    return ad ** 0.5
-
-# trig
-def sin(ad):
-    """
-    Returns the new AD object after applying sine function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied sine function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying sine function
-
-            Example:
-            >>> x = AD.AD(2,order=5)
-            >>> sin(x)
-            AD(value: [0.90929743], derivatives: [-0.41614684])
-    """
-    if isinstance(ad, AD.AD):
-        new_val = sin(ad.val)
-        der = cos(ad.val)
-        der2 = -new_val
-        if ad.higher is None:
-            return chain_rule(ad, new_val, der, der2)
-        else:
-            higher_der = np.array([der, der2, -der, -der2] * int(np.ceil(len(ad.higher) / 4)))
-            higher_der = higher_der[0:len(ad.higher)]
-            return chain_rule(ad, new_val, der, der2, higher_der)
-    else:
-        try:
-            return np.sin(ad)
-        except:
-            raise TypeError("Your input is not valid.")
-
-
-def cos(ad):
-    """
-    Returns the new AD object after applying cosine function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied cosine function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying cosine function
-
-            Example:
-            >>> x = AD.AD(2,order=5)
-            >>> cos(x)
-            AD(value: [-0.41614684], derivatives: [-0.90929743])
-    """
-    if isinstance(ad, AD.AD):
-        new_val = cos(ad.val)
-        der = -sin(ad.val)
-        der2 = -cos(ad.val)
-        if ad.higher is None:
-            return chain_rule(ad, new_val, der, der2)
-        else:
-            higher_der = np.array([der, der2, -der, -der2] * int(np.ceil(len(ad.higher) / 4)))
-            higher_der = higher_der[0:len(ad.higher)]
-            return chain_rule(ad, new_val, der, der2, higher_der)
-    else:
-        try:
-            return np.cos(ad)
-        except:
-            raise TypeError("Your input is not valid.")
-
-
-def tan(ad):
-    """
-    Returns the new AD object after applying tangent function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied tangent function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying tangent function
-
-            Example:
-            >>> x = AD.AD(2,order=5)
-            >>> tan(x)
-            AD(value: [-2.18503986], derivatives: [5.7743992])
-    """
-    if isinstance(ad, AD.AD):
-        return sin(ad) / cos(ad)
-    else:
-        try:
-            return np.tan(ad)
-        except:
-            raise TypeError("Your input is not valid.")
-
-
-def sec(num):
-    """
-    Returns the new AD object after applying secant function.
-            Parameters:
-                    num: a number or array
-            Returns:
-                    the result after applying secant function
-
-            Example:
-            >>> sec(np.array([1,2,3]))
-            array([ 1.85081572, -2.40299796, -1.01010867])
-    """
-    try:
-        return 1 / np.cos(num)
-    except:
-        raise TypeError("sec function can only handle number or array.")
-
-
-# hyperbolic trig
-def sinh(ad):
-    """
-    Returns the new AD object after applying hyperbolic sine function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied hyperbolic sine function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying hyperbolic sine function
-
-            Example:
-            >>> x = AD.AD(2,order=5)
-            >>> sinh(x)
-            AD(value: [3.62686041], derivatives: [3.76219569])
-    """
-    if isinstance(ad, AD.AD):
-        new_val = sinh(ad.val)
-        der = cosh(ad.val)
-        der2 = sinh(ad.val)
-        if ad.higher is None:
-            return chain_rule(ad, new_val, der, der2)
-        else:
-            higher_der = np.array([der, der2, der, der2] * int(np.ceil(len(ad.higher) / 4)))
-            higher_der = higher_der[0:len(ad.higher)]
-            return chain_rule(ad, new_val, der, der2, higher_der)
-    else:
-        try:
-            return np.sinh(ad)
-        except:
-            raise TypeError("Your input is not valid.")
-
-
-def cosh(ad):
-    """
-    Returns the new AD object after applying hyperbolic cosine function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied hyperbolic cosine function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying hyperbolic cosine function
-
-            Example:
-            >>> x = AD.AD(2,order=5)
-            >>> cosh(x)
-            AD(value: [3.76219569], derivatives: [3.62686041])
-    """
-    if isinstance(ad, AD.AD):
-        new_val = cosh(ad.val)
-        der = sinh(ad.val)
-        der2 = new_val
-        if ad.higher is None:
-            return chain_rule(ad, new_val, der, der2)
-        else:
-            higher_der = np.array([der, der2, der, der2] * int(np.ceil(len(ad.higher) / 4)))
-            higher_der = higher_der[0:len(ad.higher)]
-            return chain_rule(ad, new_val, der, der2, higher_der)
-    else:
-        try:
-            return np.cosh(ad)
-        except:
-            raise TypeError("Your input is not valid.")
-
-
-def sech(ad):
-    """
-    Returns the new AD object after applying hyperbolic secant function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied hyperbolic secant function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying hyperbolic secant function
-
-            Example:
-            >>> sech(np.array([1,2,3]))
-            array([0.64805427, 0.26580223, 0.09932793])
-    """
-    try:
-        return 1 / np.cosh(ad)
-    except:
-        raise TypeError("sec function can only handle number or array.")
-
-
-def tanh(ad):
-    """
-    Returns the new AD object after applying hyperbolic tangent function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied hyperbolic tangent function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying hyperbolic tangent function
-
-            Example:
-            >>> x = AD.AD(2,order=5)
-            >>> tanh(x)
-            AD(value: [0.96402758], derivatives: [0.07065082])
-    """
-    if isinstance(ad, AD.AD):
-        return sinh(ad)/cosh(ad)
-    else:
-        try:
-            return np.tanh(ad)
-        except:
-            raise TypeError("Your input is not valid.")
-
-def sigmoid(ad):
-    """
-    Returns the new AD object after applying sigmoid function, a special case of the logistic function.
-
-            Parameters:
-                    ad (AD): An AD object to be applied sigmoid function on
-
-            Returns:
-                    new_ad (AD): the new AD object after applying sigmoid function
-
-            Example:
-            >>> x = AD.AD(2,order=5)
-            >>> sigmoid(x)
-            AD(value: [0.88079708], derivatives: [0.10499359])
-    """
-    if isinstance(ad, AD.AD):
-        return 1/(1+exp(-ad))
-    else:
-        try:
-            return 1/(1+np.exp(-ad))
-        except:
-            raise TypeError("Your input is not valid.")
\ No newline at end of file
+import math
+import operator
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+from autodiffcst import AD
+from autodiffcst import taylor
+# import autodiffcst.AD as AD
+
+
+def choose(n, k):
+    """
+    A helper function that gives the value of n choose k, according to math definition
+
+            Parameters:
+                    n, k: both natural numbers with k <= n
+            
+            Returns:
+                    the arithmetic value of n choose k, a scalar
+            
+            Example:
+            >>> choose(5,4)
+            5.0 
+    """
+    if k < 0 or k > n:
+        raise ValueError("n choose k needs 0 <= k <= n.")
+    return float(math.factorial(n) // (math.factorial(k) * math.factorial(n - k)))
+
+
+def _is_ad(obj):
+    """
+    A helper function that checks whether an object carries derivatives that the chain rule can propagate.
+
+            Parameters:
+                    obj: any object passed to an admath function
+
+            Returns:
+                    True if obj is an AD object or implements _chain_rule (e.g. a VAD object), False otherwise
+
+            Example:
+            >>> _is_ad(AD.AD(2, tag=0, size=1))
+            True
+            >>> _is_ad(2)
+            False
+    """
+    return isinstance(obj, AD.AD) or hasattr(obj, "_chain_rule")
+
+
+def chain_rule(ad, new_val, der, der2, higher_der=None):
+    """
+    Applies chain rule to returns a new AD object with correct value and derivatives.
+
+            Parameters:
+                    ad (AD): An AD object
+                    new_val (float): Value of the new AD object
+                    der (float): Derivative of the outer function in chain rule
+
+            Returns:
+                    new_ad (AD): a new AD object with correct value and derivatives
+
+            Example:
+            >>> import AD as AD
+            >>> x = AD.AD(2,order=5)
+            >>> newad = 5*x**3+2
+            >>> higherde = np.array([60,60,30,0,0])
+            >>> chain_rule(x, 42, 60, 60, higher_der=higherde)
+            AD(value: [42], derivatives: [60.])
+    """
+    if hasattr(ad, "_chain_rule"):
+        # VAD, RAD, SmallAD and the other representations apply the chain rule themselves
+        return ad._chain_rule(new_val, der, der2, higher_der)
+    new_der = der * ad.der
+    if ad.der2 is None:
+        # first-order mode, skip the second order terms
+        return AD.AD._new(new_val, ad.tag, new_der, None)
+    new_der2 = der * ad.der2 + der2 * np.matmul(np.array([ad.der]).T, np.array([ad.der]))
+    if ad.higher is None:
+        new_ad = AD.AD._new(new_val, ad.tag, new_der, new_der2)
+    else:
+        coeffs = taylor.compose(np.ravel(new_val)[0], higher_der, _coefficients(ad))
+        new_ad = _from_taylor(ad, coeffs)
+
+    return new_ad
+
+
+def _coefficients(ad):
+    """
+    A helper function that gives the Taylor coefficients of a univariate AD object with higher order derivatives.
+
+            Parameters:
+                    ad (AD): An AD object whose higher attribute is set
+
+            Returns:
+                    An np.array with the value and the derivatives of ad divided by k!
+
+            Example:
+            >>> _coefficients(AD.AD(2, order=3, size=1, tag=0))
+            array([2., 1., 0., 0.])
+    """
+    return taylor.coefficients(ad.val[0], ad.higher)
+
+
+def _from_taylor(ad, coeffs):
+    """
+    A helper function that builds the AD object with higher order derivatives given by its Taylor coefficients.
+
+            Parameters:
+                    ad (AD): the AD object the result is computed from, which gives the tag
+                    coeffs (np.array): the Taylor coefficients of the result
+
+            Returns:
+                    new_ad (AD): a new AD object with value, der, der2 and higher consistent with coeffs
+
+            Example:
+            >>> x = AD.AD(2, order=3, size=1, tag=0)
+            >>> _from_taylor(x, np.array([4., 4., 1., 0.]))
+            AD(value: [4.], derivatives: [4.])
+    """
+    higher = taylor.derivatives(coeffs)
+    return AD.AD._new(np.array([coeffs[0]]), ad.tag, np.array([higher[0]]), np.array([[higher[1]]]), higher=higher)
+
+
+def _abs_rule(val):
+    """
+    Value, first and second derivatives of the absolute value function, elementwise.
+
+            Parameters:
+                    val (np.array): the values the function is applied to
+
+            Returns:
+                    A tuple (new_val, der, der2) of np.arrays
+
+            Raise:
+                    Exception if any value is 0, where the derivative is undefined
+
+            Example:
+            >>> _abs_rule(np.array([-2.]))
+            (array([2.]), array([-1.]), array([0.]))
+    """
+    if np.any(val == 0):
+        raise Exception("Derivative undefined")
+    return np.abs(val), np.sign(val), np.zeros(np.shape(val))
+
+
+def _exp_rule(val):
+    """
+    Value, first and second derivatives of the exponential function, elementwise.
+
+            Parameters:
+                    val (np.array): the values the function is applied to
+
+            Returns:
+                    A tuple (new_val, der, der2) of np.arrays
+
+            Example:
+            >>> _exp_rule(np.array([0.]))
+            (array([1.]), array([1.]), array([1.]))
+    """
+    new_val = np.exp(val)
+    return new_val, new_val, new_val
+
+
+def _log_rule(val):
+    """
+    Value, first and second derivatives of the natural log function, elementwise.
+
+            Parameters:
+                    val (np.array): the values the function is applied to
+
+            Returns:
+                    A tuple (new_val, der, der2) of np.arrays
+
+            Example:
+            >>> _log_rule(np.array([1.]))
+            (array([0.]), array([1.]), array([-1.]))
+    """
+    return np.log(val), 1 / val, -1 / val ** 2
+
+
+def _sin_rule(val):
+    """
+    Value, first and second derivatives of the sine function, elementwise.
+
+            Parameters:
+                    val (np.array): the values the function is applied to
+
+            Returns:
+                    A tuple (new_val, der, der2) of np.arrays
+
+            Example:
+            >>> _sin_rule(np.array([0.]))
+            (array([0.]), array([1.]), array([-0.]))
+    """
+    new_val = np.sin(val)
+    return new_val, np.cos(val), -new_val
+
+
+def _cos_rule(val):
+    """
+    Value, first and second derivatives of the cosine function, elementwise.
+
+            Parameters:
+                    val (np.array): the values the function is applied to
+
+            Returns:
+                    A tuple (new_val, der, der2) of np.arrays
+
+            Example:
+            >>> _cos_rule(np.array([0.]))
+            (array([1.]), array([-0.]), array([-1.]))
+    """
+    new_val = np.cos(val)
+    return new_val, -np.sin(val), -new_val
+
+
+def _sinh_rule(val):
+    """
+    Value, first and second derivatives of the hyperbolic sine function, elementwise.
+
+            Parameters:
+                    val (np.array): the values the function is applied to
+
+            Returns:
+                    A tuple (new_val, der, der2) of np.arrays
+
+            Example:
+            >>> _sinh_rule(np.array([0.]))
+            (array([0.]), array([1.]), array([0.]))
+    """
+    new_val = np.sinh(val)
+    return new_val, np.cosh(val), new_val
+
+
+def _cosh_rule(val):
+    """
+    Value, first and second derivatives of the hyperbolic cosine function, elementwise.
+
+            Parameters:
+                    val (np.array): the values the function is applied to
+
+            Returns:
+                    A tuple (new_val, der, der2) of np.arrays
+
+            Example:
+            >>> _cosh_rule(np.array([0.]))
+            (array([1.]), array([0.]), array([1.]))
+    """
+    new_val = np.cosh(val)
+    return new_val, np.sinh(val), new_val
+
+
+def _tan_rule(val):
+    """
+    Value, first and second derivatives of the tangent function, elementwise.
+
+            Parameters:
+                    val (np.array): the values the function is applied to
+
+            Returns:
+                    A tuple (new_val, der, der2) of np.arrays
+
+            Example:
+            >>> _tan_rule(np.array([0.]))
+            (array([0.]), array([1.]), array([0.]))
+    """
+    new_val = np.tan(val)
+    der = 1 + new_val ** 2
+    return new_val, der, 2 * new_val * der
+
+
+def _tanh_rule(val):
+    """
+    Value, first and second derivatives of the hyperbolic tangent function, elementwise.
+
+            Parameters:
+                    val (np.array): the values the function is applied to
+
+            Returns:
+                    A tuple (new_val, der, der2) of np.arrays
+
+            Example:
+            >>> _tanh_rule(np.array([0.]))
+            (array([0.]), array([1.]), array([-0.]))
+    """
+    new_val = np.tanh(val)
+    der = 1 - new_val ** 2
+    return new_val, der, -2 * new_val * der
+
+
+def _sigmoid_rule(val):
+    """
+    Value, first and second derivatives of the sigmoid function, elementwise.
+
+            Parameters:
+                    val (np.array): the values the function is applied to
+
+            Returns:
+                    A tuple (new_val, der, der2) of np.arrays
+
+            Example:
+            >>> _sigmoid_rule(np.array([0.]))
+            (array([0.5]), array([0.25]), array([0.]))
+    """
+    new_val = 1 / (1 + np.exp(-val))
+    der = new_val * (1 - new_val)
+    return new_val, der, der * (1 - 2 * new_val)
+
+
+def _sqrt_rule(val):
+    """
+    Value, first and second derivatives of the square root function, elementwise.
+
+            Parameters:
+                    val (np.array): the values the function is applied to
+
+            Returns:
+                    A tuple (new_val, der, der2) of np.arrays
+
+            Example:
+            >>> _sqrt_rule(np.array([4.]))
+            (array([2.]), array([0.25]), array([-0.03125]))
+    """
+    new_val = np.sqrt(val)
+    der = 0.5 / new_val
+    return new_val, der, -0.5 * der / val
+
+
+# elementwise functions by name: value -> (value, first derivative, second derivative) of the function.
+# Besides the admath functions themselves, the table is used to replay traced functions (see AD_trace.py).
+_rules = {
+    "abs": _abs_rule,
+    "exp": _exp_rule,
+    "log": _log_rule,
+    "sin": _sin_rule,
+    "cos": _cos_rule,
+    "sinh": _sinh_rule,
+    "cosh": _cosh_rule,
+    "tan": _tan_rule,
+    "tanh": _tanh_rule,
+    "sigmoid": _sigmoid_rule,
+    "sqrt": _sqrt_rule,
+}
+
+
+def _apply(name, ad):
+    """
+    Apply the elementwise function of the given name to an object carrying derivatives.
+
+            Parameters:
+                    name (str): the name of the function in the _rules table
+                    ad (AD or VAD or RAD): the object the function is applied to
+
+            Returns:
+                    A new object of the same kind, with the value and derivatives of the function applied to ad
+
+            Example:
+            >>> x = AD.AD(0, tag=0, size=1)
+            >>> _apply("exp", x)
+            AD(value: [1.], derivatives: [1.])
+    """
+    if hasattr(ad, "_apply_rule"):
+        # objects recording the operations, such as traced functions, keep the name of the function
+        return ad._apply_rule(name)
+    new_val, der, der2 = _rules[name](ad.val)
+    return chain_rule(ad, new_val, der, der2)
+
+
+def abs(ad):
+    """
+    Returns the new AD object after applying absolute value function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied absolute value function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying absolute value function
+
+            Example:
+            >>> x = AD.AD(-2,order=5) 
+            >>> abs(x)
+            AD(value: [2], derivatives: [-1.])
+    """
+    if _is_ad(ad):
+        if ad.higher is None:
+            return _apply("abs", ad)
+        else:
+            new_val, der, der2 = _abs_rule(ad.val)
+            higher_der = np.array([0.0] * len(ad.higher))
+            higher_der[0] = der[0]
+            return chain_rule(ad, new_val, der, der2, higher_der)
+    else:
+        try:
+            return np.abs(ad)
+        except TypeError:
+            raise TypeError("Your input is not valid.")
+
+
+def exp(ad):
+    """
+    Returns the new AD object after applying exponential function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied exponential function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying exponential function
+
+            Example:
+            >>> x = AD.AD(2,order=5)
+            >>> exp(x)
+            AD(value: [7.3890561], derivatives: [7.3890561])
+    """
+    if _is_ad(ad):
+        if ad.higher is None:
+            return _apply("exp", ad)
+        else:
+            return _from_taylor(ad, taylor.exp(_coefficients(ad)))
+    else:
+        try:
+            return np.exp(ad)
+        except TypeError:
+            raise TypeError("Your input is not valid.")
+
+
+def fact_ad(x, n):
+    """
+    Returns x(x-1)(x-2)...(x-n+1), the product of n terms, factorial-like operation
+
+            Parameters:
+                    x, n: two scalars
+
+            Returns:
+                    x(x-1)(x-2)...(x-n+1): scalar
+
+            Example:
+            >>> fact_ad(5,4)
+            120
+    """
+    prod = 1
+    for i in range(n):
+        prod = prod * (x - i)
+    return prod
+
+
+def log(ad):  # consider different base?
+    """
+    Returns the new AD object after applying log(base e) function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied log(base e) function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying log(base e) function
+
+            Example:
+            >>> x = AD.AD(2,order=5)
+            >>> log(x)
+            AD(value: [0.69314718], derivatives: [0.5])
+    """
+    if _is_ad(ad):
+        if ad.higher is None:
+            return _apply("log", ad)
+        else:
+            return _from_taylor(ad, taylor.log(_coefficients(ad)))
+    else:
+        try:
+            return np.log(ad)
+        except TypeError:
+            raise TypeError("Your input is not valid.")
+
+
+
+
+
+def sqrt(ad):
+    """
+    Returns the new AD object after applying square root function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied square root function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying square root function
+
+            Example:
+            >>> x = AD.AD(2,order=5)
+            >>> sqrt(x)
+            AD(value: [1.41421356], derivatives: [0.35355339])
+    """
+    if _is_ad(ad) and ad.higher is None:
+        return _apply("sqrt", ad)
+    return ad ** 0.5
+
+# trig
+def sin(ad):
+    """
+    Returns the new AD object after applying sine function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied sine function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying sine function
+
+            Example:
+            >>> x = AD.AD(2,order=5)
+            >>> sin(x)
+            AD(value: [0.90929743], derivatives: [-0.41614684])
+    """
+    if _is_ad(ad):
+        if ad.higher is None:
+            return _apply("sin", ad)
+        else:
+            return _from_taylor(ad, taylor.sin_cos(_coefficients(ad))[0])
+    else:
+        try:
+            return np.sin(ad)
+        except TypeError:
+            raise TypeError("Your input is not valid.")
+
+
+def cos(ad):
+    """
+    Returns the new AD object after applying cosine function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied cosine function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying cosine function
+
+            Example:
+            >>> x = AD.AD(2,order=5)
+            >>> cos(x)
+            AD(value: [-0.41614684], derivatives: [-0.90929743])
+    """
+    if _is_ad(ad):
+        if ad.higher is None:
+            return _apply("cos", ad)
+        else:
+            return _from_taylor(ad, taylor.sin_cos(_coefficients(ad))[1])
+    else:
+        try:
+            return np.cos(ad)
+        except TypeError:
+            raise TypeError("Your input is not valid.")
+
+
+def tan(ad):
+    """
+    Returns the new AD object after applying tangent function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied tangent function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying tangent function
+
+            Example:
+            >>> x = AD.AD(2,order=5)
+            >>> tan(x)
+            AD(value: [-2.18503986], derivatives: [5.7743992])
+    """
+    if _is_ad(ad):
+        if ad.higher is None:
+            return _apply("tan", ad)
+        return sin(ad) / cos(ad)
+    else:
+        try:
+            return np.tan(ad)
+        except TypeError:
+            raise TypeError("Your input is not valid.")
+
+
+def sec(num):
+    """
+    Returns the new AD object after applying secant function.
+            Parameters:
+                    num: a number or array
+            Returns:
+                    the result after applying secant function
+
+            Example:
+            >>> sec(np.array([1,2,3]))
+            array([ 1.85081572, -2.40299796, -1.01010867])
+    """
+    try:
+        return 1 / np.cos(num)
+    except TypeError:
+        raise TypeError("sec function can only handle number or array.")
+
+
+# hyperbolic trig
+def sinh(ad):
+    """
+    Returns the new AD object after applying hyperbolic sine function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied hyperbolic sine function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying hyperbolic sine function
+
+            Example:
+            >>> x = AD.AD(2,order=5)
+            >>> sinh(x)
+            AD(value: [3.62686041], derivatives: [3.76219569])
+    """
+    if _is_ad(ad):
+        if ad.higher is None:
+            return _apply("sinh", ad)
+        else:
+            return _from_taylor(ad, taylor.sinh_cosh(_coefficients(ad))[0])
+    else:
+        try:
+            return np.sinh(ad)
+        except TypeError:
+            raise TypeError("Your input is not valid.")
+
+
+def cosh(ad):
+    """
+    Returns the new AD object after applying hyperbolic cosine function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied hyperbolic cosine function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying hyperbolic cosine function
+
+            Example:
+            >>> x = AD.AD(2,order=5)
+            >>> cosh(x)
+            AD(value: [3.76219569], derivatives: [3.62686041])
+    """
+    if _is_ad(ad):
+        if ad.higher is None:
+            return _apply("cosh", ad)
+        else:
+            return _from_taylor(ad, taylor.sinh_cosh(_coefficients(ad))[1])
+    else:
+        try:
+            return np.cosh(ad)
+        except TypeError:
+            raise TypeError("Your input is not valid.")
+
+
+def sech(ad):
+    """
+    Returns the new AD object after applying hyperbolic secant function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied hyperbolic secant function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying hyperbolic secant function
+
+            Example:
+            >>> sech(np.array([1,2,3]))
+            array([0.64805427, 0.26580223, 0.09932793])
+    """
+    try:
+        return 1 / np.cosh(ad)
+    except TypeError:
+        raise TypeError("sec function can only handle number or array.")
+
+
+def tanh(ad):
+    """
+    Returns the new AD object after applying hyperbolic tangent function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied hyperbolic tangent function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying hyperbolic tangent function
+
+            Example:
+            >>> x = AD.AD(2,order=5)
+            >>> tanh(x)
+            AD(value: [0.96402758], derivatives: [0.07065082])
+    """
+    if _is_ad(ad):
+        if ad.higher is None:
+            return _apply("tanh", ad)
+        return sinh(ad)/cosh(ad)
+    else:
+        try:
+            return np.tanh(ad)
+        except TypeError:
+            raise TypeError("Your input is not valid.")
+
+def sigmoid(ad):
+    """
+    Returns the new AD object after applying sigmoid function, a special case of the logistic function.
+
+            Parameters:
+                    ad (AD): An AD object to be applied sigmoid function on
+
+            Returns:
+                    new_ad (AD): the new AD object after applying sigmoid function
+
+            Example:
+            >>> x = AD.AD(2,order=5)
+            >>> sigmoid(x)
+            AD(value: [0.88079708], derivatives: [0.10499359])
+    """
+    if _is_ad(ad):
+        if ad.higher is None:
+            return _apply("sigmoid", ad)
+        return 1/(1+exp(-ad))
+    else:
+        try:
+            return 1/(1+np.exp(-ad))
+        except TypeError:
+            raise TypeError("Your input is not valid.")
+
+
+# NumPy ufuncs
+def _square(ad):
+    """Square of an object carrying derivatives, as a product."""
+    return ad * ad
+
+
+def _reciprocal(ad):
+    """Reciprocal of an object carrying derivatives."""
+    return 1. / ad
+
+
+def _exp2(ad):
+    """Power of 2 of an object carrying derivatives."""
+    return 2. ** ad
+
+
+def _log2(ad):
+    """Logarithm in base 2 of an object carrying derivatives."""
+    return log(ad) / np.log(2.)
+
+
+def _log10(ad):
+    """Logarithm in base 10 of an object carrying derivatives."""
+    return log(ad) / np.log(10.)
+
+
+# elementwise NumPy ufuncs, and the admath function applying their derivative rules
+_unary_ufuncs = {
+    np.negative: operator.neg,
+    np.absolute: abs,
+    np.fabs: abs,
+    np.exp: exp,
+    np.exp2: _exp2,
+    np.log: log,
+    np.log2: _log2,
+    np.log10: _log10,
+    np.sqrt: sqrt,
+    np.square: _square,
+    np.reciprocal: _reciprocal,
+    np.sin: sin,
+    np.cos: cos,
+    np.tan: tan,
+    np.sinh: sinh,
+    np.cosh: cosh,
+    np.tanh: tanh,
+}
+
+# binary NumPy ufuncs, and the operator methods applying them: the method of the left operand
+# and the reflected method of the right operand, used when only the right operand carries derivatives
+_binary_ufuncs = {
+    np.add: ("__add__", "__radd__"),
+    np.subtract: ("__sub__", "__rsub__"),
+    np.multiply: ("__mul__", "__rmul__"),
+    np.true_divide: ("__truediv__", "__rtruediv__"),
+    np.power: ("__pow__", "__rpow__"),
+    np.matmul: ("__matmul__", "__rmatmul__"),
+    np.equal: ("__eq__", "__eq__"),
+    np.not_equal: ("__ne__", "__ne__"),
+    np.less: ("__lt__", "__gt__"),
+    np.less_equal: ("__le__", "__ge__"),
+    np.greater: ("__gt__", "__lt__"),
+    np.greater_equal: ("__ge__", "__le__"),
+}
+
+
+def _broadcast_ad(left, right):
+    """
+    Turn an AD operand of a binary ufunc with a NumPy array into a VAD object of the shape of the array,
+    so that the operation is applied elementwise by the VAD operators: the value is broadcast to the array,
+    and the derivatives are repeated for each entry.
+
+            Parameters:
+                    left, right: the operands of the ufunc
+
+            Returns:
+                    The operands, with an AD object paired with an array of at least one dimension replaced by a VAD object
+
+            Example:
+            >>> x = AD.AD(2., tag=0, size=1)
+            >>> _broadcast_ad(np.ones(2), x)[1].der
+            array([[1.],
+                   [1.]])
+    """
+    from autodiffcst.AD_vec import VAD
+    for ad, other in ((left, right), (right, left)):
+        if isinstance(ad, AD.AD) and ad.higher is None and isinstance(other, np.ndarray) and other.ndim > 0:
+            shape = other.shape
+            der = np.broadcast_to(ad.der, shape + np.shape(ad.der)).copy()
+            der2 = None if ad.der2 is None else np.broadcast_to(ad.der2, shape + np.shape(ad.der2)).copy()
+            vad = VAD(np.broadcast_to(ad.val[0], shape).copy(), der, der2, order=1 if der2 is None else 2)
+            return (vad, right) if ad is left else (left, vad)
+    return left, right
+
+
+def _array_ufunc(ufunc, method, *inputs, **kwargs):
+    """
+    Apply a NumPy ufunc to objects carrying derivatives, such as AD and VAD objects.
+    This is their __array_ufunc__ protocol: np.sin(x), np.exp(x) * y or a + np.log(x) dispatch to the
+    vectorized derivative rules of admath and to the operators, so NumPy code is differentiated unchanged,
+    without object arrays. NumPy scalars are turned into Python numbers first.
+
+            Parameters:
+                    ufunc (np.ufunc): the ufunc called
+                    method (str): how the ufunc is called, only "__call__" is supported
+                    inputs: the operands, at least one of them carrying derivatives
+                    kwargs: keyword arguments of the ufunc, none are supported
+
+            Returns:
+                    The result of the ufunc, or NotImplemented for the ufuncs, methods (reduce, accumulate, ...)
+                    and keyword arguments (out, where, ...) that are not supported, so that NumPy raises a TypeError
+
+            Example:
+            >>> x = AD.AD(0., tag=0, size=1)
+            >>> np.exp(2 * np.sin(x))
+            AD(value: [1.], derivatives: [2.])
+    """
+    if method != "__call__" or kwargs:
+        return NotImplemented
+    inputs = [x.item() if isinstance(x, np.generic) or (isinstance(x, np.ndarray) and x.ndim == 0) else x
+              for x in inputs]
+    if ufunc in _unary_ufuncs and len(inputs) == 1:
+        return _unary_ufuncs[ufunc](inputs[0])
+    if ufunc in _binary_ufuncs and len(inputs) == 2:
+        left, right = _broadcast_ad(*inputs)
+        name, reflected = _binary_ufuncs[ufunc]
+        result = NotImplemented
+        if _is_ad(left) and hasattr(left, name):
+            result = getattr(left, name)(right)
+        if result is NotImplemented and _is_ad(right) and hasattr(right, reflected):
+            # as in Python, the right operand handles the operation when the left one does not
+            result = getattr(right, reflected)(left)
+        return result
+    return NotImplemented
@@ -0,0 +1,282 @@
+import functools
+import numpy as np
+
+# Truncated Taylor arithmetic for the univariate higher order derivatives (AD.higher).
+# A function u of one variable is represented by its Taylor coefficients c[k] = u^(k) / k!, k = 0..K,
+# so that compositions and elementary functions become numeric recurrences on coefficient arrays.
+
+
+@functools.lru_cache(maxsize=None)
+def factorials(K):
+    """
+    Return the table of factorials 0!, 1!, ..., K! as floats. The table is computed once for each K.
+
+            Parameters:
+                    K (int): the highest order
+
+            Returns:
+                    A read-only np.array of length K + 1
+
+            Example:
+            >>> factorials(4)
+            array([ 1.,  1.,  2.,  6., 24.])
+    """
+    table = np.concatenate(([1.], np.cumprod(np.arange(1., K + 1))))
+    table.flags.writeable = False
+    return table
+
+
+def coefficients(val, higher):
+    """
+    Turn the value and the derivatives of a univariate function into its Taylor coefficients.
+
+            Parameters:
+                    val (float): the value u(x)
+                    higher (np.array): the derivatives u'(x), u''(x), ..., u^(K)(x)
+
+            Returns:
+                    An np.array of length K + 1 with the Taylor coefficients u^(k)(x) / k!
+
+            Example:
+            >>> coefficients(1., np.array([1., 1., 1.]))
+            array([1.        , 1.        , 0.5       , 0.16666667])
+    """
+    K = len(higher)
+    coeffs = np.empty(K + 1)
+    coeffs[0] = val
+    coeffs[1:] = np.asarray(higher, dtype=float) / factorials(K)[1:]
+    return coeffs
+
+
+def derivatives(coeffs):
+    """
+    Turn Taylor coefficients back into derivatives, the inverse of coefficients().
+
+            Parameters:
+                    coeffs (np.array): Taylor coefficients of length K + 1
+
+            Returns:
+                    An np.array of length K with the derivatives of order 1 to K
+
+            Example:
+            >>> derivatives(np.array([1., 1., 0.5, 1. / 6]))
+            array([1., 1., 1.])
+    """
+    return coeffs[1:] * factorials(len(coeffs) - 1)[1:]
+
+
+def compose(new_val, higher_der, coeffs):
+    """
+    Taylor coefficients of g(u) from the derivatives of the outer function g at u(x) and the coefficients of u.
+    This is the general chain rule (Faa di Bruno's formula), evaluated by Horner's scheme on the series of u - u(x).
+    Elementary functions with a known differential equation have faster recurrences below.
+
+            Parameters:
+                    new_val (float): the value g(u(x))
+                    higher_der (np.array): the derivatives g'(u(x)), ..., g^(K)(u(x))
+                    coeffs (np.array): the Taylor coefficients of u, of length K + 1
+
+            Returns:
+                    An np.array with the Taylor coefficients of g(u)
+
+            Example:
+            >>> compose(1., np.array([1., 1., 1.]), np.array([0., 1., 0., 0.]))
+            array([1.        , 1.        , 0.5       , 0.16666667])
+    """
+    K = len(coeffs) - 1
+    outer = np.empty(K + 1)
+    outer[0] = new_val
+    outer[1:] = np.asarray(higher_der[:K], dtype=float) / factorials(K)[1:]
+    shift = np.array(coeffs, dtype=float)
+    shift[0] = 0.
+    result = np.zeros(K + 1)
+    result[0] = outer[K]
+    for k in range(K - 1, -1, -1):
+        result = np.convolve(result, shift)[:K + 1]
+        result[0] += outer[k]
+    return result
+
+
+def exp(coeffs):
+    """
+    Taylor coefficients of exp(u), from e' = u' e, in O(K^2).
+
+            Parameters:
+                    coeffs (np.array): the Taylor coefficients of u
+
+            Returns:
+                    An np.array with the Taylor coefficients of exp(u)
+
+            Example:
+            >>> exp(np.array([0., 1., 0., 0.]))
+            array([1.        , 1.        , 0.5       , 0.16666667])
+    """
+    K = len(coeffs) - 1
+    weighted = np.arange(K + 1) * coeffs
+    result = np.empty(K + 1)
+    result[0] = np.exp(coeffs[0])
+    for k in range(1, K + 1):
+        result[k] = np.dot(weighted[1:k + 1], result[k - 1::-1]) / k
+    return result
+
+
+def log(coeffs):
+    """
+    Taylor coefficients of log(u), from u l' = u', in O(K^2).
+
+            Parameters:
+                    coeffs (np.array): the Taylor coefficients of u
+
+            Returns:
+                    An np.array with the Taylor coefficients of log(u)
+
+            Example:
+            >>> log(np.array([1., 1., 0., 0.]))
+            array([ 0.        ,  1.        , -0.5       ,  0.33333333])
+    """
+    K = len(coeffs) - 1
+    result = np.empty(K + 1)
+    weighted = np.zeros(K + 1)
+    result[0] = np.log(coeffs[0])
+    for k in range(1, K + 1):
+        result[k] = (coeffs[k] - np.dot(weighted[1:k], coeffs[k - 1:0:-1]) / k) / coeffs[0]
+        weighted[k] = k * result[k]
+    return result
+
+
+def sin_cos(coeffs):
+    """
+    Taylor coefficients of sin(u) and cos(u) together, from s' = u' c and c' = -u' s, in O(K^2).
+
+            Parameters:
+                    coeffs (np.array): the Taylor coefficients of u
+
+            Returns:
+                    A tuple of np.arrays with the Taylor coefficients of sin(u) and cos(u)
+
+            Example:
+            >>> sin_cos(np.array([0., 1., 0., 0.]))[0]
+            array([ 0.        ,  1.        ,  0.        , -0.16666667])
+    """
+    K = len(coeffs) - 1
+    weighted = np.arange(K + 1) * coeffs
+    s, c = np.empty(K + 1), np.empty(K + 1)
+    s[0], c[0] = np.sin(coeffs[0]), np.cos(coeffs[0])
+    for k in range(1, K + 1):
+        s[k] = np.dot(weighted[1:k + 1], c[k - 1::-1]) / k
+        c[k] = -np.dot(weighted[1:k + 1], s[k - 1::-1]) / k
+    return s, c
+
+
+def sinh_cosh(coeffs):
+    """
+    Taylor coefficients of sinh(u) and cosh(u) together, from s' = u' c and c' = u' s, in O(K^2).
+
+            Parameters:
+                    coeffs (np.array): the Taylor coefficients of u
+
+            Returns:
+                    A tuple of np.arrays with the Taylor coefficients of sinh(u) and cosh(u)
+
+            Example:
+            >>> sinh_cosh(np.array([0., 1., 0., 0.]))[0]
+            array([0.        , 1.        , 0.        , 0.16666667])
+    """
+    K = len(coeffs) - 1
+    weighted = np.arange(K + 1) * coeffs
+    s, c = np.empty(K + 1), np.empty(K + 1)
+    s[0], c[0] = np.sinh(coeffs[0]), np.cosh(coeffs[0])
+    for k in range(1, K + 1):
+        s[k] = np.dot(weighted[1:k + 1], c[k - 1::-1]) / k
+        c[k] = np.dot(weighted[1:k + 1], s[k - 1::-1]) / k
+    return s, c
+
+
+def mul(a, b):
+    """
+    Taylor coefficients of the product u * w, the truncated Cauchy product of the coefficients.
+    On Taylor coefficients the binomial weights of the Leibniz rule are absorbed by the factorials,
+    so the product is a single convolution.
+
+            Parameters:
+                    a (np.array): the Taylor coefficients of u
+                    b (np.array): the Taylor coefficients of w
+
+            Returns:
+                    An np.array with the Taylor coefficients of u * w, truncated to the shorter input
+
+            Example:
+            >>> mul(np.array([1., 1., 0.]), np.array([1., 1., 0.]))
+            array([1., 2., 1.])
+    """
+    K = min(len(a), len(b)) - 1
+    return np.convolve(a[:K + 1], b[:K + 1])[:K + 1]
+
+
+def recip(coeffs):
+    """
+    Taylor coefficients of 1 / u, from u r = 1, in O(K^2).
+
+            Parameters:
+                    coeffs (np.array): the Taylor coefficients of u, with u(x) != 0
+
+            Returns:
+                    An np.array with the Taylor coefficients of 1 / u
+
+            Example:
+            >>> recip(np.array([1., -1., 0., 0.]))
+            array([1., 1., 1., 1.])
+    """
+    return div(np.eye(1, len(coeffs))[0], coeffs)
+
+
+def div(a, b):
+    """
+    Taylor coefficients of the quotient u / w, from w q = u, in O(K^2).
+
+            Parameters:
+                    a (np.array): the Taylor coefficients of u
+                    b (np.array): the Taylor coefficients of w, with w(x) != 0
+
+            Returns:
+                    An np.array with the Taylor coefficients of u / w, truncated to the shorter input
+
+            Example:
+            >>> div(np.array([1., 2., 1.]), np.array([1., 1., 0.]))
+            array([1., 1., 0.])
+    """
+    K = min(len(a), len(b)) - 1
+    result = np.empty(K + 1)
+    result[0] = a[0] / b[0]
+    for k in range(1, K + 1):
+        result[k] = (a[k] - np.dot(b[1:k + 1], result[k - 1::-1])) / b[0]
+    return result
+
+
+def pow(coeffs, p):
+    """
+    Taylor coefficients of u ** p for a real constant p, from u q' = p u' q, in O(K^2).
+
+            Parameters:
+                    coeffs (np.array): the Taylor coefficients of u, with u(x) != 0
+                    p (int or float): the power
+
+            Returns:
+                    An np.array with the Taylor coefficients of u ** p
+
+            Raise:
+                    ValueError if u(x) = 0
+
+            Example:
+            >>> pow(np.array([1., 1., 0., 0.]), 0.5)
+            array([ 1.    ,  0.5   , -0.125 ,  0.0625])
+    """
+    K = len(coeffs) - 1
+    if coeffs[0] == 0:
+        raise ValueError("Derivative is undefined.")
+    result = np.empty(K + 1)
+    result[0] = np.power(coeffs[0], float(p))
+    for k in range(1, K + 1):
+        j = np.arange(1, k + 1)
+        result[k] = np.dot((p * j - (k - j)) * coeffs[1:k + 1], result[k - 1::-1]) / (k * coeffs[0])
+    return result
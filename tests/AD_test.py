@@ -430,4 +430,339 @@ def test_VAD_op_hw():
     assert np.allclose(x.val,np.array([1,1])), 'Error: wrong itruediv VAD'
     x = VAD(val = [2,2])
     f = x**2
-    assert np.allclose(f.val,np.array([4,4])), 'Error: wrong pow VAD'
\ No newline at end of file
+    assert np.allclose(f.val,np.array([4,4])), 'Error: wrong pow VAD'
+def test_VAD_vectorized():
+    v = VAD([1., 2., 3.])
+    f = v * v[0] + sin(v) / v - 2 ** v
+    [x, y, z] = VAD([1., 2., 3.])
+    g = set_VAD(np.array([x*x + sin(x)/x - 2**x, y*x + sin(y)/y - 2**y, z*x + sin(z)/z - 2**z]))
+    assert f.fullequal(g), "Error: vectorized VAD operations disagree with AD operations."
+    assert v.der.shape == (3, 3) and f.der2.shape == (3, 3, 3), "Error: VAD arrays have wrong shapes."
+    h = v[1:] * v[:2]
+    assert np.allclose(h.val, np.array([2., 6.])), "Error: VAD slicing is wrong."
+    assert np.allclose(h.der, np.array([[2., 1., 0.], [0., 3., 2.]])), "Error: VAD slicing is wrong."
+    assert np.allclose(h.der2[1], np.array([[0., 0., 0.], [0., 0., 1.], [0., 1., 0.]])), "Error: VAD slicing is wrong."
+    with pytest.raises(TypeError):
+        v + 'a'
+
+def test_VAD_setitem():
+    v = VAD([1, 2])
+    v[0] = v[0] * 3
+    assert np.allclose(v.val, np.array([3, 2])), "Error: VAD setitem is wrong."
+    assert np.allclose(v.der, np.array([[3., 0.], [0., 1.]])), "Error: VAD setitem is wrong."
+
+def test_first_order_mode():
+    v = VAD([1., 2., 3.], order=1)
+    assert v.der2 is None, "Error: order 1 VAD should not allocate der2."
+    f = exp(v) * v[0] / (v + 1) - v ** 2
+    g = exp(VAD([1., 2., 3.])) * VAD([1., 2., 3.])[0] / (VAD([1., 2., 3.]) + 1) - VAD([1., 2., 3.]) ** 2
+    assert f.der2 is None and f.order == 1, "Error: order 1 VAD should not propagate der2."
+    assert np.allclose(f.val, g.val) and np.allclose(jacobian(f), jacobian(g)), "Error: order 1 VAD derivatives are wrong."
+    [x, y] = VAD([3., 1.], order=1)
+    h = sin(x * y) + x / y
+    assert h.der2 is None, "Error: order 1 AD should not propagate der2."
+    assert np.allclose(h.der, np.array([np.cos(3.) + 1., 3 * np.cos(3.) - 3.])), "Error: order 1 AD derivatives are wrong."
+    with pytest.raises(ValueError):
+        hessian(h)
+    with pytest.raises(ValueError):
+        h.diff([0, 1], order=2)
+    with pytest.raises(ValueError):
+        f.diff([0, 1], order=2)
+
+
+def test_jvp():
+    def f(x):
+        return [x[0] * sin(x[1]) + exp(x[2]) / x[0], log(x[1]) * x[2] ** 3]
+    point = [1.3, 0.4, -0.7]
+    v = np.array([0.5, -1., 2.])
+    full = f(VAD(point))
+    val, jv = jvp(f, point, v)
+    assert np.allclose(val, [full[0].val[0], full[1].val[0]]), "Error: jvp values are wrong."
+    assert np.allclose(jv, jacobian(full) @ v), "Error: jvp is wrong."
+    val, jv, vhv = jvp(f, point, v, order=2)
+    assert np.allclose(vhv, [v @ hessian(func) @ v for func in full]), "Error: second order jvp is wrong."
+    val, jv = jvp(lambda x: x * x[0] + 1, [1., 2.], [1., 0.])
+    assert np.allclose(val, [2., 3.]) and np.allclose(jv, [2., 2.]), "Error: jvp of a VAD function is wrong."
+    with pytest.raises(ValueError):
+        jvp(f, point, v, order=3)
+    with pytest.raises(TypeError):
+        jvp(lambda x: [x[0], 1.], point, v)
+
+
+def test_batch():
+    points = np.array([[0.5, 1.2], [1.5, -0.3], [2., 0.7], [-1., 3.]])
+    x, y = batch(points)
+    f = x * sin(y) + exp(x / y) - y ** 3 + 2 ** x
+    assert f.val.shape == (4,) and f.der.shape == (4, 2) and f.der2.shape == (4, 2, 2), "Error: wrong batched shapes."
+    for b, point in enumerate(points):
+        [u, v] = VAD(point)
+        g = u * sin(v) + exp(u / v) - v ** 3 + 2 ** u
+        assert np.allclose(f.val[b], g.val) and np.allclose(f.der[b], g.der) and np.allclose(f.der2[b], g.der2), \
+            "Error: batched derivatives differ from a single point."
+    import tracemalloc
+    B, n = 10 ** 5, 4
+    many = np.random.default_rng(0).uniform(1., 2., (B, n))
+    tracemalloc.start()
+    u = batch(many)[0]
+    h = sin(u) * u + exp(u) / u
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # dense seeds took n * B * n * n floats, before any operation
+    assert h._der is None and peak < n * B * n * n * 8 / 2, "Error: batched functions of one variable should stay diagonal."
+    assert np.allclose(h.der[:, 1:], 0.) and np.allclose(h.der2[:, 0, 0], (sin(u) * u + exp(u) / u).der2[:, 0, 0]), \
+        "Error: diagonal batched derivatives are wrong."
+    [z] = batch([1., 2., 3.], order=1)
+    h = log(z) * z
+    assert h.der2 is None and np.allclose(h.der[:, 0], np.log([1., 2., 3.]) + 1), "Error: batched order 1 is wrong."
+    with pytest.raises(ValueError):
+        batch(points, order=3)
+    with pytest.raises(ValueError):
+        batch(np.ones((2, 2, 2)))
+
+
+def test_packed_der2():
+    x = np.array([0.3, 0.8, 1.2, 0.5])
+    def f(v):
+        return sin(v * v[0]) / (1 + v ** 2) + exp(v[1:2]) * v - 2 ** v + v * 3 - v[3] + log(v)
+    full, packed = f(VAD(x)), f(VAD(x, packed=True))
+    assert packed.packed and packed.der2.shape == (4, 10), "Error: der2 should be packed."
+    assert np.allclose(unpack(packed.der2, 4), full.der2), "Error: packed second derivatives are wrong."
+    assert np.allclose(pack(full.der2), packed.der2), "Error: pack is not the inverse of unpack."
+    assert np.allclose(hessian(packed[2]), full.der2[2]), "Error: indexing should unpack the Hessian."
+    assert np.allclose(packed.diff([3, 1], 2), full.diff([1, 3], 2)), "Error: diff on packed derivatives is wrong."
+    mixed = packed + full * packed[0]
+    assert mixed.packed and np.allclose(unpack(mixed.der2, 4), (full + full * full[0]).der2), "Error: mixed layouts."
+    assert VAD(x, order=1, packed=True).packed is False, "Error: order 1 has nothing to pack."
+
+
+def test_lazy_seeds():
+    n = 2000
+    v = VAD(np.arange(1., n + 1))
+    x, y = v[3], v[10:12]
+    assert v._der is None and y._der is None, "Error: indexing should not form the seeds."
+    assert np.array_equal(np.nonzero(x.der)[0], [3]) and not x.der2.any(), "Error: wrong seed for one variable."
+    assert np.array_equal(np.nonzero(y.der)[1], [10, 11]) and y.der2.shape == (2, n, n), "Error: wrong sliced seeds."
+    f = sin(y) * 2 + y * y[0]
+    full = VAD([11., 12.])
+    g = sin(full) * 2 + full * full[0]
+    assert np.allclose(f.der[:, 10:12], g.der) and np.allclose(f.der2[:, 10:12, 10:12], g.der2), \
+        "Error: derivatives of lazy seeds are wrong."
+    assert VAD([1., 2.], order=1).der2 is None, "Error: order 1 should not form second derivatives."
+    for packed in (False, True):
+        seeds = VAD([0.5, 0.9, 0.4], packed=packed)
+        h = seeds * np.array([1., 2., 3.]) - log(seeds[1])
+        assert np.shape(h.der2) == ((3, 6) if packed else (3, 3, 3)), "Error: an AD operand should add to every value."
+        assert np.allclose(unpack(h.der2, 3)[2] if packed else h.der2[2], (3 * seeds[2] - log(seeds[1])).der2), \
+            "Error: second derivatives of a lazy seed and an AD object are wrong."
+
+
+def test_AD_compact():
+    x = ad.AD(2., tag=0, size=3)
+    assert not hasattr(x, "__dict__"), "Error: AD objects should be slotted."
+    with pytest.raises(AttributeError):
+        x.unknown = 1
+    y = ad.AD._new(np.array([2.]), np.array([0]), x.der, x.der2)
+    assert y.fullequal(x) and y.size == 3 and y.order == 2 and y.higher is None, "Error: _new differs from AD()."
+    z = ad.AD(1., tag=2, size=3, order=1) * x + x
+    assert np.array_equal(z.tag, [0, 2]) and z.order == 1 and z.der2 is None, "Error: wrong tags or order."
+    assert np.array_equal(ad._merge_tags(np.arange(40), np.array([3, 50])), np.append(np.arange(40), 50)), \
+        "Error: wrong merge of many tags."
+
+
+def test_diagonal_jacobian():
+    val = np.linspace(0.2, 1.4, 6)
+    x = VAD(val)
+    f = tanh(sin(x) * x + 2) ** 2 / x - 3 * x
+    assert f._der is None, "Error: elementwise functions should keep the Jacobian diagonal."
+    full = VAD(val)
+    full.der
+    g = tanh(sin(full) * full + 2) ** 2 / full - 3 * full
+    data, rows, cols = jacobian(f, structured=True)
+    assert np.array_equal(rows, np.arange(6)) and np.array_equal(cols, np.arange(6)), "Error: wrong diagonal positions."
+    assert np.allclose(data, np.diag(g.der)), "Error: wrong diagonal Jacobian."
+    assert np.allclose(f.diff(2), g.diff(2)) and np.allclose(f.diff([2, 2], 2), g.diff([2, 2], 2)), "Error: diff of a diagonal VAD is wrong."
+    assert f[1:3]._der is None and np.allclose(f[4].der2, g[4].der2), "Error: indexing a diagonal VAD is wrong."
+    assert np.allclose(f.der, g.der) and np.allclose(f.der2, g.der2), "Error: formed diagonal derivatives are wrong."
+    h = f + f[0]
+    assert np.allclose(h.der, g.der + g.der[0]), "Error: mixing the variables of a diagonal VAD is wrong."
+    p = sin(VAD(val, packed=True)) * 2
+    assert np.allclose(unpack(p.der2, 6), (sin(full) * 2).der2), "Error: packed diagonal derivatives are wrong."
+    mixed = g[0:2] * g[2]
+    data, rows, cols = jacobian(mixed, structured=True)
+    dense = np.zeros((2, 6))
+    dense[rows, cols] = data
+    assert np.allclose(dense, mixed.der), "Error: structured dense Jacobian is wrong."
+
+
+def test_array_function():
+    val = np.array([0.3, -1.2, 0.0, 2.0, 0.7])
+    A = np.arange(15.).reshape(3, 5) / 7
+    w = np.linspace(1., 2., 5)
+    for packed in (False, True):
+        x = VAD(val, packed=packed)
+        y = x * x + sin(x)
+        terms = list(y)
+        total, weighted, product = terms[0], terms[0] * w[0], terms[0]
+        for i in range(1, 5):
+            total, weighted, product = total + terms[i], weighted + terms[i] * w[i], product * terms[i]
+        for f, g in [(np.sum(y), total), (np.mean(y), total * 0.2), (np.prod(y), product), (np.dot(y, w), weighted),
+                     (np.einsum("i,i->", w, y), weighted), (np.linalg.norm(y), np.dot(y, y) ** 0.5)]:
+            assert isinstance(f, ad.AD) and f.fullequal(g), "Error: reduction of a VAD object is wrong."
+        rows = A @ y
+        assert isinstance(rows, VAD) and np.allclose((y @ A.T).der, rows.der), "Error: matrix products of a VAD object are wrong."
+        der2 = unpack(rows.der2, 5) if packed else rows.der2
+        assert np.allclose(der2[1], (np.dot(A[1], y)).der2), "Error: second derivatives of a matrix product are wrong."
+    z = VAD(val)
+    p = np.prod(z)
+    assert np.allclose(p.der, [0., 0., 0.3 * -1.2 * 2. * 0.7, 0., 0.]), "Error: derivatives of a product with a zero are wrong."
+    assert np.allclose(np.dot(z, np.exp(z)).der, np.exp(val) * (1 + val)), "Error: dot of two VAD objects is wrong."
+    assert np.shape(z) == (5,) and np.ndim(z) == 1 and np.size(z) == 5, "Error: shape of a VAD object is wrong."
+    for unhandled in (lambda: np.concatenate([z, z]), lambda: np.cumsum(z), lambda: np.outer(z, z),
+                      lambda: np.where(val > 0, z, 0.), lambda: np.vdot(z, z), lambda: np.std(z)):
+        # no silent fallback to object arrays of AD objects
+        with pytest.raises(TypeError):
+            unhandled()
+    with pytest.raises(TypeError):
+        np.sum(z, axis=1)
+    with pytest.raises(TypeError):
+        np.linalg.norm(z, ord=3)
+
+
+def test_linalg():
+    rng = np.random.default_rng(0)
+    k = 4
+    basis = rng.normal(size=(3, k, k))
+    basis = basis + np.swapaxes(basis, 1, 2)
+    coef = rng.normal(size=(3, k))
+
+    def build(p, packed=False):
+        x = VAD(p, packed=packed)
+        return 5 * np.eye(k) + 0.1 * np.einsum("i,iab->ab", x * x + x, basis), np.einsum("i,ia->a", sin(x), coef)
+
+    funcs = [lambda a, b: solve(a, b), lambda a, b: np.linalg.solve(a, np.ones(k)), lambda a, b: np.linalg.inv(a),
+             lambda a, b: np.linalg.det(a), lambda a, b: np.linalg.slogdet(a)[1], lambda a, b: np.linalg.cholesky(a)]
+    p, h = np.array([0.3, -0.5, 0.8]), 1e-5
+    for f in funcs:
+        for packed in (False, True):
+            out = f(*build(p, packed))
+            der2 = unpack(out.der2, 3) if packed and isinstance(out, VAD) else out.der2
+            for i in range(3):
+                step = np.eye(3)[i] * h
+                up, down = f(*build(p + step)), f(*build(p - step))
+                assert np.allclose(np.take(out.der, i, axis=-1), (up.val - down.val) / (2 * h), atol=1e-6), \
+                    "Error: first derivatives of a linear algebra function are wrong."
+                assert np.allclose(np.take(der2, i, axis=-1), (up.der - down.der) / (2 * h), atol=1e-5), \
+                    "Error: second derivatives of a linear algebra function are wrong."
+    a, b = build(p)
+    assert np.allclose(np.linalg.solve(a.val, b).der, np.linalg.solve(a.val, b.der)), "Error: solve with a constant matrix is wrong."
+    assert np.isclose(det(a).val[0], np.linalg.det(a.val)) and np.allclose(inv(a).val @ a.val, np.eye(k)), \
+        "Error: values of linear algebra functions are wrong."
+    with pytest.raises(TypeError):
+        inv(a.val)
+    with pytest.raises(np.linalg.LinAlgError):
+        cholesky(-a)
+
+
+def test_decompositions():
+    rng = np.random.default_rng(1)
+    basis = {(4, 4): rng.normal(size=(3, 4, 4)), (5, 3): rng.normal(size=(3, 5, 3))}
+    basis[(4, 4)] = basis[(4, 4)] + np.swapaxes(basis[(4, 4)], 1, 2)
+    shift = {(4, 4): np.diag([1., 2., 4., 7.]), (5, 3): rng.normal(size=(5, 3))}
+
+    def build(p, shape, packed=False):
+        x = VAD(p, packed=packed)
+        return shift[shape] + np.einsum("i,iab->ab", x * x + x, basis[shape])
+
+    funcs = [(lambda a: np.linalg.eigh(a)[0], (4, 4)), (lambda a: eigh(a)[1], (4, 4)), (np.linalg.eigvalsh, (4, 4)),
+             (lambda a: svd(a)[0], (5, 3)), (lambda a: np.linalg.svd(a, full_matrices=False)[1], (5, 3)),
+             (lambda a: svd(a)[2], (5, 3))]
+    p, h = np.array([0.1, -0.2, 0.15]), 1e-6
+    for f, shape in funcs:
+        for packed in (False, True):
+            out = f(build(p, shape, packed))
+            for i in range(3):
+                step = np.eye(3)[i] * h
+                up, down = f(build(p + step, shape)), f(build(p - step, shape))
+                assert np.allclose(out.der[..., i], (up.val - down.val) / (2 * h), atol=1e-5), \
+                    "Error: first derivatives of a decomposition are wrong."
+                if out.der2 is not None:
+                    der2 = unpack(out.der2, 3) if packed else out.der2
+                    assert np.allclose(der2[..., i], (up.der - down.der) / (2 * h), atol=1e-4), \
+                        "Error: second derivatives of eigenvalues or singular values are wrong."
+    a = build(p, (4, 4))
+    w, v = eigh(a)
+    assert np.allclose(v.val @ np.diag(w.val) @ v.val.T, a.val) and v.der2 is None, "Error: eigh is wrong."
+    assert np.allclose(svd(a, compute_uv=False).val, np.linalg.svd(a.val, compute_uv=False)), "Error: singular values are wrong."
+    with pytest.raises(TypeError):
+        np.linalg.svd(build(p, (5, 3)))
+    with pytest.raises(TypeError):
+        eigh(a.val)
+
+def test_array_inputs():
+    W0 = np.arange(1., 7.).reshape(2, 3)
+    for packed in (False, True):
+        W = VAD(W0, packed=packed)
+        assert W.shape == (2, 3) and W.der.shape == (2, 3, 6), "Error: the variables of a matrix are wrong."
+        f = W.T @ W
+        J = jacobian(f, wrt=W)
+        assert J.shape == (3, 3, 2, 3) and np.shares_memory(J, f.der), "Error: jacobian with wrt is wrong."
+        for idx in np.ndindex(2, 3):
+            step = np.zeros((2, 3))
+            step[idx] = 1e-6
+            fd = ((W0 + step).T @ (W0 + step) - (W0 - step).T @ (W0 - step)) / 2e-6
+            assert np.allclose(J[(Ellipsis,) + idx], fd), "Error: derivatives of a matrix product are wrong."
+        # the same function of the flattened variables
+        x = VAD(W0.ravel(), packed=packed)
+        g, ref = sin(W) * W[0, 1], sin(x) * x[1]
+        assert np.allclose(g.reshape(-1).der, ref.der) and np.allclose(g.reshape(-1).der2, ref.der2), \
+            "Error: reshape is wrong."
+        assert np.allclose(g[1, 2].der, ref.der[5]) and np.allclose(g[..., 1].der, ref.der[1::3]), \
+            "Error: indexing a matrix is wrong."
+        assert np.allclose(g.T.der, np.swapaxes(g.der, 0, 1)), "Error: transpose is wrong."
+        for view in (g.reshape(3, 2), g.T, g[1], g[:, 1:]):
+            assert np.shares_memory(view.der, g.der) and np.shares_memory(view.val, g.val), \
+                "Error: views of a VAD object copy their derivatives."
+        assert np.allclose(np.sum(g, axis=0).der, g.der.sum(axis=0)) and np.allclose(np.mean(g, axis=-1).val, g.val.mean(1)), \
+            "Error: reductions along an axis are wrong."
+        assert np.allclose(np.sum(g).der, ref.der.sum(axis=0)) and np.allclose(np.prod(W).der, 720. / W0.ravel()), \
+            "Error: reductions of a matrix are wrong."
+    assert np.isclose(np.linalg.norm(W).val, np.linalg.norm(W0)), "Error: Frobenius norm is wrong."
+    dense = sin(W) * W[0, 0]
+    data, rows, cols = jacobian(dense, structured=True)
+    jac = np.zeros((6, 6))
+    jac[rows, cols] = data
+    assert np.allclose(jac, dense.der.reshape(6, 6)) and rows.max() == 5, "Error: structured Jacobian of a matrix is wrong."
+    with pytest.raises(TypeError):
+        jacobian(f, wrt=f)
+
+def test_inputs():
+    x0, P0 = np.array([1., 2., 3.]), np.array([[0.5, -1., 2.], [1., 0.3, 0.2]])
+
+    def f(x, P):
+        return tanh(P @ (x * x)) * np.sum(x)
+
+    v = inputs({"x": x0, "P": P0})
+    out = f(v["x"], v["P"])
+    blocks = jacobian(out, wrt=v)
+    assert list(blocks) == ["x", "P"] and blocks["x"].shape == (2, 3) and blocks["P"].shape == (2, 2, 3), \
+        "Error: the blocks of the Jacobian are wrong."
+    # the same function of one VAD object of all the variables
+    z = VAD(np.concatenate([x0, P0.ravel()]))
+    ref = f(z[:3], z[3:].reshape(2, 3))
+    assert np.allclose(out.der, ref.der) and np.allclose(out.der2, ref.der2), "Error: derivatives of several inputs are wrong."
+    assert np.allclose(blocks["P"], ref.der[:, 3:].reshape(2, 2, 3)), "Error: the block of P is wrong."
+    # only the derivatives with respect to P are propagated
+    vp = inputs({"x": x0, "P": P0}, wrt="P", packed=True)
+    assert isinstance(vp["x"], np.ndarray), "Error: inputs not differentiated should be constants."
+    outp = f(vp["x"], vp["P"])
+    assert outp.der.shape == (2, 6) and list(jacobian(outp, wrt=vp)) == ["P"], "Error: only P should carry derivatives."
+    assert np.allclose(jacobian(outp, wrt=vp)["P"], blocks["P"]) and np.allclose(unpack(outp.der2, 6), ref.der2[:, 3:, 3:]), \
+        "Error: derivatives with respect to P only are wrong."
+    with pytest.raises(ValueError):
+        inputs({"x": x0}, wrt="p")
+    s = sin(inputs({"x": x0, "P": [[1., 2.], [3., 4.]]}, wrt="P")["P"])
+    data, rows, cols = jacobian(s, structured=True)
+    dense = np.zeros((4, 4))
+    dense[rows, cols] = data
+    assert data.shape == rows.shape == cols.shape == (4,) and np.allclose(dense, s.der.reshape(4, 4)), \
+        "Error: structured Jacobian of a matrix input is wrong."
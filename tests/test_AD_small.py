@@ -0,0 +1,55 @@
+# Use a simple (but explicit) path modification to resolve the package properly
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import pytest
+import numpy as np
+from autodiffcst.AD import AD
+from autodiffcst.AD_vec import *
+from autodiffcst.AD_small import *
+
+
+def func(x, y, z):
+    return x * y + sin(z) / x - y ** 2 + exp(x * z) * 3 - 2 / y + cos(x) ** 0.5 + log(z) - (z - 1) ** 3
+
+
+def test_SmallAD_matches_AD():
+    point = [0.5, 1.2, 2.0]
+    dense = func(*[AD(val, tag=i, size=3) for i, val in enumerate(point)])
+    small = func(*small_variables(point))
+    assert isinstance(small, SmallAD) and isinstance(small, AD), "Error: SmallAD should be an AD object."
+    assert np.allclose(small.val, dense.val), "Error: wrong value."
+    assert np.allclose(small.der, dense.der), "Error: wrong first derivatives."
+    assert np.allclose(small.der2, dense.der2), "Error: wrong second derivatives."
+    assert np.array_equal(small.tag, [0, 1, 2]), "Error: wrong tags."
+    first = func(*small_variables(point, order=1))
+    assert first.der2 is None and first.order == 1 and np.allclose(first.der, dense.der), "Error: wrong order 1."
+
+
+def test_VAD_selects_SmallAD():
+    x, y = VAD([1., 2.])
+    assert isinstance(x, SmallAD), "Error: VAD should hand out SmallAD objects for a few variables."
+    f = [x * y, x + y ** 2]
+    assert np.allclose(jacobian(f), [[2., 1.], [1., 4.]]), "Error: wrong Jacobian."
+    assert np.allclose(hessian(x * y * y), [[0., 4.], [4., 2. * 1.]]), "Error: wrong Hessian."
+    assert not isinstance(VAD(np.arange(5.))[0], SmallAD), "Error: larger sizes should use AD objects."
+    [u] = VAD([2.], order=4)
+    assert not isinstance(u, SmallAD), "Error: higher order derivatives need AD objects."
+
+
+def test_SmallAD_mixed():
+    x, y = small_variables([2., -3.])
+    a = AD(2., tag=0, size=2)
+    for f, g in [(x * a, a * a), (a / x, a / a), (a - y, a - AD(-3., tag=1, size=2)), (x ** a, a ** a)]:
+        assert isinstance(f, AD) and np.allclose(f.der, g.der), "Error: mixing SmallAD and AD objects is wrong."
+    v = VAD([1., 2.])
+    h = x * v
+    assert isinstance(h, VAD) and np.allclose(h.der, [[3., 0.], [2., 2.]]), "Error: mixing SmallAD and VAD objects."
+    # powers that are not real in Python arithmetic are left to AD
+    with pytest.warns(RuntimeWarning):
+        assert np.isnan((y ** 0.5).val[0]), "Error: negative base to a fractional power."
+    with pytest.raises(TypeError):
+        x + "1"
+    with pytest.raises(ValueError):
+        SmallAD(1., 0, 5)
@@ -0,0 +1,101 @@
+# Use a simple (but explicit) path modification to resolve the package properly
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import pytest
+import numpy as np
+from autodiffcst.AD_vec import *
+from autodiffcst.AD_sparse import *
+
+
+def residual(x):
+    # a discretized 1-D boundary value problem, tridiagonal Jacobian, plus a dense-ish first row
+    inner = x[:-2] - 2 * x[1:-1] + x[2:] + 0.1 * sin(x[1:-1]) * exp(x[2:])
+    return [x[0] * x[5] - 1, inner, x[-1] ** 2 / x[-2]]
+
+
+def dense_jacobian(x):
+    return np.vstack([np.reshape(f.der, (-1, len(x))) for f in residual(VAD(x))])
+
+
+def dense(rows, cols, data, shape):
+    J = np.zeros(shape)
+    J[rows, cols] = data
+    return J
+
+
+def test_jacobian_sparsity():
+    x = np.linspace(0.1, 1., 12)
+    rows, cols, shape = jacobian_sparsity(residual, x)
+    assert shape == (12, 12), "Error: wrong Jacobian shape."
+    expected = dense_jacobian(x) != 0
+    assert np.array_equal(dense(rows, cols, True, shape).astype(bool), expected), "Error: wrong sparsity pattern."
+    colors = color_columns(rows, cols, shape)
+    assert colors.max() + 1 <= 4, "Error: tridiagonal pattern should need few colors."
+    for r in range(shape[0]):
+        in_row = colors[cols[rows == r]]
+        assert len(np.unique(in_row)) == len(in_row), "Error: columns sharing a row got the same color."
+
+
+def test_sparse_jacobian():
+    x = np.linspace(0.1, 1., 12)
+    data, rows, cols = sparse_jacobian(residual, x)
+    assert np.allclose(dense(rows, cols, data, (12, 12)), dense_jacobian(x)), "Error: sparse Jacobian is wrong."
+    # the pattern and the coloring can be reused at another point
+    pattern = jacobian_sparsity(residual, x)
+    colors = color_columns(*pattern)
+    y = np.linspace(-1., 2., 12)
+    data, rows, cols = sparse_jacobian(residual, y, pattern, colors)
+    assert np.allclose(dense(rows, cols, data, (12, 12)), dense_jacobian(y)), "Error: reused pattern is wrong."
+
+
+def objective(x):
+    # a partially separable objective: chained Rosenbrock terms plus a coupling of the first and last inputs
+    r = x[1:] - x[:-1] ** 2
+    return (r * r).sum() + (1 - x).sum() + x[0] * cos(x[-1]) + log(x[3]) / x[4]
+
+
+def dense_hessian(f, x):
+    from autodiffcst.AD_rev import hvp
+    return np.column_stack([hvp(f, x, e) for e in np.eye(len(x))])
+
+
+def test_hessian_sparsity():
+    x = np.linspace(0.5, 1.5, 10)
+    rows, cols, shape = hessian_sparsity(objective, x)
+    assert shape == (10, 10), "Error: wrong Hessian shape."
+    expected = dense_hessian(objective, x) != 0
+    assert np.array_equal(dense(rows, cols, True, shape).astype(bool), expected), "Error: wrong sparsity pattern."
+    assert np.array_equal(dense(rows, cols, True, shape), dense(cols, rows, True, shape)), "Error: pattern not symmetric."
+    # linear terms do not interact
+    rows, cols, shape = hessian_sparsity(lambda x: 2 * x[0] - abs(x[1]) + x[2] ** 1, [1., 2., 3.])
+    assert len(rows) == 0, "Error: linear function has an empty Hessian pattern."
+    with pytest.raises(TypeError):
+        hessian_sparsity(lambda x: x * x, [1., 2.])
+
+
+def test_color_star():
+    # a path 0 - 1 - 2 - 3 needs three colors for a star coloring
+    rows, cols = np.array([0, 1, 1, 2, 2, 3]), np.array([1, 0, 2, 1, 3, 2])
+    colors = color_star(rows, cols, (4, 4))
+    assert colors.max() + 1 == 3, "Error: path should need three colors."
+    assert np.all(colors[rows] != colors[cols]), "Error: adjacent columns got the same color."
+    # a diagonal Hessian needs one color
+    assert np.array_equal(color_star(np.arange(5), np.arange(5), (5, 5)), np.zeros(5)), "Error: diagonal coloring."
+
+
+def test_sparse_hessian():
+    x = np.linspace(0.5, 1.5, 10)
+    data, rows, cols = sparse_hessian(objective, x)
+    assert np.allclose(dense(rows, cols, data, (10, 10)), dense_hessian(objective, x)), "Error: sparse Hessian is wrong."
+    # the pattern and the coloring can be reused at another point
+    pattern = hessian_sparsity(objective, x)
+    colors = color_star(*pattern)
+    assert colors.max() + 1 <= 5, "Error: banded Hessian should need few colors."
+    y = np.linspace(1., 2., 10)
+    data, rows, cols = sparse_hessian(objective, y, pattern, colors)
+    assert np.allclose(dense(rows, cols, data, (10, 10)), dense_hessian(objective, y)), "Error: reused pattern is wrong."
+    # a coloring that does not separate the entries is refused
+    with pytest.raises(ValueError):
+        sparse_hessian(objective, x, pattern, np.zeros(10, dtype=int))
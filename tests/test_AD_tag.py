@@ -0,0 +1,55 @@
+# Use a simple (but explicit) path modification to resolve the package properly
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import pytest
+import numpy as np
+from autodiffcst.AD import AD
+from autodiffcst.admath import sin, cos, exp, log, sqrt
+from autodiffcst.AD_tag import *
+
+
+def func(x):
+    return sin(x[0] * x[2]) / x[4] + exp(x[0]) ** 2 - log(x[4]) * x[0] + 3 - x[2] + x[1] ** x[3] + 2 / x[5] + 2 ** x[3]
+
+
+def test_SAD_matches_AD():
+    x = np.linspace(0.5, 1.5, 6)
+    dense = func([AD(val, tag=i, size=6) for i, val in enumerate(x)])
+    sparse = func(sparse_variables(x))
+    assert np.array_equal(sparse.tag, np.arange(6)), "Error: tags should be the union of the inputs."
+    converted = sparse.todense()
+    assert np.allclose(converted.val, dense.val), "Error: wrong value."
+    assert np.allclose(converted.der, dense.der), "Error: wrong first derivatives."
+    assert np.allclose(converted.der2, dense.der2), "Error: wrong second derivatives."
+
+    first = func(sparse_variables(x, order=1))
+    assert first.der2 is None, "Error: order 1 should not store second derivatives."
+    assert np.allclose(first.der, sparse.der), "Error: wrong first derivatives with order 1."
+
+
+def test_SAD_tags():
+    n = 20000
+    x = sparse_variables(np.linspace(0.5, 1.5, n))
+    f = x[7] * cos(x[n - 1]) - sqrt(x[3]) * x[7]
+    assert np.array_equal(f.tag, [3, 7, n - 1]), "Error: wrong tags."
+    assert f.der.shape == (3,) and f.der2.shape == (3, 3), "Error: derivatives should only cover the tags."
+    a, b, c = x[3].val[0], x[7].val[0], x[n - 1].val[0]
+    assert np.allclose(f.der, [-b / (2 * np.sqrt(a)), np.cos(c) - np.sqrt(a), -b * np.sin(c)]), "Error: wrong derivatives."
+    assert np.isclose(f.der2[1, 2], -np.sin(c)) and np.isclose(f.der2[2, 1], -np.sin(c)), "Error: wrong mixed derivative."
+    # same tags are combined without merging
+    g = x[7] + x[7] * 2
+    assert np.array_equal(g.tag, [7]) and np.allclose(g.der, [3.]), "Error: wrong derivative for equal tags."
+
+
+def test_SAD_errors():
+    a, b = sparse_variables([1., 2.])
+    with pytest.raises(TypeError):
+        a + "2"
+    with pytest.raises(TypeError):
+        a * np.array([1., 2.])
+    with pytest.raises(Exception):
+        a + SAD(1., 0, 3)
+    with pytest.raises(ValueError):
+        SAD(1., 0, 2, order=3)
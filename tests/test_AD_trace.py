@@ -0,0 +1,82 @@
+# Use a simple (but explicit) path modification to resolve the package properly
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import pytest
+import numpy as np
+from autodiffcst.AD_vec import *
+from autodiffcst.AD_trace import *
+
+
+def residual(x):
+    a, b, c = x
+    return [a * sin(b) + exp(a / b) - c ** 3 + 2 ** a - 1 / b,
+            log(b) * c - abs(a) + cosh(c) / sinh(b),
+            sqrt(b) * tanh(a) + sigmoid(c) - (4 - c)]
+
+
+def test_trace_replay():
+    tr = trace(residual, [0.5, 1.2, 0.3])
+    for point in ([0.5, 1.2, 0.3], [1.1, 0.7, -0.4], [-2., 3., 1.5]):
+        replayed = tr(point)
+        expected = residual(VAD(point))
+        assert np.allclose(replayed.val, [f.val[0] for f in expected]), "Error: replayed values are wrong."
+        assert np.allclose(jacobian(replayed), jacobian(expected)), "Error: replayed Jacobian is wrong."
+        assert np.allclose(replayed.der2, np.array([f.der2 for f in expected])), "Error: replayed Hessians are wrong."
+
+
+def test_trace_vector_and_order():
+    tr = trace(lambda x: x * x[0] + 1, [1., 2.], order=1)
+    f = tr([2., 3.])
+    assert f.der2 is None, "Error: order 1 trace should not replay der2."
+    assert np.allclose(f.val, [5., 7.]) and np.allclose(f.der, [[4., 0.], [3., 2.]]), "Error: vector trace is wrong."
+    tr = trace(lambda x: [x[0] ** x[1], 3.], [2., 3.])
+    f = tr([3., 2.])
+    assert np.allclose(f.val, [9., 3.]) and np.allclose(f.der, [[6., 9. * np.log(3.)], [0., 0.]]), "Error: constant output is wrong."
+
+
+def test_trace_errors():
+    tr = trace(residual, [0.5, 1.2, 0.3])
+    with pytest.raises(ValueError):
+        tr([1., 2.])
+    with pytest.raises(ValueError):
+        trace(residual, [0.5, 1.2, 0.3], order=3)
+    with pytest.raises(TypeError):
+        trace(lambda x: x[0] + "a", [1., 2.])
+
+
+def test_trace_ufuncs():
+    def f(x):
+        return [np.sin(x[0]) * np.exp(x[1]) + np.square(x[2]), np.array([1., 2., 3.]) * x - np.log2(x[1]),
+                np.sqrt(np.abs(x[2])) / np.float64(2.) + np.power(x[0], 3)]
+
+    tr = trace(f, [0.3, 1.2, -0.8])
+    point = [0.5, 0.9, 0.4]
+    replayed, expected = tr(point), f(VAD(point))
+    assert np.allclose(replayed.der, np.vstack([g.der for g in expected])), "Error: replayed ufuncs are wrong."
+    assert np.allclose(replayed.der2, np.concatenate([np.reshape(g.der2, (-1, 3, 3)) for g in expected])), \
+        "Error: replayed second derivatives of ufuncs are wrong."
+    with pytest.raises(TypeError):
+        trace(lambda x: np.arctan2(x[0], x[1]), [1., 2.])
+
+
+def test_trace_allocations():
+    import tracemalloc
+    n = 200
+    tr = trace(lambda x: [x[0] + 2 * x[1] - x[2], x[3] * x[4]], np.ones(n))
+    tracemalloc.start()
+    f = tr(np.arange(n, dtype=float))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # a dense seed of the second derivatives alone takes n ** 3 floats
+    assert peak < n ** 3 * 8 / 20, "Error: replay forms second derivatives of linear operations."
+    assert np.allclose(f.der2[0], 0.) and f.der2[1][3, 4] == 1. and np.allclose(f.der[1, 3:5], [4., 3.]), \
+        "Error: replayed derivatives are wrong."
+    chain = trace(lambda x: [10 * (x[i + 1] - x[i] * x[i]) + (1 - x[i]) for i in range(n - 1)], np.ones(n))
+    tracemalloc.start()
+    chain(np.linspace(0.1, 1., n))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # intermediate results are released after their last use: the outputs and their copy in the VAD object
+    assert peak < 3 * n * n * n * 8, "Error: replay keeps the intermediate results."